@@ -0,0 +1,250 @@
+"""
+guitarzorn — checkpoint per battuta dei segni (ri-render incrementale)
+======================================================================
+Cambiare una nota della partitura rifaceva tutto: ground, velatura,
+barline e tutti gli eventi. Qui lo stato della tela si salva prima dei
+segni (la "base") e poi a ogni battuta (o ogni N eventi) mentre
+riff_marks/walk dipingono; il render successivo confronta la tabella
+delle pennellate della partitura nuova con quella dipinta
+(stroke_map.first_diff: copre anche ciò che un evento cambia negli
+altri — range MIDI, svolte del cammino v9, jitter) e riparte
+dall'ultimo checkpoint prima della prima pennellata diversa. Modificare
+l'ultima battuta costa la coda della pittura (più il render).
+
+Layout (una directory per run, content-addressed sulla ricetta):
+    <root>/<sha256>/table.npz     tabella delle pennellate dipinte
+    <root>/<sha256>/score.json    la partitura dipinta (Score.to_events)
+    <root>/<sha256>/<pos>.npz     stato prima della pennellata pos
+
+Uno stato è conc + height + meta (rng numpy, indice delle pennellate,
+statistiche; nella base anche lo stato di `random`, da cui la tabella
+si ricompila). Compressione:
+
+  • quantizzato (default) — conc uint16 (passo 1/65535), height float16:
+    la metà dei byte, e con storage 'u16'/'f16' è esattamente lo stato
+    della tela. Con storage float32 la ripresa differisce dal render da
+    zero di 1/255 su ~2% dei pixel (il troncamento a 8 bit scatta
+    per qualunque perturbazione; height in float16 ne conta lo 0.01%).
+  • esatto (exact=True) — float32: ripresa identica bit per bit.
+
+  • delta — la base è la tela intera; ogni checkpoint successivo solo il
+    rettangolo cambiato rispetto al precedente (una battuta tocca una
+    striscia della tela). Lo stato a pos si ricostruisce applicando i
+    delta in ordine.
+  • codifica — differenza orizzontale sui bit, piani di byte, zlib
+    livello 1 (encode): sulla base velata metà dei byte di zlib da solo
+    e un terzo del tempo (≈0.3 s per 1920×1080 quantizzato).
+
+Politica: come ground_cache.py, LRU limitata in byte sui run. Aprire un
+run ne aggiorna l'mtime; dopo ogni stato salvato i run meno recenti
+(mai quello in corso) vengono rimossi finché la radice sta sotto
+max_bytes.
+
+Le scritture sono atomiche (file temporaneo + rename). Dipende solo da
+numpy, ground_cache.py e dalla libreria standard.
+"""
+
+import glob
+import json
+import os
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import ground_cache
+from ground_cache import GroundCache
+
+ZLIB_LEVEL = 1       # il tempo conta più dell'ultimo 10% di byte
+
+
+def quantize(conc: np.ndarray, height: np.ndarray, exact: bool = False
+             ) -> Tuple[np.ndarray, np.ndarray]:
+    """(conc, height) float → forma d'archivio (uint16/float16 o float32)."""
+    if exact:
+        return (np.asarray(conc, np.float32).copy(),
+                np.asarray(height, np.float32).copy())
+    q = np.round(np.clip(conc, 0, 1) * 65535.0).astype(np.uint16)
+    return q, np.asarray(height, np.float16).copy()
+
+
+def dequantize(conc: np.ndarray, height: np.ndarray
+               ) -> Tuple[np.ndarray, np.ndarray]:
+    """Inversa di quantize → float32, sempre copie: la tela ci dipinge
+    sopra, l'archivio (CheckpointRun._prev) deve restare com'era."""
+    if conc.dtype == np.uint16:
+        conc = conc.astype(np.float32) * np.float32(1.0 / 65535.0)
+    else:
+        conc = conc.astype(np.float32)
+    return conc, height.astype(np.float32)
+
+
+def encode(a: np.ndarray) -> np.ndarray:
+    """Array (h, w, ...) → byte compressi (uint8): differenza lungo w sui
+    bit (interi senza segno, modulare), piani di byte, zlib."""
+    a = np.ascontiguousarray(a)
+    n = a.dtype.itemsize
+    u = a.view(f'<u{n}')
+    d = u.copy()
+    d[:, 1:] -= u[:, :-1]
+    planes = d.view(np.uint8).reshape(-1, n).T
+    return np.frombuffer(zlib.compress(planes.tobytes(), ZLIB_LEVEL),
+                         np.uint8)
+
+
+def decode(z: np.ndarray, shape, dtype) -> np.ndarray:
+    """Inversa di encode."""
+    dtype = np.dtype(dtype)
+    n = dtype.itemsize
+    planes = np.frombuffer(zlib.decompress(z.tobytes()), np.uint8)
+    d = planes.reshape(n, -1).T.copy().view(f'<u{n}').reshape(shape)
+    return np.cumsum(d, axis=1, dtype=d.dtype).view(dtype)
+
+
+def changed_box(a: np.ndarray, b: np.ndarray, ah: np.ndarray,
+                bh: np.ndarray) -> Tuple[int, int, int, int]:
+    """(y0, y1, x0, x1) del rettangolo in cui (a, ah) e (b, bh) differiscono
+    (vuoto se sono uguali)."""
+    ch = (a != b).any(-1) | (ah != bh)
+    rows, cols = np.flatnonzero(ch.any(1)), np.flatnonzero(ch.any(0))
+    if not len(rows):
+        return 0, 0, 0, 0
+    return int(rows[0]), int(rows[-1]) + 1, int(cols[0]), int(cols[-1]) + 1
+
+
+class CheckpointRun:
+    """I checkpoint di un run (stessa ricetta della base): vedi modulo."""
+
+    def __init__(self, path: str, exact: bool = False,
+                 on_save: Optional[Callable[[], None]] = None):
+        self.path = path
+        self.exact = exact
+        self.on_save = on_save          # dopo ogni stato (eviction LRU)
+        self._prev: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, pos: int) -> str:
+        return os.path.join(self.path, f'{pos:07d}.npz')
+
+    def _write(self, path: str, **arrays):
+        tmp = os.path.join(self.path,
+                           f'.tmp-{os.getpid()}-{os.path.basename(path)}')
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    def positions(self) -> List[int]:
+        """Posizioni salvate (pennellate già dipinte), in ordine."""
+        return sorted(int(os.path.basename(f)[:-4])
+                      for f in glob.glob(os.path.join(self.path,
+                                                      '[0-9]*.npz')))
+
+    # ── stati ───────────────────────────────────────────────────────────
+    def save(self, pos: int, conc: np.ndarray, height: np.ndarray,
+             meta: Dict):
+        """Stato prima della pennellata pos: intero a pos=0, altrimenti il
+        rettangolo cambiato dall'ultimo stato salvato o caricato."""
+        q, qh = quantize(conc, height, self.exact)
+        if pos == 0 or self._prev is None:
+            box = (0, q.shape[0], 0, q.shape[1])
+        else:
+            box = changed_box(q, self._prev[0], qh, self._prev[1])
+        y0, y1, x0, x1 = box
+        c, h = q[y0:y1, x0:x1], qh[y0:y1, x0:x1]
+        codec = dict(conc=[c.shape, c.dtype.str], height=[h.shape, h.dtype.str])
+        self._write(self._file(pos), box=np.array(box, np.int64),
+                    conc=encode(c), height=encode(h),
+                    codec=np.array(json.dumps(codec)),
+                    meta=np.array(json.dumps(meta)))
+        self._prev = (q, qh)
+        if self.on_save is not None:
+            self.on_save()
+
+    def load(self, pos: int) -> Tuple[np.ndarray, np.ndarray, Dict]:
+        """(conc, height) float32 + meta dello stato a pos (base + delta)."""
+        q = qh = meta = None
+        for p in self.positions():
+            if p > pos:
+                break
+            with np.load(self._file(p)) as z:
+                y0, y1, x0, x1 = z['box'].tolist()
+                codec = json.loads(str(z['codec']))
+                c = decode(z['conc'], *codec['conc'])
+                h = decode(z['height'], *codec['height'])
+                meta = json.loads(str(z['meta']))
+            if q is None:
+                q, qh = c, h
+            else:
+                q[y0:y1, x0:x1] = c
+                qh[y0:y1, x0:x1] = h
+        if q is None:
+            raise FileNotFoundError(f'nessun checkpoint ≤ {pos} in '
+                                    f'{self.path}')
+        self._prev = (q, qh)
+        conc, height = dequantize(q, qh)
+        return conc, height, meta
+
+    def base_meta(self) -> Optional[Dict]:
+        """Meta della base (pos 0), None se il run non ne ha."""
+        try:
+            with np.load(self._file(0)) as z:
+                return json.loads(str(z['meta']))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def drop_after(self, pos: int):
+        """Toglie gli stati oltre pos (dipinti con un'altra tabella)."""
+        for p in self.positions():
+            if p > pos:
+                os.remove(self._file(p))
+
+    # ── ciò che è stato dipinto ─────────────────────────────────────────
+    def save_table(self, tab: Dict[str, np.ndarray], events: List[Dict]):
+        tmp = os.path.join(self.path, f'.tmp-{os.getpid()}-table.npz')
+        np.savez_compressed(tmp, **tab)
+        os.replace(tmp, os.path.join(self.path, 'table.npz'))
+        tmp = os.path.join(self.path, f'.tmp-{os.getpid()}-score.json')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(events, f)
+        os.replace(tmp, os.path.join(self.path, 'score.json'))
+
+    def load_table(self) -> Optional[Tuple[Dict[str, np.ndarray],
+                                           List[Dict]]]:
+        try:
+            with np.load(os.path.join(self.path, 'table.npz')) as z:
+                tab = {k: z[k] for k in z.files}
+            with open(os.path.join(self.path, 'score.json'),
+                      encoding='utf-8') as f:
+                return tab, json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+class CheckpointStore:
+    """Radice dei checkpoint: un CheckpointRun per ricetta, LRU limitata
+    a max_bytes sui run."""
+
+    DEFAULT_ROOT = os.path.join(
+        os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')),
+        'guitarzorn', 'checkpoints')
+
+    def __init__(self, root: Optional[str] = None, exact: bool = False,
+                 max_bytes: int = 2 << 30):
+        self.root = root or self.DEFAULT_ROOT
+        self.exact = exact
+        self.max_bytes = int(max_bytes)
+        os.makedirs(self.root, exist_ok=True)
+
+    def run(self, recipe: Dict) -> CheckpointRun:
+        key = GroundCache.key(dict(recipe, exact=self.exact))
+        path = os.path.join(self.root, key)
+        ground_cache.touch(path)                          # tocco LRU
+        return CheckpointRun(path, self.exact,
+                             on_save=lambda: self.evict(keep=key))
+
+    def entries(self):
+        """[(mtime, bytes, key)] dei run, dal meno recente."""
+        return ground_cache.entries(self.root)
+
+    def evict(self, keep: Optional[str] = None):
+        """Rimuove i run meno recenti finché il totale ≤ max_bytes."""
+        ground_cache.evict(self.root, self.max_bytes, keep)
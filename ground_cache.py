@@ -0,0 +1,135 @@
+"""
+guitarzorn — cache persistente dell'imprimitura
+================================================
+Il ground di v8/v9 (≈130 pennellate larghe + velatura blur σ=14) dipende
+solo da (seed, W, H, ricetta del fondo, codice del motore): per lo stesso
+seed è sempre identico. Questa cache lo salva su disco una volta sola e
+lo restituisce come array memory-mapped (zero-copy, copy-on-write: le
+pennellate successive modificano pagine private, il file resta intatto).
+
+Layout (content-addressed, una directory per chiave):
+    <root>/<sha256>/conc.npy      (H,W,4) float32
+    <root>/<sha256>/height.npy    (H,W)   float32
+    <root>/<sha256>/weave.npy     tessera periodica (o (H,W)) float32
+    <root>/<sha256>/meta.json     stato rng (numpy + random) e ricetta
+
+Politica: LRU limitata in byte. Ogni lettura aggiorna l'mtime della voce;
+dopo ogni scrittura le voci meno recenti vengono rimosse finché la cache
+sta sotto max_bytes. Le scritture sono atomiche (directory temporanea +
+rename), quindi più processi possono condividere la stessa root.
+
+Dipende solo da numpy e dalla libreria standard.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class GroundCache:
+    """Cache LRU su disco dello stato post-ground di una OilCanvas."""
+
+    ARRAYS = ('conc', 'height', 'weave')
+    DEFAULT_ROOT = os.path.join(
+        os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')),
+        'guitarzorn', 'ground')
+
+    def __init__(self, root: Optional[str] = None, max_bytes: int = 2 << 30):
+        self.root = root or self.DEFAULT_ROOT
+        self.max_bytes = int(max_bytes)
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def key(recipe: Dict) -> str:
+        """Chiave content-addressed: sha256 della ricetta serializzata."""
+        blob = json.dumps(recipe, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, np.ndarray], Dict]]:
+        """Array memory-mapped (copy-on-write) + meta, oppure None."""
+        d = self._path(key)
+        try:
+            with open(os.path.join(d, 'meta.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+            arrays = {nm: np.load(os.path.join(d, nm + '.npy'), mmap_mode='c')
+                      for nm in self.ARRAYS}
+        except (OSError, ValueError):
+            return None
+        touch(d)                                          # tocco LRU
+        return arrays, meta
+
+    def put(self, key: str, arrays: Dict[str, np.ndarray], meta: Dict):
+        """Scrive la voce in modo atomico, poi applica l'eviction LRU."""
+        final = self._path(key)
+        if os.path.isdir(final):
+            return
+        tmp = os.path.join(self.root, f'.tmp-{key[:16]}-{os.getpid()}')
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        try:
+            for nm in self.ARRAYS:
+                np.save(os.path.join(tmp, nm + '.npy'),
+                        np.ascontiguousarray(arrays[nm], np.float32))
+            with open(os.path.join(tmp, 'meta.json'), 'w',
+                      encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.rename(tmp, final)
+        except OSError:
+            # un altro processo l'ha già scritta (o disco pieno): la cache
+            # è un'ottimizzazione, mai un errore del rendering
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        self.evict(keep=key)
+
+    def entries(self):
+        """[(mtime, bytes, key)] delle voci complete, dalla meno recente."""
+        return entries(self.root)
+
+    def evict(self, keep: Optional[str] = None):
+        """Rimuove le voci meno recenti finché il totale ≤ max_bytes."""
+        evict(self.root, self.max_bytes, keep)
+
+
+# ── LRU per directory (anche checkpoints.CheckpointStore) ──────────────────
+def touch(path: str):
+    """Aggiorna l'mtime di una voce (lettura = uso recente)."""
+    now = time.time()
+    try:
+        os.utime(path, (now, now))
+    except OSError:
+        pass
+
+
+def entries(root: str) -> List[Tuple[float, int, str]]:
+    """[(mtime, bytes, nome)] delle directory sotto root (le temporanee
+    .tmp-* escluse), dalla meno recente."""
+    out = []
+    for nm in os.listdir(root):
+        d = os.path.join(root, nm)
+        if nm.startswith('.') or not os.path.isdir(d):
+            continue
+        size = sum(e.stat().st_size for e in os.scandir(d) if e.is_file())
+        out.append((os.stat(d).st_mtime, size, nm))
+    return sorted(out)
+
+
+def evict(root: str, max_bytes: int, keep: Optional[str] = None):
+    """Rimuove le directory meno recenti finché il totale ≤ max_bytes
+    (keep mai, anche se da sola lo supera)."""
+    ents = entries(root)
+    total = sum(sz for _, sz, _ in ents)
+    for _, sz, nm in ents:
+        if total <= max_bytes:
+            break
+        if nm == keep:
+            continue
+        shutil.rmtree(os.path.join(root, nm), ignore_errors=True)
+        total -= sz
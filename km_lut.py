@@ -0,0 +1,190 @@
+"""
+guitarzorn — Kubelka-Munk tabulato (LUT 3D baricentrica + pow 1D)
+==================================================================
+km_rgb() di v8 fa, per pixel, K/S = c·KS_PIG (4→3) e poi
+R = 1 + K/S − sqrt((K/S)² + 2·K/S). Le concentrazioni stanno sul
+3-simplesso (somma 1), quindi bastano 3 coordinate baricentriche
+(ocra, vermiglio, nero; bianco = 1 − Σ, come lo storage compatto) e la
+riflettanza è una funzione liscia su un cubo: la si tabula una volta e
+la si interpola in trilineare.
+
+Griglia: R campioni per asse, spaziati in sqrt (c = (i/(R−1))²). Vicino
+al bianco la KM va come 1 − sqrt(2·K/S) — ripidissima — e una griglia
+uniforme sbaglia di decine di livelli; la spaziatura in sqrt concentra
+i nodi proprio lì. I nodi fuori dal simplesso (Σ > 1) prolungano la
+stessa formula (bianco negativo, K/S clampato a 0), così le celle che
+tagliano la faccia Σ = 1 interpolano una funzione continua.
+
+Errore massimo |ΔRGB| (su 0..255, misurato su 200k miscele Dirichlet
+più tutte le coppie di pigmenti, vedi KMLut.measure_error):
+
+    R     tabella (uint16)   max errore
+    33      0.2 MB             ~3.2
+    65      1.6 MB             ~1.2      (default)
+    129    12.9 MB             ~0.4
+
+PowLut tabula x^shininess su [0,1] (1D, lineare): il termine speculare
+del fused. In NumPy le tabelle NON sono più veloci della formula (gli 8
+gather della trilineare costano più di matmul + sqrt vettoriali): la
+strada di default di render() resta esatta. Le tabelle servono dove il
+costo è per pixel scalare — il motore del browser (concToRGB di
+live/guitarzorn_live.html) — e come riferimento verificabile.
+
+Per la pagina live: python km_lut.py --palette live (i K/S di
+concToRGB, che non ha la correzione del nero di v8).
+
+Formato binario (little-endian), letto da loadKMLut() nella pagina live:
+    8 byte  magic b'KMLUT1\\0\\0'
+    uint32  R
+    uint32  canali (3)
+    float32 esponente della spaziatura (2.0 = sqrt)
+    float32 errore massimo misurato (0..1)
+    uint16  tabella R·R·R·3, ordine [ocra][vermiglio][nero][rgb], 0..65535
+"""
+
+import struct
+from typing import Optional, Tuple
+
+import numpy as np
+
+MAGIC = b'KMLUT1\0\0'
+
+
+def km_exact(conc: np.ndarray, ks_pig: np.ndarray) -> np.ndarray:
+    """La formula di riferimento (come km_rgb di v8)."""
+    ks = conc @ ks_pig
+    return np.clip(1.0 + ks - np.sqrt(ks * ks + 2.0 * ks), 0.0, 1.0)
+
+
+class KMLut:
+    """LUT trilineare della riflettanza KM sulle coordinate (c0, c1, c2)."""
+
+    WARP = 2.0                      # nodi a c = u^2, u uniforme in [0,1]
+
+    def __init__(self, ks_pig: np.ndarray, res: int = 65,
+                 table: Optional[np.ndarray] = None):
+        if res < 2:
+            raise ValueError(f"res deve essere ≥ 2, non {res}")
+        self.res = int(res)
+        self.ks_pig = np.asarray(ks_pig, np.float64)
+        if table is None:
+            g = np.linspace(0.0, 1.0, self.res) ** self.WARP
+            c0, c1, c2 = np.meshgrid(g, g, g, indexing='ij')
+            c = np.stack([c0, c1, c2, 1.0 - c0 - c1 - c2], -1)
+            ks = np.maximum(c @ self.ks_pig, 0.0)
+            table = np.clip(1.0 + ks - np.sqrt(ks * ks + 2.0 * ks), 0, 1)
+        # righe (R³, 3): un gather per vertice della cella
+        self.table = np.ascontiguousarray(table, np.float32).reshape(-1, 3)
+        self.max_error: Optional[float] = None
+
+    def __call__(self, conc: np.ndarray) -> np.ndarray:
+        """Concentrazioni (...,4) (o (...,3) baricentriche) → RGB (...,3)."""
+        R = self.res
+        shape = conc.shape[:-1]
+        u = np.sqrt(np.clip(conc[..., :3], 0, 1), dtype=np.float32)
+        x = u.reshape(-1, 3) * np.float32(R - 1)
+        i = np.minimum(x.astype(np.int32), R - 2)
+        t = x - i
+        base = (i[:, 0] * R + i[:, 1]) * R + i[:, 2]
+        t0, t1, t2 = t[:, 0:1], t[:, 1:2], t[:, 2:3]
+        T = self.table
+
+        def edge(o):                                    # lungo il nero
+            a = T[base + o]
+            return a + (T[base + o + 1] - a) * t2
+        c00, c01 = edge(0), edge(R)
+        c10, c11 = edge(R * R), edge(R * R + R)
+        c0 = c00 + (c01 - c00) * t1                     # lungo il vermiglio
+        c1 = c10 + (c11 - c10) * t1
+        return (c0 + (c1 - c0) * t0).reshape(shape + (3,))  # lungo l'ocra
+
+    def measure_error(self, n: int = 200_000, seed: int = 0) -> float:
+        """Max |LUT − formula| su miscele casuali + coppie di pigmenti."""
+        rng = np.random.default_rng(seed)
+        c = rng.dirichlet([0.3] * 4, n)
+        t = np.linspace(0, 1, 1001)[:, None]
+        eye = np.eye(4)
+        pairs = [eye[a] * (1 - t) + eye[b] * t
+                 for a in range(4) for b in range(a + 1, 4)]
+        c = np.concatenate([c] + pairs).astype(np.float32)
+        self.max_error = float(np.abs(
+            self(c) - km_exact(c.astype(np.float64), self.ks_pig)).max())
+        return self.max_error
+
+    # ── esportazione per il browser ─────────────────────────────────────
+    def to_bytes(self) -> bytes:
+        if self.max_error is None:
+            self.measure_error()
+        q = np.round(self.table.reshape(-1) * 65535.0).astype('<u2')
+        return (MAGIC + struct.pack('<IIff', self.res, 3, self.WARP,
+                                    self.max_error) + q.tobytes())
+
+    def save(self, path: str):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def from_bytes(cls, blob: bytes, ks_pig: np.ndarray) -> 'KMLut':
+        if blob[:8] != MAGIC:
+            raise ValueError("non è una tabella KMLUT1")
+        res, ch, warp, err = struct.unpack('<IIff', blob[8:24])
+        if ch != 3 or warp != cls.WARP:
+            raise ValueError(f"formato non supportato (canali {ch}, "
+                             f"spaziatura {warp})")
+        q = np.frombuffer(blob, '<u2', res ** 3 * 3, 24)
+        lut = cls(ks_pig, res, table=q.astype(np.float32) / 65535.0)
+        lut.max_error = err
+        return lut
+
+
+class PowLut:
+    """x^shininess su [0,1], tabulato su n intervalli (interpolazione lineare)."""
+
+    def __init__(self, shininess: float, n: int = 1024):
+        self.shininess, self.n = float(shininess), int(n)
+        self.table = (np.linspace(0.0, 1.0, self.n + 1)
+                      ** self.shininess).astype(np.float32)
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        u = np.clip(x, 0, 1) * np.float32(self.n)
+        i = np.minimum(u.astype(np.int32), self.n - 1)
+        a = self.table[i]
+        return a + (self.table[i + 1] - a) * (u - i)
+
+
+class KMFused:
+    """KM da LUT 3D + speculare da LUT 1D in un solo valutatore (per _shade)."""
+
+    def __init__(self, km: KMLut, shininess: float, n: int = 1024):
+        self.km = km
+        self.spec = PowLut(shininess, n)
+
+    def __call__(self, conc: np.ndarray, spec_dot: np.ndarray
+                 ) -> Tuple[np.ndarray, np.ndarray]:
+        """(RGB, spec_dot^shininess)."""
+        return self.km(conc), self.spec(spec_dot)
+
+
+def ks_live(pig_rgb: np.ndarray) -> np.ndarray:
+    """K/S della pagina live (clamp 0.012..0.985, nessuna correzione del nero)."""
+    r = np.clip(np.asarray(pig_rgb, np.float64), 0.012, 0.985)
+    return (1.0 - r) ** 2 / (2.0 * r)
+
+
+if __name__ == '__main__':
+    import argparse
+    from zorn_riff_v8 import KS_PIG, PIG_RGB
+    p = argparse.ArgumentParser(
+        description='guitarzorn — esporta la LUT Kubelka-Munk per il browser')
+    p.add_argument('--res', type=int, default=65)
+    p.add_argument('--out', default='live/km_lut.bin')
+    p.add_argument('--palette', choices=['live', 'v8'], default='live',
+                   help="live = i K/S di concToRGB (la pagina non cambia "
+                        "aspetto); v8 = KS_PIG con il nero corretto")
+    args = p.parse_args()
+    ks = ks_live(PIG_RGB) if args.palette == 'live' else KS_PIG
+    lut = KMLut(ks, args.res)
+    err = lut.measure_error()
+    lut.save(args.out)
+    print(f"LUT {args.res}³ [{args.palette}] → {args.out}  "
+          f"(max errore {err * 255:.2f}/255)")
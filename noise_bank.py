@@ -0,0 +1,149 @@
+"""
+guitarzorn — banca di rumore per pennellata
+============================================
+Ogni pennellata di v7/v8 (e quindi del cammino v9, che dipinge con la
+tela v8) sintetizza il suo rumore: due snoise1 (tremolio della mano,
+esaurimento del pigmento), un carico per setola e un campo snoise2 di
+striature che passa per un blur sull'intero nastro (n, nS). Su migliaia
+di pennellate è una fetta grossa del costo.
+
+Qui lo stesso rumore è precalcolato una volta per seed e poi solo letto:
+
+  • knots  — una lunga sequenza di nodi gaussiani. snoise1(rng, n, scale)
+             interpola linearmente k = n/scale + 2 nodi su n campioni; la
+             banca legge una finestra della sequenza a partire da un
+             offset, con lo stesso passo fra i nodi, e la normalizza a
+             std 1 come snoise1. Stessa levigatezza, stessa std.
+  • loads  — uniformi [0,1) per il carico delle setole (rng.random(nS)).
+  • streak — tessera periodica (STREAK_TILE px nominali) costruita come
+             snoise2: nodi ogni 16 px lungo il tratto e 1.6 px attraverso,
+             espansi a blocchi e sfocati a σ=1.5 (con contesto avvolto).
+             Il nastro di una pennellata è una finestra della tessera
+             (a scale≠1 campionata a passo 1/scale), normalizzata a std 1.
+
+Gli offset sono 5 uniformi per pennellata: dallo stream rng della tela
+(rng_mode='stream', una sola estrazione per tratto) oppure da un hash di
+(seed, indice) (rng_mode='counter': nessun generatore per pennellata).
+
+bank(seed) tiene in memoria le banche già costruite: tutte le tele dello
+stesso seed (anche quelle brevi dei worker) condividono la stessa.
+"""
+
+import threading
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from zorn_blur import blur, support
+
+N_OFFSETS = 5                        # tremolio, esaurimento, carico, striature t/s
+
+
+class NoiseBank:
+    """Rumore precalcolato di un seed (≈5 MB), letto a offset."""
+
+    KNOTS = 1 << 16
+    LOADS = 1 << 16
+    STREAK_TILE = (4096, 256)        # (lungo il tratto, attraverso) px nominali
+    STREAK_KNOTS = (16, 1.6)         # passo dei nodi come snoise2(…, 16, 1.6)
+
+    def __init__(self, seed: int):
+        self.seed = seed
+        rng = np.random.Generator(np.random.Philox(key=[seed & (2**64 - 1),
+                                                        0xBA4C]))
+        self.knots = rng.standard_normal(self.KNOTS).astype(np.float32)
+        self.loads = rng.random(self.LOADS).astype(np.float32)
+
+        Lt, Ls = self.STREAK_TILE
+        st, ss = self.STREAK_KNOTS
+        kt, ks = int(Lt / st), int(round(Ls / ss))
+        g = rng.standard_normal((kt, ks)).astype(np.float32)
+        up = g[np.arange(Lt) // int(st)][:, (np.arange(Ls) / ss).astype(int)]
+        p = support(1.5)
+        ext = np.pad(up, p, mode='wrap')
+        tile = blur(ext, 1.5, out=ext)[p:p + Lt, p:p + Ls]
+        self.streak_tile = np.ascontiguousarray(tile / tile.std())
+
+    def nbytes(self) -> int:
+        return (self.knots.nbytes + self.loads.nbytes
+                + self.streak_tile.nbytes)
+
+    # ── lettura ─────────────────────────────────────────────────────────
+    def smooth1d(self, u: np.ndarray, n: Sequence[int],
+                 scale: float) -> np.ndarray:
+        """snoise1 per N pennellate → (N, max n), zeri oltre n[i].
+
+        u — offset in [0,1) per riga; scale — passo dei nodi come in
+        snoise1 (k = max(2, n/scale + 2) nodi su n campioni).
+        """
+        n = np.asarray(n, np.int64)
+        N, nmax = len(n), int(n.max())
+        k = np.maximum(2, (n / max(scale, 1.0)).astype(np.int64) + 2)
+        step = (k - 1) / np.maximum(n - 1, 1)            # nodi per campione
+        j = np.arange(nmax)
+        pos = (np.asarray(u, np.float64) * self.KNOTS)[:, None] + j * step[:, None]
+        i0 = pos.astype(np.int64)
+        f = (pos - i0).astype(np.float32)
+        K = self.knots
+        v = K[i0 % self.KNOTS] * (1 - f) + K[(i0 + 1) % self.KNOTS] * f
+        valid = j[None, :] < n[:, None]
+        v[~valid] = 0.0
+        # momenti per somma cumulativa (sequenziale, float64): la riga non
+        # dipende da nmax → stroke_many ≡ N stroke() anche nell'ultimo bit
+        v64 = v.astype(np.float64)
+        rows = np.arange(N)
+        m = np.cumsum(v64, 1)[rows, n - 1] / n
+        var = np.cumsum(v64 * v64, 1)[rows, n - 1] / n - m * m
+        s = np.sqrt(np.maximum(var, 0))
+        v /= np.where(s > 1e-6, s, 1.0).astype(np.float32)[:, None]
+        v[~valid] = 0.0
+        return v
+
+    def uniform(self, u: np.ndarray, n: Sequence[int]) -> List[np.ndarray]:
+        """rng.random(n[i]) per N pennellate (finestre della sequenza)."""
+        o = (np.asarray(u, np.float64) * self.LOADS).astype(np.int64)
+        return [self.loads.take(np.arange(o[i], o[i] + int(n[i])),
+                                mode='wrap') for i in range(len(o))]
+
+    def streak(self, ut: float, us: float, n: int, nS: int,
+               scale=1.0) -> np.ndarray:
+        """Campo di striature (n, nS) a std 1, come snoise2(…, 16·s, 1.6·s).
+
+        scale — campioni per px nominale, comune o (lungo, attraverso).
+        """
+        Lt, Ls = self.STREAK_TILE
+        st, ss = (scale, scale) if np.isscalar(scale) else scale
+        ti = int(ut * Lt) + np.round(np.arange(n) / st).astype(np.int64)
+        si = int(us * Ls) + np.round(np.arange(nS) / ss).astype(np.int64)
+        up = self.streak_tile.take(ti, 0, mode='wrap').take(si, 1, mode='wrap')
+        s = up.std()
+        return up / s if s > 1e-6 else up
+
+
+_BANKS: Dict[int, NoiseBank] = {}
+_LOCK = threading.Lock()
+
+
+def bank(seed: int) -> NoiseBank:
+    """La NoiseBank del seed (costruita alla prima richiesta, poi condivisa)."""
+    nb = _BANKS.get(seed)
+    if nb is None:
+        with _LOCK:
+            nb = _BANKS.get(seed)
+            if nb is None:
+                nb = _BANKS[seed] = NoiseBank(seed)
+    return nb
+
+
+def hash_uniform(seed: int, index: np.ndarray, m: int = N_OFFSETS
+                 ) -> np.ndarray:
+    """(N, m) uniformi [0,1) funzione pura di (seed, indice) — splitmix64."""
+    idx = np.asarray(index, np.uint64).reshape(-1, 1)
+    lane = np.arange(m, dtype=np.uint64)[None, :]
+    key = np.array([seed & (2**64 - 1)], np.uint64)
+    z = (key * np.uint64(0x9E3779B97F4A7C15)
+         + idx * np.uint64(0xD1B54A32D192ED03) + lane * np.uint64(0xBF58476D1CE4E5B9))
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z ^= z >> np.uint64(31)
+    return (z >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
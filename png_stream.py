@@ -0,0 +1,78 @@
+"""
+guitarzorn — writer PNG a strisce (streaming)
+==============================================
+PIL vuole l'immagine intera in memoria prima di codificarla; alle
+dimensioni da stampa (8K+) la sola copia uint8 pesa centinaia di MB.
+PNGStream scrive un PNG valido banda per banda: IHDR e pHYs subito,
+poi ogni blocco di righe passa per zlib e finisce in un chunk IDAT,
+infine IEND. In memoria resta solo la banda corrente (+ la riga
+precedente per il filtro Up).
+
+Profondità 8 bit (come Image.save) o 16 bit (RGB big-endian, per la
+stampa). Dipende solo da numpy e dalla libreria standard.
+"""
+
+import struct
+import zlib
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class PNGStream:
+    """Encoder PNG RGB incrementale: write_rows() per bande, poi close()."""
+
+    def __init__(self, path: str, W: int, H: int, bits: int = 8,
+                 dpi: Optional[Tuple[float, float]] = None, level: int = 6):
+        if bits not in (8, 16):
+            raise ValueError(f"profondità non supportata: {bits} (8 o 16)")
+        self.W, self.H, self.bits = W, H, bits
+        self.rows = 0
+        self._prev = np.zeros(W * 3 * (bits // 8), np.uint8)
+        self._z = zlib.compressobj(level)
+        self._f = open(path, 'wb')
+        self._f.write(b'\x89PNG\r\n\x1a\n')
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', W, H, bits, 2, 0, 0, 0))
+        if dpi is not None:
+            ppm = [int(v / 0.0254 + 0.5) for v in dpi]    # come PIL
+            self._chunk(b'pHYs', struct.pack('>IIB', ppm[0], ppm[1], 1))
+
+    def _chunk(self, tag: bytes, data: bytes):
+        self._f.write(struct.pack('>I', len(data)) + tag + data
+                      + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+    def write_rows(self, rows: np.ndarray):
+        """Aggiunge righe (h, W, 3) uint8 (bits=8) o uint16 (bits=16)."""
+        h = rows.shape[0]
+        if rows.shape[1:] != (self.W, 3) or self.rows + h > self.H:
+            raise ValueError(f"banda {rows.shape} fuori formato "
+                             f"(righe scritte {self.rows}/{self.H})")
+        dt = np.uint8 if self.bits == 8 else np.dtype('>u2')
+        raw = np.ascontiguousarray(rows.astype(dt)).view(np.uint8)
+        raw = raw.reshape(h, -1)
+        # filtro Up (tipo 2): differenza con la riga sopra, modulo 256
+        up = np.empty((h, raw.shape[1] + 1), np.uint8)
+        up[:, 0] = 2
+        up[0, 1:] = raw[0] - self._prev
+        up[1:, 1:] = raw[1:] - raw[:-1]
+        self._prev = raw[-1].copy()
+        data = self._z.compress(up.tobytes())
+        if data:
+            self._chunk(b'IDAT', data)
+        self.rows += h
+
+    def close(self):
+        if self.rows != self.H:
+            raise ValueError(f"PNG incompleto: {self.rows}/{self.H} righe")
+        self._chunk(b'IDAT', self._z.flush())
+        self._chunk(b'IEND', b'')
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._f.close()
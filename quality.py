@@ -0,0 +1,103 @@
+"""
+guitarzorn — preset di qualità (--quality)
+===========================================
+Il costo di una pennellata va come densità delle setole × campioni lungo
+il tratto × ripetizioni per nota, in tutti i motori:
+
+  v7/v8/v9  nS = 1.7·larghezza setole × 1 campione per px di lunghezza,
+            _N_REP pennellate per nota
+  v3–v6     n_bristles ≈ 1.5–2·size × n_steps passi da 2.5 px,
+            N_REPEAT / n_repeat / _REPEAT tracce per nota
+
+Un preset scala i tre fattori insieme e ogni motore compensa perché il
+quadro resti lo stesso a colpo d'occhio:
+
+  bristles — densità delle setole. Nel motore KM (v7/v8) l'alpha dei
+             campioni si somma per pixel: si divide per la densità, così
+             la copertura media non cambia; sotto 1.7 setole per px di
+             larghezza la griglia dei campioni lascia buchi, quindi lì
+             bristles < 1 vale 1. Nel motore IK (v3) le setole si
+             sovrascrivono sull'overlay: lo spessore va come 1/densità
+             (stessa larghezza coperta).
+  steps    — campioni lungo il tratto. Il passo si accorcia come 1/steps;
+             rumore, pickup e mescolanza per passo si riscalano alla
+             stessa lunghezza in px. Il motore KM deposita ogni campione
+             su un solo pixel: sotto 1 campione/px resterebbero buchi,
+             quindi lì steps < 1 vale 1.
+  repeat   — ripetizioni per nota. Se le ripetizioni passano da n a n',
+             ognuna ha opacità 1 − (1 − o)^(n/n') e spessore ×n/n':
+             n' passaggi coprono come n.
+  ground   — livello della piramide dell'imprimitura (v8/v9, come
+             --ground-level, che se dato ha la precedenza).
+
+Nel motore KM quindi 'draft' risparmia su ripetizioni e fondo, non sulle
+setole: è lì che il costo si lascia togliere senza che si veda.
+
+'standard' (default) è il quadro storico, identico bit per bit.
+"""
+
+from typing import Dict, NamedTuple
+
+import numpy as np
+
+
+class Quality(NamedTuple):
+    name: str
+    bristles: float
+    steps: float
+    repeat: float
+    ground: int = 0
+
+    def reps(self, n: int) -> int:
+        """Ripetizioni al posto di n."""
+        return max(1, round(n * self.repeat))
+
+    def rep_opacity(self, opacity, n: int):
+        """Opacità di ognuna delle reps(n) passate (coprono come n);
+        opacity scalare o array."""
+        k = self.reps(n)
+        if k == n:
+            return opacity
+        return 1.0 - (1.0 - np.minimum(opacity, 1.0)) ** (n / k)
+
+    def rep_thickness(self, thickness, n: int):
+        """Spessore di ognuna delle reps(n) passate (stesso impasto totale);
+        thickness scalare o array."""
+        k = self.reps(n)
+        return thickness if k == n else thickness * n / k
+
+    @property
+    def km_bristles(self) -> float:
+        """Densità delle setole nel motore KM (almeno 1, vedi sopra)."""
+        return max(1.0, self.bristles)
+
+    @property
+    def km_steps(self) -> float:
+        """Campioni per px nel motore KM (almeno 1, vedi sopra)."""
+        return max(1.0, self.steps)
+
+    @staticmethod
+    def per_step(w: float, steps: float) -> float:
+        """Peso per passo di una mescolanza esponenziale a passo 1/steps."""
+        if steps == 1.0:
+            return w
+        return 1.0 - (1.0 - w) ** (1.0 / steps)
+
+
+QUALITY: Dict[str, Quality] = {
+    'draft':    Quality('draft',    0.6, 0.5, 0.5, 1),  # anteprime in serie
+    'standard': Quality('standard', 1.0, 1.0, 1.0, 0),  # il quadro storico
+    'final':    Quality('final',    1.5, 1.5, 1.0, 0),
+    'print':    Quality('print',    2.0, 2.0, 1.5, 0),
+}
+QUALITIES = tuple(QUALITY)
+
+
+def preset(name) -> Quality:
+    """Il preset per nome (un Quality passa così com'è)."""
+    if isinstance(name, Quality):
+        return name
+    if name not in QUALITY:
+        raise ValueError(f"quality sconosciuta: {name!r} "
+                         f"(attese: {', '.join(QUALITIES)})")
+    return QUALITY[name]
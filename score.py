@@ -27,11 +27,23 @@ Schema evento:
   slide_to  int (opz.)       MIDI d'arrivo dello slide
   bend      int (opz.)       semitoni di bend
   hammer_to int (opz.)       MIDI d'arrivo dell'hammer-on
+
+Score è la stessa partitura in colonne (array strutturati numpy): per
+canzoni lunghe e corpora, dove il giro per evento in Python pesa.
+Score.from_events / to_events convertono senza perdite da e verso le
+liste di dict qui sotto.
 """
 
+import math
+import warnings
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
 TEMPO_BPM = 168          # lo shuffle di Chuck Berry corre
 BEATS_TOTAL = 14.5       # 3.5 battute + coda dell'accordo finale
 SWING = (2 / 3, 1 / 3)   # coppia di crome swing (già cotta nei tempi sotto)
+BEATS_PER_BAR = 4
 
 JOHNNY_B_GOODE_INTRO = [
     # ── Battuta 1: figura d'apertura ──────────────────────────────────────
@@ -65,21 +77,220 @@ JOHNNY_B_GOODE_INTRO = [
 
 # Nota → classe di pitch per il colore Zorn (mapping v2, Agente 2)
 PITCH_CLASS_NAMES = {0: 'C', 2: 'D', 4: 'E', 5: 'F', 7: 'G', 9: 'A', 10: 'Bb', 11: 'B'}
+# cromatismi (es. C#4 dell'hammer): risolti al semitono inferiore
+_PC = np.array([PITCH_CLASS_NAMES.get(pc, PITCH_CLASS_NAMES.get((pc - 1) % 12,
+                                                                'A'))
+                for pc in range(12)])
 
 
-def pitch_class(midi: int) -> str:
-    """Nome della classe di pitch (per il mapping colore)."""
-    pc = midi % 12
-    if pc in PITCH_CLASS_NAMES:
-        return PITCH_CLASS_NAMES[pc]
-    # cromatismi (es. C#4 dell'hammer): risolvi al semitono inferiore
-    return PITCH_CLASS_NAMES.get((pc - 1) % 12, 'A')
+def pitch_class(midi):
+    """Nome della classe di pitch (per il mapping colore); midi scalare
+    → str, array → array di nomi."""
+    pc = _PC[np.mod(midi, 12)]
+    return str(pc) if np.ndim(pc) == 0 else pc
 
 
-def octave(midi: int) -> int:
+def octave(midi):
     return midi // 12 - 1
 
 
+# ═══════════════════════════════════════════════════════════════════════════
+# partitura in colonne
+# ═══════════════════════════════════════════════════════════════════════════
+# 'pick': nota plettrata senza gesto proprio — i motori le danno il gesto
+# di default; ci finiscono anche le tecniche che lo schema non conosce
+TECHNIQUES = ('slide', 'staccato', 'bend', 'legato', 'hammer_on', 'vibrato',
+              'double_stop', 'double_stop_final', 'pick')
+VELOCITIES = ('p', 'mp', 'mf', 'f', 'ff')
+ORNAMENTS = ('slide_to', 'bend', 'hammer_to')
+MAX_VOICES = 2
+
+EVENT_DTYPE = np.dtype([
+    ('t', 'f8'), ('d', 'f8'),
+    ('vel', 'i1'),                       # indice in VELOCITIES
+    ('tech', 'i1'),                      # indice in TECHNIQUES
+    ('nv', 'i1'),                        # voci suonate
+    ('voices', 'i2', (MAX_VOICES,)),     # MIDI, -1 oltre nv
+    ('slide_to', 'i2'), ('bend', 'f8'), ('hammer_to', 'i2'),
+])
+ORNAMENT_MASK = np.dtype([(k, '?') for k in ORNAMENTS])   # True = assente
+
+
+class Score:
+    """Partitura in colonne: ev (E,) EVENT_DTYPE + mask (E,) ORNAMENT_MASK.
+
+    Voci: i dyad occupano due colonne nell'ordine della partitura, le note
+    singole la prima (la seconda vale -1; voice(k) la riempie). Ornamenti:
+    array mascherati, mascherati dove l'evento non li ha.
+    """
+
+    def __init__(self, ev: np.ndarray, mask: np.ndarray):
+        self.ev = ev
+        self.mask = mask
+
+    # ── conversione ─────────────────────────────────────────────────────
+    @classmethod
+    def from_events(cls, events: Sequence[Dict]) -> 'Score':
+        """Lista di dict (schema sopra) → Score. ValueError su velocity o
+        chiavi che lo schema non conosce (niente perdite); una tecnica
+        sconosciuta diventa 'pick' con un warning, come il gesto di default
+        dei motori storici."""
+        E = len(events)
+        ev = np.zeros(E, EVENT_DTYPE)
+        mask = np.ones(E, ORNAMENT_MASK)
+        ev['voices'] = -1
+        known = {'midi', 'dyad', 't', 'd', 'vel', 'tech'} | set(ORNAMENTS)
+        for i, e in enumerate(events):
+            extra = set(e) - known
+            if extra:
+                raise ValueError(f"chiavi sconosciute nell'evento {i}: "
+                                 f"{sorted(extra)} (attese: "
+                                 f"{', '.join(sorted(known))})")
+            if e['vel'] not in VELOCITIES:
+                raise ValueError(f"velocity sconosciuta: {e['vel']!r} "
+                                 f"(attese: {', '.join(VELOCITIES)})")
+            tech = e['tech']
+            if tech not in TECHNIQUES:
+                warnings.warn(f"evento {i}: tecnica sconosciuta {tech!r}, "
+                              f"dipinta come 'pick' (attese: "
+                              f"{', '.join(TECHNIQUES)})", stacklevel=2)
+                tech = 'pick'
+            notes = e['dyad'] if 'dyad' in e else [e['midi']]
+            if not 1 <= len(notes) <= MAX_VOICES:
+                raise ValueError(f"evento {i}: {len(notes)} voci "
+                                 f"(ammesse 1..{MAX_VOICES})")
+            ev['t'][i], ev['d'][i] = e['t'], e['d']
+            ev['vel'][i] = VELOCITIES.index(e['vel'])
+            ev['tech'][i] = TECHNIQUES.index(tech)
+            ev['nv'][i] = len(notes)
+            ev['voices'][i, :len(notes)] = notes
+            for k in ORNAMENTS:
+                if k in e:
+                    ev[k][i], mask[k][i] = e[k], False
+        return cls(ev, mask)
+
+    def to_events(self) -> List[Dict]:
+        """Score → lista di dict, come li scrive JOHNNY_B_GOODE_INTRO."""
+        out = []
+        for r, m in zip(self.ev.tolist(), self.mask.tolist()):
+            t, d, vel, tech, nv, voices, *orn = r
+            voices = voices.tolist()
+            e = (dict(dyad=list(voices[:nv])) if nv > 1
+                 else dict(midi=voices[0]))
+            e.update(t=t, d=d, vel=VELOCITIES[vel], tech=TECHNIQUES[tech])
+            for k, v, absent in zip(ORNAMENTS, orn, m):
+                if not absent:
+                    e[k] = int(v) if float(v).is_integer() else v
+            out.append(e)
+        return out
+
+    def __len__(self) -> int:
+        return len(self.ev)
+
+    def __getitem__(self, sel) -> 'Score':
+        """Sottopartitura (slice, indici o maschera booleana)."""
+        sel = np.arange(len(self))[sel]
+        return Score(self.ev[np.atleast_1d(sel)],
+                     self.mask[np.atleast_1d(sel)])
+
+    @classmethod
+    def concat(cls, scores: Sequence['Score']) -> 'Score':
+        return cls(np.concatenate([s.ev for s in scores]),
+                   np.concatenate([s.mask for s in scores]))
+
+    # ── colonne ─────────────────────────────────────────────────────────
+    @property
+    def t(self) -> np.ndarray:
+        return self.ev['t']
+
+    @property
+    def d(self) -> np.ndarray:
+        return self.ev['d']
+
+    @property
+    def vel(self) -> np.ndarray:
+        return self.ev['vel']
+
+    @property
+    def tech(self) -> np.ndarray:
+        return self.ev['tech']
+
+    @property
+    def nv(self) -> np.ndarray:
+        return self.ev['nv']
+
+    def voice(self, k: int) -> np.ndarray:
+        """(E,) MIDI della voce k; dove l'evento ne ha meno, l'ultima."""
+        v = self.ev['voices']
+        return v[np.arange(len(v)), np.minimum(k, self.nv - 1)]
+
+    def ornament(self, name: str) -> np.ma.MaskedArray:
+        if name not in ORNAMENTS:
+            raise ValueError(f"ornamento sconosciuto: {name!r} "
+                             f"(attesi: {', '.join(ORNAMENTS)})")
+        return np.ma.MaskedArray(self.ev[name], mask=self.mask[name])
+
+    @property
+    def slide_to(self) -> np.ma.MaskedArray:
+        return self.ornament('slide_to')
+
+    @property
+    def bend(self) -> np.ma.MaskedArray:
+        return self.ornament('bend')
+
+    @property
+    def hammer_to(self) -> np.ma.MaskedArray:
+        return self.ornament('hammer_to')
+
+    # ── query vettoriali ────────────────────────────────────────────────
+    def sounding(self) -> np.ma.MaskedArray:
+        """(E, MAX_VOICES) MIDI delle voci, mascherate oltre nv."""
+        v = self.ev['voices']
+        return np.ma.MaskedArray(v, mask=v < 0)
+
+    def pitch_class(self) -> np.ndarray:
+        """(E, MAX_VOICES) nomi di classe di pitch ('' oltre nv)."""
+        return np.where(self.ev['voices'] >= 0,
+                        pitch_class(self.ev['voices']), '')
+
+    def octave(self) -> np.ma.MaskedArray:
+        return octave(self.sounding())
+
+    def bar(self, beats_per_bar: int = BEATS_PER_BAR) -> np.ndarray:
+        """(E,) indice di battuta dell'attacco."""
+        return (self.t // beats_per_bar).astype(np.int64)
+
+    def ioi(self) -> np.ndarray:
+        """(E-1,) intervalli fra attacchi successivi, in beat."""
+        return np.diff(self.t)
+
+    def gaps(self) -> np.ndarray:
+        """(E,) silenzio prima di ogni evento dalla fine del precedente
+        (il primo da t=0), in beat; negativo se si sovrappongono."""
+        end = np.concatenate([[0.0], (self.t + self.d)[:-1]])
+        return self.t - end
+
+    def pitch_range(self) -> Tuple[int, int]:
+        """(min, max) MIDI toccati: voci, arrivi di slide e hammer-on,
+        punta del bend (dalla prima voce). Interi che contengono tutto:
+        un bend di mezzo tono che arriva a 64.5 dà max 65."""
+        parts = [self.sounding().compressed(), self.slide_to.compressed(),
+                 self.hammer_to.compressed(),
+                 (self.voice(0) + self.bend).compressed()]
+        allm = np.concatenate([p.astype(np.float64) for p in parts])
+        return math.floor(allm.min()), math.ceil(allm.max())
+
+    def first_change(self, other: 'Score') -> Optional[int]:
+        """Primo evento in cui le due partiture differiscono (un evento in
+        più o in meno conta dal primo che manca); None se uguali."""
+        n = min(len(self), len(other))
+        same = (self.ev[:n] == other.ev[:n]) & (self.mask[:n] == other.mask[:n])
+        diff = np.flatnonzero(~same)
+        if len(diff):
+            return int(diff[0])
+        return None if len(self) == len(other) else n
+
+
 if __name__ == '__main__':
     for e in JOHNNY_B_GOODE_INTRO:
         notes = e.get('dyad') or [e['midi']]
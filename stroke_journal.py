@@ -0,0 +1,180 @@
+"""
+guitarzorn — diario delle pennellate (stroke journal)
+=====================================================
+Un quadro di v8/v9 esiste solo come pixel: conc + height, ~40 MB a
+1920×1080. Il diario è la sua ricetta: ogni pennellata pianificata dalla
+tela (OilCanvas.plan, quindi stroke, stroke_many, paint_ground) come
+record binario a dimensione fissa con i parametri nominali (float64,
+come li riceve plan), il vettore conc (float32) e l'indice della
+pennellata, la chiave dello rng in 'counter'. Oltre alle pennellate, le
+poche operazioni che cambiano la tela fuori da esse: la velatura
+(OilCanvas.glaze) e gli strati dell'imprimitura a piramide (layer /
+absorb).
+
+Rifare il diario su una tela nuova (OilCanvas.replay) rifà il quadro:
+alla stessa scala identico (stesso seed, stesse estrazioni: in 'stream'
+l'ordine dei record è l'ordine dello stream), a un'altra scala il quadro
+che il motore avrebbe dipinto lì — il rendering per la stampa senza
+ripassare dal motore. Con noise='synth' e rng 'stream' le estrazioni
+dipendono dai campioni del tratto, quindi dalla scala: il quadro a
+un'altra scala è coerente ma non lo stesso rumore.
+
+Formato (little-endian):
+    b'GZJ1' | u32 lunghezza | intestazione JSON (la tela d'origine) |
+    record RECORD × N
+
+  • record a dimensione fissa: la pennellata k è all'offset
+    header + k·RECORD.itemsize se non ci sono operazioni prima; truncate
+    taglia il file dopo la k-esima pennellata (undo), records legge a
+    blocchi di BLOCK record (il diario non sta mai tutto in memoria) e si
+    ferma alla k-esima (replay parziale).
+  • 137 byte a pennellata: il quadro di v8 (257 pennellate) sono 35 KB,
+    più di mille volte meno di conc + height a 1920×1080.
+
+Dipende solo da numpy e dalla libreria standard.
+"""
+
+import json
+import os
+import struct
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b'GZJ1'
+BLOCK = 4096             # record per lettura
+
+# parametri float di stroke(), nell'ordine di OilCanvas.STROKE_PARAMS
+PARAMS = ('x', 'y', 'angle', 'length', 'width', 'opacity', 'thickness',
+          'curvature', 'waviness', 'wave_freq', 'dryness', 'smear',
+          'taper_end')
+
+# tipi di record: pennellata, velatura (arg = sigma nominale), inizio di
+# uno strato a piramide (arg = livello), ritorno dello strato nella tela
+STROKE, GLAZE, LAYER, ABSORB = 0, 1, 2, 3
+KINDS = ('stroke', 'glaze', 'layer', 'absorb')
+
+RECORD = np.dtype([('kind', 'u1'), ('index', '<i8'), ('arg', '<f8')]
+                  + [(k, '<f8') for k in PARAMS]
+                  + [('conc', '<f4', (4,))])
+
+
+class StrokeJournal:
+    """Scrittore del diario: intestazione subito, poi record in coda."""
+
+    def __init__(self, path: str, header: Dict):
+        self.path = path
+        self.strokes = 0
+        self._f: Optional[BinaryIO] = open(path, 'wb')
+        blob = json.dumps(header).encode('utf-8')
+        self._f.write(MAGIC + struct.pack('<I', len(blob)) + blob)
+
+    def stroke_many(self, prm: Dict, conc: np.ndarray, index: np.ndarray):
+        """N pennellate: prm nome → scalare o (N,), conc (N,4), index (N,)."""
+        N = len(index)
+        rec = np.zeros(N, RECORD)
+        rec['kind'] = STROKE
+        rec['index'] = index
+        for k in PARAMS:
+            rec[k] = np.broadcast_to(np.asarray(prm[k], np.float64), (N,))
+        rec['conc'] = conc
+        self._f.write(rec.tobytes())
+        self.strokes += N
+
+    def op(self, kind: int, arg: float = 0.0):
+        rec = np.zeros(1, RECORD)
+        rec['kind'], rec['arg'] = kind, arg
+        self._f.write(rec.tobytes())
+
+    def nbytes(self) -> int:
+        return self._f.tell() if self._f else os.path.getsize(self.path)
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def __enter__(self) -> 'StrokeJournal':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ── lettura ─────────────────────────────────────────────────────────────────
+def _open(path: str) -> Tuple[BinaryIO, Dict]:
+    f = open(path, 'rb')
+    head = f.read(8)
+    if len(head) < 8 or head[:4] != MAGIC:
+        f.close()
+        raise ValueError(f"{path}: non è un diario di pennellate")
+    (n,) = struct.unpack('<I', head[4:])
+    return f, json.loads(f.read(n).decode('utf-8'))
+
+
+def header(path: str) -> Dict:
+    """L'intestazione: la tela d'origine (vedi OilCanvas.record)."""
+    f, hdr = _open(path)
+    f.close()
+    return hdr
+
+
+def records(path: str, upto: Optional[int] = None,
+            block: int = BLOCK) -> Iterator[np.ndarray]:
+    """Blocchi di record in ordine, fino alla upto-esima pennellata
+    inclusa (None = tutte): le operazioni dopo di essa non si leggono."""
+    f, _ = _open(path)
+    left = np.inf if upto is None else int(upto)
+    with f:
+        while left > 0:
+            buf = f.read(block * RECORD.itemsize)
+            buf = buf[:len(buf) - len(buf) % RECORD.itemsize]   # coda rotta
+            if not buf:
+                return
+            rec = np.frombuffer(buf, RECORD)
+            cum = np.cumsum(rec['kind'] == STROKE)
+            if cum[-1] >= left:
+                yield rec[:int(np.searchsorted(cum, left)) + 1]
+                return
+            left -= int(cum[-1])
+            yield rec
+
+
+def runs(rec: np.ndarray) -> Iterator[np.ndarray]:
+    """Un blocco → tratti consecutivi dello stesso tipo (le pennellate in
+    gruppo, per uno stroke_many solo)."""
+    cut = np.flatnonzero(np.diff(rec['kind'])) + 1
+    for s, e in zip(np.r_[0, cut], np.r_[cut, len(rec)]):
+        if rec['kind'][s] == STROKE:
+            yield rec[s:e]
+        else:                               # le operazioni una per una
+            for i in range(s, e):
+                yield rec[i:i + 1]
+
+
+def count(path: str) -> int:
+    """Pennellate nel diario (letto a blocchi)."""
+    return sum(int((r['kind'] == STROKE).sum()) for r in records(path))
+
+
+# ── undo ────────────────────────────────────────────────────────────────────
+def truncate(path: str, k: int):
+    """Tiene le prime k pennellate e le operazioni che le precedono: il
+    file si taglia subito dopo la k-esima."""
+    if k < 0:
+        raise ValueError(f"k deve essere ≥ 0, non {k}")
+    f, _ = _open(path)
+    with f:
+        start = f.tell()
+    end = start
+    if k:
+        for rec in records(path, upto=k):
+            end += len(rec) * RECORD.itemsize
+    os.truncate(path, end)
+
+
+def undo(path: str, n: int = 1) -> int:
+    """Toglie le ultime n pennellate. → pennellate rimaste."""
+    k = max(0, count(path) - n)
+    truncate(path, k)
+    return k
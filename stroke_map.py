@@ -0,0 +1,131 @@
+"""
+guitarzorn — compilatore del mapping (partitura → tabella di pennellate)
+========================================================================
+Il mapping v2 (pitch class → tinta, velocity → materia, durata →
+lunghezza, tecnica → gesto) era un ciclo per evento con un if/elif per
+tecnica e una chiamata stroke() per pennellata. Qui diventa una
+compilazione in tre passi:
+
+  1. la partitura in colonne (score.Score): tempi, codici di velocity e
+     tecnica, voci, ornamenti mascherati. Le tabelle del mapping (VEL_*,
+     K_TECH, note_conc) diventano array indicizzati da quei codici (lut,
+     conc_lut).
+  2. layout — la funzione del motore che piazza i gesti: 'timeline'
+     (v8: beat → X, MIDI → Y) e 'walk' (v9: la melodia disegna un
+     cammino). Un layout lavora su array (E,) e restituisce la tabella
+     structure-of-arrays delle pennellate: le colonne di
+     OilCanvas.stroke_many più 'event', l'evento d'origine di ognuna.
+     Si registra con @layout('nome') nel modulo del motore.
+  3. paint_table — la tabella a blocchi su OilCanvas.stroke_many.
+
+La tabella è in ordine di pittura: evento, ripetizione, sotto-gesto,
+come il ciclo storico. Il jitter della mano resta quello del modulo
+random, estratto in blocco nello stesso ordine (gauss(0, σ) = σ·gauss(0,
+1) bit per bit): stesso seed, stesso quadro.
+
+Dipende solo da numpy, score.py e dalla libreria standard.
+"""
+
+from typing import Callable, Dict, Optional, Sequence, Union
+
+import numpy as np
+
+from score import TECHNIQUES as TECHS, Score
+
+TECH = {k: i for i, k in enumerate(TECHS)}
+
+CHUNK = 512          # pennellate per stroke_many (il piano è (N, n_max))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# tabelle del mapping
+# ═══════════════════════════════════════════════════════════════════════════
+def lut(table: Dict[str, float], names: Sequence[str],
+        default: float = np.nan) -> np.ndarray:
+    """Tabella per nome → array (len(names),) per codice (default per i
+    nomi che la tabella non ha)."""
+    return np.array([table.get(k, default) for k in names], np.float64)
+
+
+_CONC_LUT: Dict[Callable, np.ndarray] = {}
+
+
+def conc_lut(note_conc: Callable) -> np.ndarray:
+    """(128, 4) float32: note_conc(midi) per ogni MIDI (calcolata una volta)."""
+    c = _CONC_LUT.get(note_conc)
+    if c is None:
+        c = _CONC_LUT[note_conc] = np.stack([note_conc(m) for m in range(128)])
+    return c
+
+
+def gauss(rnd, n: int) -> np.ndarray:
+    """n estrazioni rnd.gauss(0, 1) in ordine (il jitter della mano)."""
+    g = rnd.gauss
+    return np.array([g(0.0, 1.0) for _ in range(n)], np.float64)
+
+
+def expand(counts: np.ndarray):
+    """counts (E,) → (owner, k): per ognuno dei sum(counts) elementi il
+    proprietario e il progressivo dentro il proprietario."""
+    counts = np.asarray(counts, np.int64)
+    owner = np.repeat(np.arange(len(counts)), counts)
+    start = np.cumsum(counts) - counts
+    return owner, np.arange(len(owner)) - start[owner]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# layout
+# ═══════════════════════════════════════════════════════════════════════════
+LAYOUTS: Dict[str, Callable] = {}
+
+
+def layout(name: str):
+    """Decoratore: registra fn(engine, score) → tabella sotto name."""
+    def register(fn: Callable) -> Callable:
+        LAYOUTS[name] = fn
+        return fn
+    return register
+
+
+def compile_score(score: Union[Score, Sequence[Dict]], name: str,
+                  engine) -> Dict[str, np.ndarray]:
+    """Partitura (Score o lista di dict) → tabella delle pennellate con
+    il layout name."""
+    if name not in LAYOUTS:
+        raise ValueError(f"layout sconosciuto: {name!r} "
+                         f"(attesi: {', '.join(LAYOUTS) or 'nessuno'})")
+    if not isinstance(score, Score):
+        score = Score.from_events(score)
+    return LAYOUTS[name](engine, score)
+
+
+def stroke_args(tab: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Le colonne della tabella che vanno a stroke_many (senza 'event')."""
+    return {k: v for k, v in tab.items() if k != 'event'}
+
+
+def paint_table(cv, tab: Dict[str, np.ndarray], chunk: int = CHUNK,
+                start: int = 0, stop: Optional[int] = None):
+    """Dipinge le righe [start, stop) della tabella su cv (OilCanvas) a
+    blocchi di chunk pennellate: stesso quadro di un solo stroke_many,
+    memoria del piano limitata. Dipingere [0, k) e poi [k, N) è dipingere
+    [0, N) (i checkpoint dei motori ne dipendono)."""
+    args = stroke_args(tab)
+    N = len(args['x']) if stop is None else stop
+    for s in range(start, N, chunk):
+        e = min(N, s + chunk)
+        cv.stroke_many(**{k: v[s:e] for k, v in args.items()})
+
+
+def first_diff(a: Dict[str, np.ndarray], b: Dict[str, np.ndarray]) -> int:
+    """Prima riga in cui due tabelle differiscono (in una colonna
+    qualunque); len se una è il prefisso dell'altra o sono uguali."""
+    n = min(len(a['x']), len(b['x']))
+    if set(a) != set(b):
+        return 0
+    diff = np.zeros(n, bool)
+    for k in a:
+        d = a[k][:n] != b[k][:n]
+        diff |= d.reshape(n, -1).any(1)
+    hit = np.flatnonzero(diff)
+    return int(hit[0]) if len(hit) else n
@@ -0,0 +1,174 @@
+"""
+guitarzorn — piano di pennellate (StrokePlan)
+==============================================
+Una pennellata di v8/v9 è due lavori di natura diversa:
+
+  • geometria  — traiettoria, normali, profili di larghezza ed
+                 esaurimento, rumore per setola: dipende solo dai
+                 parametri, dal seed e dallo stato rng. Vettoriale su N
+                 pennellate (OilCanvas.plan).
+  • deposito   — pickup, dry-brush, aratura, compositing KM: legge e
+                 scrive la tela, una pennellata alla volta nell'ordine
+                 dato (OilCanvas.paint).
+
+StrokePlan è il risultato della prima fase: array (N, n_max) per le
+righe lungo il tratto (zeri oltre n[i]), colonne (N,) per i parametri
+del deposito, carichi delle setole e nodi delle striature concatenati
+(ragged → piatti + lunghezze) e il bbox (x0, y0, x1, y1) della regione
+che il deposito può toccare, bordo dell'aratura incluso.
+
+Culling: OilCanvas.plan scarta prima di ogni lavoro le pennellate la cui
+portata (un disco di raggio lunghezza + ondulazione + mezza larghezza
+attorno al punto di partenza, reach_box) cade fuori dalla tela — il
+ground parte da x=-300 e finisce oltre W — e poi quelle il cui nastro
+esatto (bbox dai campioni) non la tocca. Sono le pennellate che il
+deposito avrebbe comunque scartato senza toccare la tela: il quadro non
+cambia. Le estrazioni dello stream rng restano quelle di N stroke().
+
+Il piano non contiene riferimenti alla tela: si salva (save, npz
+compresso: il padding si comprime) e si riusa su un'altra tela nello
+stesso stato — stesso seed, scala, quality e rumore, e in rng_mode
+'stream' lo stesso stato rng di partenza (paint lo verifica e porta lo
+rng a fine piano, come se le pennellate fossero state pianificate lì).
+Un piano si dipinge una volta sola per tela: meta['id'] lo segue anche
+attraverso save/load, e la tela rifiuta un id già adottato.
+
+save/load sono API per chi usa la tela da fuori: i motori (v8/v9) non
+tengono piani su disco. Pianificare è ~3% del quadro di v8 (0.05 s su
+1.8, 254 pennellate), e l'imprimitura ha già la sua cache a pixel
+(ground_cache.py): una cache di piani non pagherebbe il suo I/O.
+
+Dipende solo da numpy e dalla libreria standard.
+"""
+
+import json
+import math
+import uuid
+from typing import Dict, Optional
+
+import numpy as np
+
+# campioni ≤ mezza larghezza dall'asse; +1 px per gli arrotondamenti,
+# +0.01 px per lo scarto float32 di nx·S rispetto a wt/2
+REACH_MARGIN = 1.0
+RIBBON_MARGIN = 0.01
+
+
+def reach_box(x, y, width, waviness, n, sps) -> np.ndarray:
+    """Bbox conservativo (N,4) float di N pennellate dai soli parametri.
+
+    Il tratto fa n−1 passi da 1/sps px a partire da (x, y), qualunque sia
+    la curvatura; l'ondulazione sposta l'asse al più di waviness px, il
+    nastro si allarga al più di width/2.
+    """
+    r = (np.maximum(n - 1, 0) / sps + np.abs(waviness) + width * 0.5
+         + REACH_MARGIN)
+    return np.stack([x - r, y - r, x + r, y + r], 1)
+
+
+def ribbon_box(px, py, wt, n) -> np.ndarray:
+    """Bbox (N,4) float del nastro: asse ± wt/2 sui passi validi."""
+    valid = np.arange(px.shape[1])[None, :] < np.asarray(n)[:, None]
+    hw = wt * 0.5 + RIBBON_MARGIN
+    big = np.float32(np.inf)
+    return np.stack([np.where(valid, px - hw, big).min(1),
+                     np.where(valid, py - hw, big).min(1),
+                     np.where(valid, px + hw, -big).max(1),
+                     np.where(valid, py + hw, -big).max(1)], 1)
+
+
+def on_canvas(box: np.ndarray, W: int, H: int) -> np.ndarray:
+    """(N,) bool: il bbox float può toccare un pixel della tela (i
+    campioni vanno sul pixel np.round(X): bordi a ±0.5 inclusi)."""
+    return ((box[:, 2] >= -0.5) & (box[:, 0] <= W - 0.5)
+            & (box[:, 3] >= -0.5) & (box[:, 1] <= H - 0.5))
+
+
+class StrokePlan:
+    """Geometria di N pennellate pronta per il deposito (vedi modulo)."""
+
+    ROWS = ('ts', 'px', 'py', 'nx', 'ny', 'wt', 'dep')   # (N, n_max) float32
+    PARAMS = ('opacity', 'thickness', 'dryness', 'smear')  # (N,) float64
+    COLS = ('index', 'n', 'nS', 'conc', 'bbox') + PARAMS
+    NOISE = ('loads', 'soff', 'knots', 'kshape')          # secondo il rumore
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict):
+        self.a = arrays
+        self.meta = meta
+        meta.setdefault('id', uuid.uuid4().hex)     # resta nel file (save)
+        self.n, self.nS = arrays['n'], arrays['nS']
+        self.bbox = arrays['bbox']
+        self._loff = np.concatenate([[0], np.cumsum(self.nS)])
+        if 'kshape' in arrays:
+            ks = arrays['kshape']
+            self._koff = np.concatenate([[0], np.cumsum(ks[:, 0] * ks[:, 1])])
+
+    def __len__(self) -> int:
+        return len(self.n)
+
+    @property
+    def culled(self) -> int:
+        """Pennellate richieste e scartate dal culling."""
+        return self.meta['requested'] - len(self)
+
+    def nbytes(self) -> int:
+        return sum(v.nbytes for v in self.a.values())
+
+    # ── righe ragged ────────────────────────────────────────────────────
+    def bristle_loads(self, i: int) -> np.ndarray:
+        """Carico grezzo (nS[i],) delle setole della pennellata i."""
+        return self.a['loads'][self._loff[i]:self._loff[i + 1]]
+
+    def streak_knots(self, i: int) -> np.ndarray:
+        """Nodi snoise2 della pennellata i (solo noise='synth')."""
+        kt, ks = self.a['kshape'][i]
+        return self.a['knots'][self._koff[i]:self._koff[i + 1]].reshape(kt, ks)
+
+    @staticmethod
+    def pack(rows, dtype=np.float32) -> np.ndarray:
+        """Lista di array → un solo array piatto (per loads/knots)."""
+        if not rows:
+            return np.zeros(0, dtype)
+        return np.concatenate([np.ravel(r) for r in rows]).astype(dtype)
+
+    # ── bbox ────────────────────────────────────────────────────────────
+    @staticmethod
+    def roi_box(box: np.ndarray, pad: int, W: int, H: int) -> np.ndarray:
+        """Bbox float del nastro → (N,4) int64 (x0, y0, x1, y1) sulla
+        tela, con il bordo dell'aratura: contiene la ROI del deposito."""
+        x0 = np.floor(box[:, 0]) - pad
+        y0 = np.floor(box[:, 1]) - pad
+        x1 = np.ceil(box[:, 2]) + 1 + pad
+        y1 = np.ceil(box[:, 3]) + 1 + pad
+        out = np.stack([np.clip(x0, 0, W), np.clip(y0, 0, H),
+                        np.clip(x1, 0, W), np.clip(y1, 0, H)], 1)
+        return out.astype(np.int64)
+
+    # ── persistenza ─────────────────────────────────────────────────────
+    def save(self, path: str):
+        """npz compresso: righe e colonne + meta (JSON)."""
+        np.savez_compressed(path, meta=np.array(json.dumps(self.meta)),
+                            **self.a)
+
+    @classmethod
+    def load(cls, path: str) -> 'StrokePlan':
+        with np.load(path) as z:
+            meta = json.loads(str(z['meta']))
+            return cls({k: z[k] for k in z.files if k != 'meta'}, meta)
+
+    def check(self, sig: Dict, rng_state: Optional[Dict]):
+        """ValueError se il piano non è stato fatto per questa tela.
+
+        sig — la firma della tela (OilCanvas.plan_signature); rng_state —
+        stato rng corrente in 'stream' (None in 'counter').
+        """
+        for k, v in sig.items():
+            mine = self.meta['canvas'].get(k)
+            if mine != v and not (isinstance(v, float)
+                                  and isinstance(mine, float)
+                                  and math.isclose(mine, v)):
+                raise ValueError(f"piano per un'altra tela: {k}={mine!r}, "
+                                 f"non {v!r}")
+        if rng_state is not None and rng_state != self.meta['rng_before']:
+            raise ValueError("piano per un altro stato dello stream rng "
+                             "(ripianificare o usare rng_mode='counter')")
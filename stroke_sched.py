@@ -0,0 +1,116 @@
+"""
+guitarzorn — scheduler delle pennellate per ROI in conflitto
+============================================================
+Il deposito di una pennellata (OilCanvas._deposit) legge e scrive solo
+la sua ROI, che sta nel bbox del piano (StrokePlan.bbox, bordo
+dell'aratura incluso), e passa quasi tutto il suo tempo dentro numpy,
+che rilascia il GIL. Due pennellate i cui bbox non si toccano si possono
+quindi depositare insieme senza cambiare un bit; l'ordine del pittore
+conta solo dove i bbox si sovrappongono.
+
+  • grafo  — stroke_fronts.conflict_dag: per ogni pennellata le
+             precedenti il cui bbox tocca il suo (archi j → i, j < i). È
+             un DAG per costruzione.
+  • esecuzione — run: pool di thread, una pennellata parte quando tutte
+             le sue precedenti in conflitto sono finite; fra le pronte
+             prima quella d'indice minore (vicina all'ordine storico).
+
+Il quadro è identico a quello del deposito in serie: ogni pixel vede le
+pennellate che lo toccano nello stesso ordine, e nient'altro. Il report
+dice quanto parallelismo c'era (pennellate / cammino critico) e quanto
+se n'è ottenuto (CPU dei thread nel deposito / tempo di parete).
+
+Dipende solo da numpy, stroke_fronts.py e dalla libreria standard.
+"""
+
+import heapq
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from stroke_fronts import depth
+
+
+def run(fn: Callable[[int], None], preds: List[np.ndarray],
+        workers: int) -> Dict:
+    """fn(i) per ogni pennellata, su `workers` thread, rispettando preds.
+
+    → report: strokes, edges, span (cammino critico in pennellate),
+    available (strokes / span), busy_s (CPU dei thread dentro fn),
+    wall_s, achieved (busy_s / wall_s: core davvero occupati in media),
+    peak (pennellate in corso insieme al massimo).
+    """
+    n = len(preds)
+    need = np.array([len(p) for p in preds], np.int64)
+    succ: List[List[int]] = [[] for _ in range(n)]
+    for i, p in enumerate(preds):
+        for j in p:
+            succ[j].append(i)
+    ready = [i for i in range(n) if not need[i]]
+    lock = threading.Lock()
+    acc = dict(busy=0.0, active=0, peak=0)
+
+    def task(i: int):
+        with lock:
+            acc['active'] += 1
+            acc['peak'] = max(acc['peak'], acc['active'])
+        t0 = time.thread_time()         # CPU del thread, non parete:
+        try:                            # i thread in attesa non contano
+            fn(i)
+        finally:
+            dt = time.thread_time() - t0
+            with lock:
+                acc['active'] -= 1
+                acc['busy'] += dt
+
+    w0 = time.perf_counter()
+    pool = ThreadPoolExecutor(max(1, workers))
+    running = {}
+    try:
+        while ready or running:
+            while ready:
+                i = heapq.heappop(ready)
+                running[pool.submit(task, i)] = i
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for f in sorted(done, key=running.get):
+                i = running.pop(f)
+                f.result()                      # rilancia l'errore di fn
+                for s in succ[i]:
+                    need[s] -= 1
+                    if not need[s]:
+                        heapq.heappush(ready, s)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    wall = time.perf_counter() - w0
+    span = int(depth(preds).max()) if n else 0
+    return dict(strokes=n, edges=sum(len(p) for p in preds),
+                span=span, available=n / span if span else 0.0,
+                busy_s=acc['busy'], wall_s=wall,
+                achieved=acc['busy'] / wall if wall > 0 else 0.0,
+                peak=acc['peak'])
+
+
+def merge(total: Dict, rep: Dict) -> Dict:
+    """Somma il report di un paint() a quello cumulato: i piani si
+    dipingono uno dopo l'altro, quindi anche i cammini critici si
+    sommano. → total aggiornato (available/achieved ricalcolati)."""
+    for k in ('strokes', 'edges', 'span', 'busy_s', 'wall_s'):
+        total[k] = total.get(k, 0) + rep[k]
+    total['peak'] = max(total.get('peak', 0), rep['peak'])
+    total['available'] = (total['strokes'] / total['span']
+                          if total['span'] else 0.0)
+    total['achieved'] = (total['busy_s'] / total['wall_s']
+                         if total['wall_s'] > 0 else 0.0)
+    return total
+
+
+def summary(rep: Dict, workers: int) -> str:
+    """Una riga leggibile del report."""
+    return (f"scheduler: {rep['strokes']} pennellate, {rep['edges']} "
+            f"conflitti, cammino critico {rep['span']} → parallelismo "
+            f"disponibile {rep['available']:.1f}×, ottenuto "
+            f"{rep['achieved']:.2f}× su {workers} thread "
+            f"(picco {rep['peak']})")
@@ -0,0 +1,570 @@
+"""
+guitarzorn — benchmark ripetibili dei motori pittorici
+=======================================================
+Misura i punti caldi e, insieme, controlla che il quadro non cambi:
+un'accelerazione che altera silenziosamente la pittura viene segnalata.
+
+Suite (nomi filtrabili con --only, glob fnmatch):
+  stroke/w{W}_l{L}_d{D}   OilCanvas.stroke (v8) per larghezza, lunghezza
+                          e dryness, su tela 1024×512
+  init/{1080p,4k}         costruttore OilCanvas (trama + marezzatura)
+  blur/s{σ}_{1080p,4k}    blur su un buffer (H,W,4) di concentrazioni
+  render/{1080p,4k}       OilCanvas.render (KM + relief lighting)
+  ground/serial           imprimitura alla v8 a 1080p, in serie
+  ground/bands_w{N}       la stessa con OilCanvas.paint_bands su N processi
+                          (1 = bande in questo processo): la scalatura
+  trace/v3                Trace.paint del motore a setole v3
+  create/v3 … create/v9   create() completo di ogni motore
+
+Per ogni benchmark:
+  • tempo: min e mediana su --repeat esecuzioni (setup escluso);
+  • allocazioni: picco tracemalloc in un'esecuzione separata (il tracing
+    rallenta, quindi non entra nel cronometro);
+  • RSS di picco: ogni benchmark gira in un processo figlio fresco, così
+    ru_maxrss è solo suo;
+  • fedeltà: PSNR e SSIM (luminanza, finestra 7×7) dell'immagine prodotta
+    contro il riferimento in <refs>/<nome>.png; per create/* in mancanza
+    del riferimento si usa il PNG di repo (johnny_b_goode_zorn_*.png).
+
+Uso:
+    python zorn_bench.py --out bench.json --save-refs      # baseline
+    python zorn_bench.py --out new.json --compare bench.json
+    python zorn_bench.py --results new.json --compare bench.json  # solo confronto
+
+Il confronto segnala (ed esce con codice 1) i benchmark più lenti di
+--tolerance rispetto alla baseline e quelli sotto --min-psnr / --min-ssim.
+
+    python zorn_bench.py --check-bands 2   # render_to/render(workers) ≡ render()
+    python zorn_bench.py --check-texture   # trama/mottling ≈ v8 storica
+"""
+
+import atexit
+import contextlib
+import fnmatch
+import hashlib
+import importlib
+import io
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REFS_DIR = os.path.join(HERE, 'bench_refs')
+
+SIZES = {'1080p': (1920, 1080), '4k': (3840, 2160)}
+
+# create/<v> → (modulo, classe, PNG di riferimento in repo)
+ENGINES = {
+    'v3': ('zorn_riff_art_v3', 'ZornRiffBristlePainting',
+           'johnny_b_goode_zorn_riff_v3.png'),
+    'v4': ('zorn_riff_v4', 'ZornRiffV4', 'johnny_b_goode_zorn_v4.png'),
+    'v5': ('zorn_riff_v5', 'ZornGuitarEvolution',
+           'johnny_b_goode_zorn_v5.png'),
+    'v6': ('zorn_riff_v6', 'ZornPitturaGrafica',
+           'johnny_b_goode_zorn_v6.png'),
+    'v7': ('zorn_riff_v7', 'ZornOilPainting', 'johnny_b_goode_zorn_v7.png'),
+    'v8': ('zorn_riff_v8', 'ZornOilPaintingV8', 'johnny_b_goode_zorn_v8.png'),
+    'v9': ('zorn_riff_v9', 'ZornMelodicWalk', 'johnny_b_goode_zorn_v9.png'),
+}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Metriche di fedeltà
+# ═══════════════════════════════════════════════════════════════════════════
+def _to_rgb8(img) -> np.ndarray:
+    if isinstance(img, Image.Image):
+        return np.asarray(img.convert('RGB'))
+    a = np.asarray(img)
+    if a.dtype != np.uint8:
+        a = (np.clip(a, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8)
+    if a.ndim == 2:
+        a = np.repeat(a[..., None], 3, axis=2)
+    return np.ascontiguousarray(a[..., :3])
+
+
+def psnr(a: np.ndarray, b: np.ndarray) -> Optional[float]:
+    """PSNR in dB tra due RGB uint8; None se identiche (PSNR infinito)."""
+    mse = np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2)
+    return None if mse == 0 else float(10.0 * np.log10(255.0 ** 2 / mse))
+
+
+def _mean7(a: np.ndarray) -> np.ndarray:
+    """Media su finestra 7×7 (solo la parte valida), via somme cumulative."""
+    r = 3
+    c = np.cumsum(np.cumsum(np.pad(a, ((1, 0), (1, 0))), 0), 1)
+    w = 2 * r + 1
+    s = c[w:, w:] - c[:-w, w:] - c[w:, :-w] + c[:-w, :-w]
+    return s / (w * w)
+
+
+def ssim(a: np.ndarray, b: np.ndarray) -> float:
+    """SSIM medio sulla luminanza (Wang et al. 2004, finestra uniforme 7×7)."""
+    lum = np.array([0.299, 0.587, 0.114])
+    x = a.astype(np.float64) @ lum
+    y = b.astype(np.float64) @ lum
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    mx, my = _mean7(x), _mean7(y)
+    vx = _mean7(x * x) - mx * mx
+    vy = _mean7(y * y) - my * my
+    cxy = _mean7(x * y) - mx * my
+    s = ((2 * mx * my + c1) * (2 * cxy + c2)) / \
+        ((mx * mx + my * my + c1) * (vx + vy + c2))
+    return float(s.mean())
+
+
+def fidelity(img: np.ndarray, ref_path: Optional[str]) -> Dict:
+    """Confronto con il riferimento salvato (se esiste e ha la stessa forma)."""
+    out = dict(sha256=hashlib.sha256(img.tobytes()).hexdigest()[:16],
+               ref=None, psnr=None, ssim=None, identical=None)
+    if not ref_path or not os.path.exists(ref_path):
+        return out
+    ref = np.asarray(Image.open(ref_path).convert('RGB'))
+    out['ref'] = os.path.relpath(ref_path, HERE)
+    if ref.shape != img.shape:
+        out['error'] = f'forma diversa: {img.shape} vs {ref.shape}'
+        return out
+    out['identical'] = bool(np.array_equal(img, ref))
+    out['psnr'] = psnr(img, ref)
+    out['ssim'] = 1.0 if out['identical'] else ssim(img, ref)
+    return out
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Render a bande: render_to / render(workers) devono rifare render()
+# ═══════════════════════════════════════════════════════════════════════════
+def check_bands(scale: float = 2.0, tile_rows: int = 64,
+                workers: int = 3) -> Dict[str, int]:
+    """Pixel diversi da render() di render_to e render(workers) a questa
+    scale (2 → AO con sigma 12, oltre la soglia dell'IIR): devono essere 0."""
+    v8 = _v8()
+    W, H = 480, 270                     # nominali: griglia W·scale×H·scale
+    bg = v8.mixc(v8.OCHRE, v8.WHITE, 0.3)
+    cv = v8.OilCanvas(W, H, bg, seed=42, scale=scale)
+    r = random.Random(5)
+    for _ in range(30):
+        cv.stroke(r.uniform(0, W), r.uniform(0, H), r.uniform(-0.5, 0.5),
+                  r.uniform(0.1, 0.4) * W, r.uniform(0.02, 0.06) * H,
+                  v8.mixc(v8.VERM, v8.BLACK, r.random()))
+    ref = np.asarray(cv.render())
+    with tempfile.TemporaryDirectory(prefix='zorn_bench_') as tmp:
+        path = os.path.join(tmp, 'bands.png')
+        cv.render_to(path, tile_rows=tile_rows)
+        banded = np.asarray(Image.open(path).convert('RGB'))
+    threaded = np.asarray(cv.render(workers=workers, band_rows=tile_rows))
+    return {'render_to': int((banded != ref).any(-1).sum()),
+            'render_workers': int((threaded != ref).any(-1).sum())}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Texture della tela: i livelli fissi di OilCanvas contro la v8 storica
+# ═══════════════════════════════════════════════════════════════════════════
+# Mediane su 40 seed a 1920×1080, 200 px dai bordi, della trama e del
+# mottling storici (normalizzati min/max e max|·| sull'intera tela):
+# WEAVE_LO/WEAVE_SPAN e MOTTLE_RMS sono tarati per riprodurle.
+TEXTURE_REF = {'weave_mean': 0.4322, 'weave_std': 0.02687,
+               'weave_dx': 0.00570, 'weave_dy': 0.01186,
+               'mottle_rms': 0.01937}
+TEXTURE_TOL = 0.05                   # scarto relativo ammesso
+
+
+def texture_stats(seeds: int = 40, margin: int = 200) -> Dict[str, float]:
+    """Le statistiche di TEXTURE_REF sulle tele di oggi (mediane)."""
+    v8 = _v8()
+    W, H = SIZES['1080p']
+    bg = v8.mixc(v8.OCHRE, v8.WHITE, 0.3)
+    m = margin
+    rows: Dict[str, List[float]] = {k: [] for k in TEXTURE_REF}
+    for seed in range(seeds):
+        # 'counter': _make_mottle rifà esattamente il campo del costruttore
+        cv = v8.OilCanvas(W, H, bg, seed=seed, rng_mode='counter')
+        w = cv.weave_roi(m, H - m)[:, m:W - m]
+        gy, gx = np.gradient(w)
+        mot = cv._make_mottle()[m:H - m, m:W - m]
+        for k, v in (('weave_mean', w.mean()), ('weave_std', w.std()),
+                     ('weave_dx', np.abs(gx).mean()),
+                     ('weave_dy', np.abs(gy).mean()),
+                     ('mottle_rms', np.sqrt((mot * mot).mean()))):
+            rows[k].append(float(v))
+    return {k: statistics.median(v) for k, v in rows.items()}
+
+
+def check_texture(seeds: int = 40) -> int:
+    """Stampa le statistiche contro TEXTURE_REF → quante sono fuori
+    tolleranza."""
+    bad = 0
+    for k, v in texture_stats(seeds).items():
+        ref = TEXTURE_REF[k]
+        off = abs(v / ref - 1.0) > TEXTURE_TOL
+        bad += off
+        print(f"  {k:11s} {v:.5f}  atteso {ref:.5f}  "
+              f"({100 * (v / ref - 1):+.1f}%){'  FUORI' if off else ''}")
+    return bad
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Benchmark: ogni voce è setup() → (run, image)
+#    run()   il solo codice cronometrato (chiamato su uno stato fresco)
+#    image() l'immagine prodotta dall'ultima run, per la fedeltà
+# ═══════════════════════════════════════════════════════════════════════════
+def _v8():
+    return importlib.import_module('zorn_riff_v8')
+
+
+def _bench_stroke(width: float, length: float, dryness: float):
+    v8 = _v8()
+    bg = v8.mixc(v8.OCHRE, v8.WHITE, 0.3)
+    paint = v8.mixc(v8.VERM, v8.OCHRE, 0.25)
+    W, H = 1024, 512
+
+    def setup():
+        cv = v8.OilCanvas(W, H, bg, seed=42)
+        return (lambda: cv.stroke(W * 0.5 - length * 0.5, H * 0.5, 0.12,
+                                  length, width, paint, dryness=dryness),
+                lambda: cv.render())
+    return setup
+
+
+def _bench_init(size: str):
+    v8 = _v8()
+    W, H = SIZES[size]
+    bg = v8.mixc(v8.OCHRE, v8.WHITE, 0.3)
+    box = {}
+
+    def setup():
+        def run():
+            box['cv'] = v8.OilCanvas(W, H, bg, seed=42)
+        # trama + primo canale: la marezzatura vive nelle concentrazioni
+        return run, lambda: np.clip(np.dstack(
+            [box['cv'].weave * 0.5 + 0.5, box['cv'].conc[..., 0],
+             box['cv'].conc[..., 3]]), 0, 1)
+    return setup
+
+
+def _bench_blur(sigma: float, size: str):
+    v8 = _v8()
+    W, H = SIZES[size]
+    src = np.random.default_rng(7).random((H, W, 4), np.float32)
+    box = {}
+
+    def setup():
+        def run():
+            box['out'] = v8.blur(src, sigma)
+        return run, lambda: box['out'][..., :3]
+    return setup
+
+
+def _bench_render(size: str):
+    v8 = _v8()
+    W, H = SIZES[size]
+    bg = v8.mixc(v8.OCHRE, v8.WHITE, 0.3)
+    cv = v8.OilCanvas(W, H, bg, seed=42)
+    r = random.Random(5)
+    for _ in range(40):
+        cv.stroke(r.uniform(0, W), r.uniform(0, H), r.uniform(-0.5, 0.5),
+                  r.uniform(0.1, 0.4) * W, r.uniform(0.01, 0.04) * H,
+                  v8.mixc(v8.VERM, v8.BLACK, r.random()))
+    box = {}
+
+    def setup():
+        def run():
+            box['img'] = cv.render()
+        return run, lambda: box['img']
+    return setup
+
+
+def _bench_ground(workers: Optional[int]):
+    """Imprimitura alla v8 (file di pennellate lunghe, 1080p): None → in
+    serie (paint), altrimenti OilCanvas.paint_bands su workers processi."""
+    v8 = _v8()
+    W, H = SIZES['1080p']
+    bg = v8.mixc(v8.OCHRE, v8.WHITE, 0.3)
+    cols = [v8.OCHRE, v8.mixc(v8.OCHRE, v8.WHITE, 0.2),
+            v8.mixc(v8.OCHRE, v8.VERM, 0.03)]
+    r = random.Random(5)
+    rows = []
+    y = -20.0
+    while y < H + 20:
+        x = r.uniform(-300, -80)
+        while x < W + 50:
+            L = r.uniform(350, 700)
+            rows.append(dict(x=x, y=y + r.gauss(0, 6),
+                             angle=r.gauss(0.0, 0.04), length=L,
+                             width=r.uniform(40, 70), conc=r.choice(cols),
+                             opacity=r.uniform(0.55, 0.78),
+                             thickness=r.uniform(0.12, 0.28),
+                             dryness=r.uniform(0.55, 0.78),
+                             smear=r.uniform(0.20, 0.38)))
+            x += L * r.uniform(0.65, 0.90)
+        y += r.uniform(30, 46)
+
+    def setup():
+        cv = v8.OilCanvas(W, H, bg, seed=42)
+        plan = cv.plan(**v8.stroke_table(rows))
+        if workers is None:
+            run = lambda: cv.paint(plan)
+        else:
+            run = lambda: cv.paint_bands(plan, workers)
+        return run, lambda: cv.render()
+    return setup
+
+
+def _bench_trace():
+    v3 = importlib.import_module('zorn_riff_art_v3')
+
+    def setup():
+        p = v3.ZornRiffBristlePainting(width=800, height=600, seed=42)
+        pos = np.array([120.0, 300.0])
+        brush = p._make_brush(pos, 17.0)
+        trace = v3.Trace(brush, 160, pos, v3.ZORN['vermilion'], 'f',
+                         preferred_ang=0.1)
+        trace.calculate_colors(p.arr)
+        return (lambda: trace.paint(p.canvas, p.arr), lambda: p.canvas)
+    return setup
+
+
+def _bench_create(ver: str):
+    mod, cls, _ = ENGINES[ver]
+    engine = getattr(importlib.import_module(mod), cls)
+    tmp = tempfile.mkdtemp(prefix='zorn_bench_')
+    atexit.register(shutil.rmtree, tmp, True)
+    path = os.path.join(tmp, ver + '.png')
+
+    def setup():
+        return (lambda: engine().create(out=path),
+                lambda: Image.open(path))
+    return setup
+
+
+def suite() -> Dict[str, Tuple[Callable, int]]:
+    """nome → (factory del setup, ripetizioni di default)."""
+    s: Dict[str, Tuple[Callable, int]] = {}
+    for w in (6, 24, 60):
+        for ln in (80, 400):
+            for d in (0.0, 0.35, 0.8):
+                s[f'stroke/w{w}_l{ln}_d{d:g}'] = (
+                    lambda w=w, ln=ln, d=d: _bench_stroke(w, ln, d), 5)
+    for sz in SIZES:
+        s[f'init/{sz}'] = (lambda sz=sz: _bench_init(sz), 3)
+        for sg in (2.0, 14.0):
+            s[f'blur/s{sg:g}_{sz}'] = (lambda sg=sg, sz=sz: _bench_blur(sg, sz),
+                                       3)
+        s[f'render/{sz}'] = (lambda sz=sz: _bench_render(sz), 3)
+    s['ground/serial'] = (lambda: _bench_ground(None), 3)
+    for w in (1, 2, 4, 8):
+        s[f'ground/bands_w{w}'] = (lambda w=w: _bench_ground(w), 3)
+    s['trace/v3'] = (_bench_trace, 5)
+    for v in ENGINES:
+        s[f'create/{v}'] = (lambda v=v: _bench_create(v), 1)
+    return s
+
+
+def ref_path(name: str, refs: str) -> Optional[str]:
+    p = os.path.join(refs, name.replace('/', '__') + '.png')
+    if os.path.exists(p) or not name.startswith('create/'):
+        return p
+    return os.path.join(HERE, ENGINES[name.split('/')[1]][2])
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Esecuzione: un processo figlio per benchmark (RSS di picco pulito)
+# ═══════════════════════════════════════════════════════════════════════════
+def _maxrss_bytes() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def run_one(name: str, repeat: int, refs: str, alloc: bool = True,
+            save_ref: bool = False) -> Dict:
+    """Esegue un benchmark nel processo corrente (usato dal figlio)."""
+    factory, default_rep = suite()[name]
+    repeat = repeat or default_rep
+    quiet = io.StringIO()
+    with contextlib.redirect_stdout(quiet):
+        make = factory()
+        rss0 = _maxrss_bytes()
+        times: List[float] = []
+        for _ in range(repeat):
+            run, image = make()
+            t0 = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - t0)
+        img = _to_rgb8(image())
+        alloc_peak = None
+        if alloc:
+            run, image = make()
+            tracemalloc.start()
+            run()
+            alloc_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            image()
+    rp = ref_path(name, refs)
+    rec = dict(name=name, repeat=repeat,
+               time_min_s=round(min(times), 6),
+               time_median_s=round(statistics.median(times), 6),
+               alloc_peak_bytes=alloc_peak,
+               rss_peak_bytes=_maxrss_bytes(), rss_setup_bytes=rss0,
+               fidelity=fidelity(img, rp))
+    if save_ref:
+        os.makedirs(refs, exist_ok=True)
+        Image.fromarray(img).save(
+            os.path.join(refs, name.replace('/', '__') + '.png'))
+    return rec
+
+
+def run_suite(names: List[str], repeat: int, refs: str, alloc: bool,
+              save_refs: bool) -> Dict:
+    results = []
+    for nm in names:
+        cmd = [sys.executable, os.path.abspath(__file__), '--child', nm,
+               '--repeat', str(repeat), '--refs', refs]
+        if not alloc:
+            cmd.append('--no-alloc')
+        if save_refs:
+            cmd.append('--save-refs')
+        p = subprocess.run(cmd, capture_output=True, text=True, cwd=HERE)
+        if p.returncode != 0:
+            print(f"  {nm:24s} ERRORE\n{p.stderr.strip()}")
+            results.append(dict(name=nm, error=p.stderr.strip()[-2000:]))
+            continue
+        rec = json.loads(p.stdout.strip().splitlines()[-1])
+        results.append(rec)
+        f = rec['fidelity']
+        fid = ('=' if f['identical'] else
+               f"{f['psnr']:.1f}dB ssim {f['ssim']:.4f}" if f['psnr'] else
+               'nessun riferimento')
+        print(f"  {nm:24s} {rec['time_min_s']:9.4f}s  "
+              f"rss {rec['rss_peak_bytes'] / 2**20:7.1f} MB  {fid}")
+    return dict(python=platform.python_version(), numpy=np.__version__,
+                machine=platform.machine(), created=time.time(),
+                results=results)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Confronto con una baseline
+# ═══════════════════════════════════════════════════════════════════════════
+def compare(base: Dict, new: Dict, tolerance: float = 0.10,
+            min_psnr: float = 40.0, min_ssim: float = 0.99) -> int:
+    """Stampa la tabella baseline→nuovo; ritorna il numero di regressioni."""
+    old = {r['name']: r for r in base['results'] if 'error' not in r}
+    bad = 0
+    print(f"{'benchmark':24s} {'base':>9s} {'nuovo':>9s} {'×':>6s}  fedeltà")
+    for r in new['results']:
+        nm = r['name']
+        if 'error' in r:
+            print(f"{nm:24s} ERRORE")
+            bad += 1
+            continue
+        b = old.get(nm)
+        t1 = r['time_min_s']
+        flags, fail = [], False
+        if b is not None:
+            ratio = t1 / max(b['time_min_s'], 1e-12)
+            if ratio > 1.0 + tolerance:
+                flags.append('LENTO')
+                fail = True
+            head = f"{nm:24s} {b['time_min_s']:9.4f} {t1:9.4f} {ratio:6.2f}"
+            if b['fidelity']['sha256'] != r['fidelity']['sha256']:
+                flags.append('immagine cambiata')
+        else:
+            head = f"{nm:24s} {'—':>9s} {t1:9.4f} {'':>6s}"
+        f = r['fidelity']
+        if f['psnr'] is not None and (f['psnr'] < min_psnr
+                                      or f['ssim'] < min_ssim):
+            flags.append(f"FEDELTÀ {f['psnr']:.1f}dB/{f['ssim']:.4f}")
+            fail = True
+        bad += fail
+        print(head + '  ' + (', '.join(flags) or 'ok'))
+    return bad
+
+
+def main(argv=None):
+    import argparse
+    p = argparse.ArgumentParser(
+        description='guitarzorn — benchmark dei motori con controllo di fedeltà')
+    p.add_argument('--only', action='append', metavar='GLOB',
+                   help='solo i benchmark che combaciano (ripetibile)')
+    p.add_argument('--list', action='store_true', help='elenca e esce')
+    p.add_argument('--repeat', type=int, default=0,
+                   help='ripetizioni (0 = default per benchmark)')
+    p.add_argument('--refs', default=REFS_DIR,
+                   help='directory delle immagini di riferimento')
+    p.add_argument('--save-refs', action='store_true',
+                   help='salva le immagini prodotte come nuovi riferimenti')
+    p.add_argument('--no-alloc', action='store_true',
+                   help='salta l\'esecuzione con tracemalloc')
+    p.add_argument('--out', default='bench.json', help='risultati JSON')
+    p.add_argument('--results', metavar='JSON',
+                   help='non eseguire: usa questi risultati (con --compare)')
+    p.add_argument('--compare', metavar='BASELINE',
+                   help='confronta con una baseline JSON precedente')
+    p.add_argument('--tolerance', type=float, default=0.10,
+                   help='rallentamento ammesso (0.10 = +10%%)')
+    p.add_argument('--min-psnr', type=float, default=40.0)
+    p.add_argument('--min-ssim', type=float, default=0.99)
+    p.add_argument('--check-bands', type=float, nargs='?', const=2.0,
+                   metavar='S', help='controlla che il render a bande rifaccia '
+                   'render() bit per bit a scale S (default 2) ed esce')
+    p.add_argument('--check-texture', action='store_true',
+                   help='controlla che trama e mottling della tela restino '
+                   'sulla statistica storica (TEXTURE_REF) ed esce')
+    p.add_argument('--child', help=argparse.SUPPRESS)
+    args = p.parse_args(argv)
+
+    if args.check_texture:
+        bad = check_texture()
+        print(f"{bad} statistiche fuori tolleranza" if bad
+              else "texture nella tolleranza")
+        return 1 if bad else 0
+
+    if args.check_bands is not None:
+        diff = check_bands(args.check_bands)
+        print(', '.join(f'{k}: {v} pixel diversi' for k, v in diff.items()))
+        return 1 if any(diff.values()) else 0
+
+    if args.child:
+        rec = run_one(args.child, args.repeat, args.refs,
+                      alloc=not args.no_alloc, save_ref=args.save_refs)
+        print(json.dumps(rec))
+        return 0
+
+    names = list(suite())
+    if args.only:
+        names = [n for n in names
+                 if any(fnmatch.fnmatch(n, g) for g in args.only)]
+    if args.list:
+        print('\n'.join(names))
+        return 0
+    if args.results:
+        with open(args.results, encoding='utf-8') as f:
+            new = json.load(f)
+    else:
+        print(f"{len(names)} benchmark...")
+        new = run_suite(names, args.repeat, args.refs, not args.no_alloc,
+                        args.save_refs)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(new, f, indent=2)
+        print(f"Risultati: {args.out}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            base = json.load(f)
+        bad = compare(base, new, args.tolerance, args.min_psnr, args.min_ssim)
+        print(f"{bad} regressioni" if bad else "nessuna regressione")
+        return 1 if bad else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,233 @@
+"""
+guitarzorn — blur gaussiano separabile senza temporanei
+========================================================
+Il blur storico (v7/v8) sono 3 box per asse via somma cumulativa: ogni
+passata alloca np.pad + np.concatenate + un cumsum float64 grande quanto
+l'array, e blur(conc, 14) su (1080,1920,4) muove gigabyte di temporanei.
+Qui lo stesso blur in due motori, scelti dal sigma:
+
+  • box (sigma < IIR_MIN_SIGMA): le stesse 3 passate di raggio
+    r = round(sigma) per asse, con la stessa aritmetica (cumsum float64,
+    differenza / w, arrotondamento a float32 dopo ogni passata) →
+    risultato IDENTICO bit per bit al blur storico. Il padding 'edge' e
+    la somma cumulativa vivono in buffer di lavoro riusati (BlurWorkspace):
+    a regime nessuna allocazione oltre all'uscita.
+
+  • IIR (sigma ≥ IIR_MIN_SIGMA): gaussiana ricorsiva di Young–van Vliet
+    (3° ordine, passata causale + anticausale), costo costante per pixel
+    qualunque sia sigma. Il sigma effettivo è quello delle 3 box di
+    raggio r (varianza r(r+1)), così il sostituto ha la stessa ampiezza
+    del blur che rimpiazza. Bordi 'edge' come il box: la passata causale
+    parte a regime sul primo campione (esatto), l'anticausale dopo una
+    coda di 4σ replicata (errore < 1e-4 del salto di bordo).
+
+Varianti: blur(a, s, out=a) in place; blur_roi() su una finestra con il
+contesto giusto intorno (bordo replicato solo ai bordi veri dell'array).
+exact=True forza il box a ogni sigma: la risposta dell'IIR è infinita,
+quindi a bande o su una ROI non riproduce bit per bit l'array intero;
+chi deve coincidere col monolitico (rilievo, AO, velatura) usa il box.
+
+Ogni thread ha il suo BlurWorkspace (threading.local): il blur si può
+chiamare da più thread senza lock.
+"""
+
+import math
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# sotto questa soglia il box (esatto) costa meno della ricorsione Python
+IIR_MIN_SIGMA = 8.0
+
+
+class BlurWorkspace:
+    """Buffer di lavoro riusati fra chiamate (crescono, non si liberano)."""
+
+    def __init__(self):
+        self._bufs: Dict[Tuple[str, str], np.ndarray] = {}
+
+    def buf(self, key: str, shape: Tuple[int, ...], dtype=np.float64
+            ) -> np.ndarray:
+        dtype = np.dtype(dtype)
+        size = math.prod(shape)
+        b = self._bufs.get((key, dtype.str))
+        if b is None or b.size < size:
+            b = self._bufs[(key, dtype.str)] = np.empty(max(size, 1 << 12),
+                                                        dtype)
+        return b[:size].reshape(shape)
+
+    def nbytes(self) -> int:
+        return sum(b.nbytes for b in self._bufs.values())
+
+
+_local = threading.local()
+
+
+def workspace() -> BlurWorkspace:
+    """Il BlurWorkspace del thread corrente."""
+    ws = getattr(_local, 'ws', None)
+    if ws is None:
+        ws = _local.ws = BlurWorkspace()
+    return ws
+
+
+def box_radius(sigma: float) -> int:
+    """Raggio delle 3 box che approssimano una gaussiana di questo sigma."""
+    return max(1, int(round(sigma)))
+
+
+def support(sigma: float, exact: bool = False) -> int:
+    """Campioni di contesto per lato di blur(·, sigma, exact=exact) lungo
+    un asse (col box è il supporto esatto)."""
+    r = box_radius(sigma)
+    if exact or sigma < IIR_MIN_SIGMA:
+        return 3 * r
+    return int(math.ceil(4.0 * math.sqrt(r * (r + 1))))
+
+
+# ── box: 1 passata, buffer di lavoro riusati ────────────────────────────────
+def box1d(a: np.ndarray, r: int, axis: int, out: Optional[np.ndarray] = None,
+          ws: Optional[BlurWorkspace] = None) -> np.ndarray:
+    """Box blur 1D (media su 2r+1 campioni, bordo 'edge') → float32.
+
+    out può coincidere con a (in place). Stessa aritmetica del vecchio
+    _box: cumsum float64 con uno zero in testa, (c[hi]-c[lo]) / w.
+    """
+    if out is None:
+        out = np.empty(a.shape, np.float32)
+    if r <= 0:
+        out[...] = a
+        return out
+    ws = ws or workspace()
+    av = np.moveaxis(a, axis, 0)
+    ov = np.moveaxis(out, axis, 0)
+    n, w = av.shape[0], 2 * r + 1
+    P = ws.buf('box_P', (n + 2 * r + 1,) + av.shape[1:])
+    P[0] = 0.0
+    P[1:r + 1] = av[0]
+    P[r + 1:r + 1 + n] = av
+    P[r + 1 + n:] = av[-1]
+    np.cumsum(P, axis=0, out=P)
+    D = ws.buf('box_D', av.shape)
+    np.subtract(P[w:w + n], P[:n], out=D)
+    np.divide(D, w, out=ov, casting='same_kind')
+    return out
+
+
+# ── IIR: Young–van Vliet (1995), 3° ordine ──────────────────────────────────
+def _yvv_coeffs(sigma: float) -> Tuple[float, float, float, float]:
+    """(B, c1, c2, c3): y[n] = B·x[n] + c1·y[n-1] + c2·y[n-2] + c3·y[n-3]."""
+    if sigma >= 2.5:
+        q = 0.98711 * sigma - 0.96330
+    else:
+        q = 3.97156 - 4.14554 * math.sqrt(1.0 - 0.26891 * sigma)
+    q2, q3 = q * q, q * q * q
+    b0 = 1.57825 + 2.44413 * q + 1.4281 * q2 + 0.422205 * q3
+    b1 = 2.44413 * q + 2.85619 * q2 + 1.26661 * q3
+    b2 = -(1.4281 * q2 + 1.26661 * q3)
+    b3 = 0.422205 * q3
+    c1, c2, c3 = b1 / b0, b2 / b0, b3 / b0
+    return 1.0 - (c1 + c2 + c3), c1, c2, c3
+
+
+def iir1d(a: np.ndarray, sigma: float, axis: int,
+          out: Optional[np.ndarray] = None,
+          ws: Optional[BlurWorkspace] = None) -> np.ndarray:
+    """Gaussiana ricorsiva 1D di deviazione sigma (bordo 'edge') → float32.
+
+    Il loop Python corre lungo l'asse; ogni passo è un'operazione
+    vettoriale su tutte le altre dimensioni (righe × canali). out può
+    coincidere con a.
+    """
+    if out is None:
+        out = np.empty(a.shape, np.float32)
+    ws = ws or workspace()
+    B, c1, c2, c3 = _yvv_coeffs(sigma)
+    av = np.moveaxis(a, axis, 0)
+    ov = np.moveaxis(out, axis, 0)
+    n = av.shape[0]
+    tail = int(math.ceil(4.0 * sigma))
+    # [x0 x0 x0 | x … | x_{n-1} × tail | 3 stati di coda]
+    Q = ws.buf('iir_Q', (3 + n + tail + 3,) + av.shape[1:])
+    t = ws.buf('iir_t', av.shape[1:])
+    Q[:3] = av[0]
+    Q[3:3 + n] = av
+    Q[3 + n:] = av[-1]
+    end = 3 + n + tail
+    # causale: a regime su x0 (guadagno DC 1 → lo stato iniziale è x0)
+    for i in range(3, end):
+        q = Q[i]
+        q *= B
+        np.multiply(Q[i - 1], c1, out=t); q += t
+        np.multiply(Q[i - 2], c2, out=t); q += t
+        np.multiply(Q[i - 3], c3, out=t); q += t
+    # anticausale: a regime sull'ultimo campione della coda
+    Q[end:] = Q[end - 1]
+    for i in range(end - 1, 2, -1):
+        q = Q[i]
+        q *= B
+        np.multiply(Q[i + 1], c1, out=t); q += t
+        np.multiply(Q[i + 2], c2, out=t); q += t
+        np.multiply(Q[i + 3], c3, out=t); q += t
+    ov[...] = Q[3:3 + n]
+    return out
+
+
+# ── interfaccia ─────────────────────────────────────────────────────────────
+def blur(a: np.ndarray, sigma: float, out: Optional[np.ndarray] = None,
+         ws: Optional[BlurWorkspace] = None, axes=(0, 1),
+         exact: bool = False) -> np.ndarray:
+    """Gaussiana separabile sugli assi `axes` → float32.
+
+    sigma < IIR_MIN_SIGMA o exact: 3 box di raggio round(sigma) per asse
+    (identico al blur storico); altrimenti IIR con lo stesso sigma
+    effettivo.
+    out=a lavora in place (a dev'essere float32 contiguo o una sua vista).
+    """
+    if out is None:
+        out = np.empty(a.shape, np.float32)
+    if sigma <= 0:
+        if out is not a:
+            out[...] = a
+        return out
+    ws = ws or workspace()
+    r = box_radius(sigma)
+    src = a if a.dtype == np.float32 else a.astype(np.float32)
+    if exact or sigma < IIR_MIN_SIGMA:
+        for _ in range(3):
+            for ax in axes:
+                box1d(src, r, ax, out=out, ws=ws)
+                src = out
+    else:
+        s_eff = math.sqrt(r * (r + 1))
+        for ax in axes:
+            iir1d(src, s_eff, ax, out=out, ws=ws)
+            src = out
+    return out
+
+
+def blur_roi(a: np.ndarray, sigma: float, y0: int, y1: int,
+             x0: int = 0, x1: Optional[int] = None,
+             out: Optional[np.ndarray] = None,
+             ws: Optional[BlurWorkspace] = None,
+             exact: bool = False) -> np.ndarray:
+    """blur(a)[y0:y1, x0:x1] senza sfocare tutto l'array.
+
+    Si sfoca la finestra allargata di support(sigma) per lato (tagliata ai
+    bordi veri di a, dove vale il bordo 'edge'); col box (sigma piccolo o
+    exact=True) il risultato è identico a quello dell'array intero, con
+    l'IIR lo è solo entro l'errore della coda di 4σ.
+    """
+    H, W = a.shape[:2]
+    x1 = W if x1 is None else x1
+    h = support(sigma, exact)
+    e0, e1 = max(0, y0 - h), min(H, y1 + h)
+    f0, f1 = max(0, x0 - h), min(W, x1 + h)
+    ws = ws or workspace()
+    ext = ws.buf('roi', (e1 - e0, f1 - f0) + a.shape[2:], np.float32)
+    blur(a[e0:e1, f0:f1], sigma, out=ext, ws=ws, exact=exact)
+    if out is None:
+        out = np.empty((y1 - y0, x1 - x0) + a.shape[2:], np.float32)
+    out[...] = ext[y0 - e0:y1 - e0, x0 - f0:x1 - f0]
+    return out
@@ -0,0 +1,106 @@
+"""
+guitarzorn — profiling per fase di create()
+============================================
+Misura dove vanno tempo e memoria nelle fasi di un rendering (ground,
+velatura, barline, segni/cammino, render, salvataggio):
+
+  • wall time e CPU time per fase;
+  • picco tracemalloc per fase (numpy registra le sue allocazioni);
+  • pennellate e pixel toccati per fase, letti dai contatori
+    OilCanvas.stats (differenza prima/dopo la fase);
+  • opzionale: un dump cProfile per fase (<dir>/<fase>.prof,
+    leggibile con `python -m pstats`).
+
+Il report è un JSON leggibile da macchina. Con enabled=False ogni
+phase() è un no-op: i motori lo usano sempre, il costo è nullo.
+
+Uso:
+    prof = PhaseProfiler(enabled=True, canvas_stats=lambda: cv.stats)
+    with prof.phase('ground'):
+        ...
+    prof.write('render.profile.json')
+"""
+
+import cProfile
+import json
+import os
+import platform
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+
+class PhaseProfiler:
+    """Cronometro + tracemalloc + contatori tela, fase per fase."""
+
+    def __init__(self, enabled: bool = False,
+                 canvas_stats: Optional[Callable[[], Dict[str, int]]] = None,
+                 cprofile_dir: Optional[str] = None):
+        self.enabled = enabled
+        self.canvas_stats = canvas_stats
+        self.cprofile_dir = cprofile_dir
+        self.phases: List[Dict] = []
+        self._t0 = time.perf_counter()
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if enabled and cprofile_dir:
+            os.makedirs(cprofile_dir, exist_ok=True)
+
+    def _stats(self) -> Dict[str, int]:
+        return dict(self.canvas_stats()) if self.canvas_stats else {}
+
+    @contextmanager
+    def phase(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        before = self._stats()
+        tracemalloc.reset_peak()
+        cur0 = tracemalloc.get_traced_memory()[0]
+        pr = cProfile.Profile() if self.cprofile_dir else None
+        w0, c0 = time.perf_counter(), time.process_time()
+        if pr:
+            pr.enable()
+        try:
+            yield
+        finally:
+            if pr:
+                pr.disable()
+            w1, c1 = time.perf_counter(), time.process_time()
+            cur1, peak = tracemalloc.get_traced_memory()
+            after = self._stats()
+            rec = dict(name=name, wall_s=round(w1 - w0, 6),
+                       cpu_s=round(c1 - c0, 6),
+                       mem_peak_bytes=peak - cur0,       # sopra l'ingresso
+                       mem_peak_abs_bytes=peak,
+                       mem_delta_bytes=cur1 - cur0)
+            for k, v in after.items():
+                rec[k] = v - before.get(k, 0)
+            if pr:
+                path = os.path.join(self.cprofile_dir,
+                                    f'{len(self.phases):02d}_{name}.prof')
+                pr.dump_stats(path)
+                rec['cprofile'] = path
+            self.phases.append(rec)
+
+    def report(self) -> Dict:
+        return dict(
+            python=platform.python_version(),
+            machine=platform.machine(),
+            total_wall_s=round(time.perf_counter() - self._t0, 6),
+            mem_peak_bytes=max((r['mem_peak_abs_bytes'] for r in self.phases),
+                               default=0),
+            phases=self.phases)
+
+    def write(self, path: str):
+        if not self.enabled:
+            return
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+        print(f"Profilo per fase: {path}")
+        for r in self.phases:
+            print(f"  {r['name']:12s} {r['wall_s']:8.3f}s  "
+                  f"picco {r['mem_peak_bytes'] / 2**20:8.1f} MB  "
+                  f"{r.get('strokes', 0):5d} pennellate  "
+                  f"{r.get('pixels', 0):10d} px")
@@ -27,6 +27,8 @@ from typing import Dict, List, Optional, Tuple
 import numpy as np
 from PIL import Image, ImageDraw
 
+from quality import QUALITIES, Quality, preset
+
 # ─── Palette Zorn (5 colori: 4 storici + gold per G settima) ─────────────────
 ZORN = {
     'ochre':     (196, 164, 106),
@@ -124,7 +126,8 @@ class Brush:
     NOISE_SPEED = 0.04
 
     def __init__(self, init_pos: np.ndarray, size: float,
-                 n_bristles: int, bristle_len: float, bristle_thick: float):
+                 n_bristles: int, bristle_len: float, bristle_thick: float,
+                 steps: float = 1.0):
         self.pos      = init_pos.copy()
         self.dir      = 0.0
         self.n        = n_bristles
@@ -133,6 +136,7 @@ class Brush:
         self.seed     = random.uniform(0, 1000)
         self.counter  = 0
         self._hn      = min(0.3 * size, self.HORIZ_NOISE)
+        self.noise_speed = self.NOISE_SPEED / steps   # stessa flessione per px
 
         n_parts = max(3, round(math.sqrt(2 * bristle_len)))
         delta_t = bristle_thick / n_parts
@@ -156,7 +160,7 @@ class Brush:
         ca, sa = math.cos(self.dir), math.sin(self.dir)
         for b in range(self.n):
             nx = (self.b_offsets[b][0]
-                  + self._hn * (_snoise(self.seed + self.NOISE_SPEED * self.counter
+                  + self._hn * (_snoise(self.seed + self.noise_speed * self.counter
                                         + b * 0.1) - 0.5))
             ny = self.b_offsets[b][1]
             self.b_pos[b] = np.array([
@@ -239,6 +243,10 @@ class Trace:
       n_steps  = 80-150        → 80+ step garantiti (warmup N_AVG=4 incluso)
       MIX_STR  = 0.015         → wet-paint mixing col canvas sottostante
       NOISE_AMP= 0.30          → variazione angolare moderata (≤54°)
+
+    steps — passi per passo storico (quality): il passo si accorcia a
+            SPEED/steps, rumore, sterzata e mescolanza si riscalano così
+            che la pennellata resti la stessa in px.
     """
     SPEED     = 2.5      # px/step → pennellate da 125-250 px (più drammatiche)
     NOISE_F   = 0.007
@@ -255,8 +263,12 @@ class Trace:
                  note_color: Tuple[int, int, int],
                  velocity: str,
                  preferred_ang: Optional[float] = None,
-                 ang_vel: float = 0.0):
+                 ang_vel: float = 0.0, steps: float = 1.0):
         self.brush      = brush
+        if steps != 1.0:
+            n_steps  = int(n_steps * steps)
+            ang_vel /= steps
+        self.steps      = steps
         self.n_steps    = max(Brush.N_AVG + 10, n_steps)   # MINIMO sempre sopra warmup
         self.note_color = note_color
         self.colors: Optional[List[List[Tuple]]] = None
@@ -266,13 +278,14 @@ class Trace:
         ang  = preferred_ang if preferred_ang is not None \
             else random.gauss(0.0, math.pi / 3)   # bias verso destra
         pos  = init_pos.copy()
+        speed, nf = self.SPEED / steps, self.NOISE_F / steps
         self.positions = [pos.copy()]
         for s in range(1, self.n_steps):
             ang  += ang_vel   # rotazione progressiva → 0 = dritto, ≠0 = arco
-            drift = self.NOISE_AMP * math.pi * (_snoise(seed + self.NOISE_F * s) - 0.5)
+            drift = self.NOISE_AMP * math.pi * (_snoise(seed + nf * s) - 0.5)
             a     = ang + drift
-            pos   = pos + np.array([self.SPEED * math.cos(a),
-                                    self.SPEED * math.sin(a)])
+            pos   = pos + np.array([speed * math.cos(a),
+                                    speed * math.sin(a)])
             self.positions.append(pos.copy())
 
         # ── Alpha decay ESPONENZIALE (Agente 2+3: simula drag olio su tela) ──
@@ -297,7 +310,7 @@ class Trace:
                           max(0, min(255, int(b0 + dv)))))
 
         colors: List[List[Tuple]] = []
-        mix_start = min(self.MIX_START, self.n_steps)
+        mix_start = min(round(self.MIX_START * self.steps), self.n_steps)
         for _ in range(mix_start):
             colors.append(list(step0))
 
@@ -313,6 +326,9 @@ class Trace:
             # Blending differenziato: opaco (alpha alto) vs. glaze (Agente 3)
             alpha_norm = self.alphas[s] / 255.0
             ms_s = ms * 3.5 if alpha_norm < 0.40 else ms  # glaze: più canvas
+            if self.steps != 1.0:                # stesso peso per px (quality)
+                w    = Quality.per_step(ms_s / (1 + ms_s), self.steps)
+                ms_s = w / (1 - w)
             for b in range(n):
                 if 0 <= py < H and 0 <= px < W:
                     cp   = canvas_arr[py, px]
@@ -353,10 +369,16 @@ class ZornRiffBristlePainting:
 
     Ogni nota genera 88-124 Trace con n_steps 35-70 → pennellate da 52-105 px.
     La densità risultante (~1200 tracce totali) copre il canvas come olio pittorico.
+
+    quality — preset di quality.py: setole (più fitte e più sottili),
+              passi per pennellata e, nelle sottoclassi che ripetono le
+              tracce (v4–v6), ripetizioni con alpha compensato.
     """
 
-    def __init__(self, width: int = 1600, height: int = 1000, seed: int = 42):
+    def __init__(self, width: int = 1600, height: int = 1000, seed: int = 42,
+                 quality: str = 'standard'):
         self.W, self.H = width, height
+        self.q = preset(quality)
         random.seed(seed)
         np.random.seed(seed)
 
@@ -380,22 +402,29 @@ class ZornRiffBristlePainting:
         return {'p': 7.0, 'mp': 11.0, 'mf': 17.0, 'f': 23.0, 'ff': 30.0}.get(v, 17.0)
 
     def _make_brush(self, pos: np.ndarray, size: float) -> Brush:
-        n_bristles    = int(size * random.uniform(1.5, 2.0))
+        q = self.q
+        n_bristles    = int(size * random.uniform(1.5, 2.0) * q.bristles)
         bristle_len   = min(2.2 * size, 14.0)
-        bristle_thick = min(0.9 * size, 6.0)
-        return Brush(pos, size, n_bristles, bristle_len, bristle_thick)
+        bristle_thick = min(0.9 * size, 6.0) / q.bristles  # stessa copertura
+        return Brush(pos, size, max(1, n_bristles), bristle_len,
+                     bristle_thick, q.steps)
 
     # ── paint singola traccia ─────────────────────────────────────────────
     def _paint_one(self, pos: np.ndarray, size: float, n_steps: int,
                    color: Tuple, velocity: str,
                    ang: Optional[float] = None,
                    alpha_scale: float = 1.0,
-                   ang_vel: float = 0.0):
+                   ang_vel: float = 0.0, n_rep: int = 1):
+        """n_rep — ripetizioni storiche della traccia: se quality ne fa
+        q.reps(n_rep), l'alpha si compensa (quality.rep_opacity)."""
         brush = self._make_brush(pos, size)
         trace = Trace(brush, n_steps, pos, color, velocity,
-                      preferred_ang=ang, ang_vel=ang_vel)
+                      preferred_ang=ang, ang_vel=ang_vel, steps=self.q.steps)
         if alpha_scale != 1.0:
             trace.alphas = [int(a * alpha_scale) for a in trace.alphas]
+        if self.q.reps(n_rep) != n_rep:
+            trace.alphas = [int(255 * self.q.rep_opacity(a / 255, n_rep))
+                            for a in trace.alphas]
         trace.calculate_colors(self.arr)
         trace.paint(self.canvas, self.arr)
 
@@ -611,5 +640,14 @@ class ZornRiffBristlePainting:
 
 
 if __name__ == '__main__':
-    painting = ZornRiffBristlePainting()
-    painting.create()
+    import argparse
+    p = argparse.ArgumentParser(
+        description='guitarzorn v3 — pennellate a setole (catene IK)')
+    p.add_argument('--seed', type=int, default=42)
+    p.add_argument('--out', default='johnny_b_goode_zorn_riff_v3.png')
+    p.add_argument('--quality', choices=QUALITIES, default='standard',
+                   help='densità di setole, passi e ripetizioni '
+                        '(draft per le anteprime, final/print per le consegne)')
+    args = p.parse_args()
+    ZornRiffBristlePainting(seed=args.seed,
+                            quality=args.quality).create(out=args.out)
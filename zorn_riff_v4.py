@@ -34,8 +34,8 @@ class ZornRiffV4(ZornBase):
     # note da dipingere PER ULTIME (su fondo scuro → visibili)
     _PAINT_LAST = {'E'}
 
-    def __init__(self, seed: int = 42):
-        super().__init__(width=1200, height=800, seed=seed)
+    def __init__(self, seed: int = 42, quality: str = 'standard'):
+        super().__init__(width=1200, height=800, seed=seed, quality=quality)
         self.px_per_beat = 100   # era 200
         self.margin      = 80
 
@@ -81,7 +81,7 @@ class ZornRiffV4(ZornBase):
         color    = get_note_color(note['note'], note['velocity'])
         traces   = self._build_traces(note, notes, idx)
 
-        for _ in range(N_REPEAT):
+        for _ in range(self.q.reps(N_REPEAT)):
             for n_steps, ang, sm, asc, av, (dx, dy) in traces:
                 jitter = np.array([random.gauss(0, 55.0),
                                    random.gauss(0, 42.0)])
@@ -95,7 +95,7 @@ class ZornRiffV4(ZornBase):
                     start, size, n_st, color, note['velocity'],
                     ang=ang + ang_j,
                     alpha_scale=asc * alpha_boost,
-                    ang_vel=av)
+                    ang_vel=av, n_rep=N_REPEAT)
 
     def paint_riff(self, notes):
         # Dipinge prima le note scure, poi le chiare (E/bianco) in cima
@@ -105,7 +105,7 @@ class ZornRiffV4(ZornBase):
         for note in ordered:
             idx = notes.index(note)
             boost = 1.05 if note['note'] in self._PAINT_LAST else 1.0
-            n_traces = len(self._build_traces(note, notes, idx)) * 20
+            n_traces = len(self._build_traces(note, notes, idx)) * self.q.reps(20)
             print(f"  {note['note']} {note['technique']:20s}  {n_traces} tracce")
             self._paint_note(note, notes, idx, alpha_boost=boost)
 
@@ -125,4 +125,13 @@ class ZornRiffV4(ZornBase):
 
 
 if __name__ == '__main__':
-    ZornRiffV4().create()
+    import argparse
+    p = argparse.ArgumentParser(
+        description='guitarzorn v4 — alta densità pittorica')
+    p.add_argument('--seed', type=int, default=42)
+    p.add_argument('--out', default='johnny_b_goode_zorn_v4.png')
+    p.add_argument('--quality', choices=_v3.QUALITIES, default='standard',
+                   help='densità di setole, passi e ripetizioni '
+                        '(draft per le anteprime, final/print per le consegne)')
+    args = p.parse_args()
+    ZornRiffV4(seed=args.seed, quality=args.quality).create(out=args.out)
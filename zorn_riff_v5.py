@@ -77,8 +77,9 @@ class ZornGuitarEvolution(ZornBase):
     """
 
     def __init__(self, width: int = 1600, height: int = 1000,
-                 seed: int = 42, n_repeat: int = 10):
-        super().__init__(width, height, seed)
+                 seed: int = 42, n_repeat: int = 10,
+                 quality: str = 'standard'):
+        super().__init__(width, height, seed, quality)
         self.n_repeat = n_repeat   # base painting passes per note event
 
         # Dark canvas — guitar on a near-black ground
@@ -318,7 +319,8 @@ class ZornGuitarEvolution(ZornBase):
         y_sub   = (str_ys[min(str_num - 1, 5)] - gi['neck_cy'])
         y_sub  *= 0.5  # soften the sub-positioning for natural spread
 
-        for _ in range(n_reps):
+        # quality: q.reps(n_reps) passes, alpha compensated to cover the same
+        for _ in range(self.q.reps(n_reps)):
             for n_steps, ang, sm, asc, av, (dx, dy) in traces:
                 # Sample base position from zone mask
                 pos    = self._sample_zone(zone_name)
@@ -339,7 +341,7 @@ class ZornGuitarEvolution(ZornBase):
                     start, size, n_st, color, note['velocity'],
                     ang=ang + random.gauss(0, 0.12),
                     alpha_scale=asc,
-                    ang_vel=av)
+                    ang_vel=av, n_rep=n_reps)
 
     # ── Entry point ───────────────────────────────────────────────────────────
 
@@ -372,7 +374,7 @@ class ZornGuitarEvolution(ZornBase):
             total_dur  = sum(n['duration'] for _, n in zone_events)
             n_trace_est = sum(
                 len(self._build_traces(n, notes, i)) *
-                max(2, int(self.n_repeat * n['duration'] / 0.5))
+                self.q.reps(max(2, int(self.n_repeat * n['duration'] / 0.5)))
                 for i, n in zone_events)
 
             print(f"  {zone_name:10s}: {len(zone_events)} note(s), "
@@ -399,9 +401,13 @@ if __name__ == '__main__':
                    help='output filename')
     p.add_argument('--target', action='store_true',
                    help='also save the procedural guitar target image')
+    p.add_argument('--quality', choices=_v3.QUALITIES, default='standard',
+                   help='bristle density, steps and repeats '
+                        '(draft for previews, final/print for delivery)')
     args = p.parse_args()
 
     ZornGuitarEvolution(
         seed=args.seed,
         n_repeat=args.repeat,
+        quality=args.quality,
     ).create(out=args.out, save_target=args.target)
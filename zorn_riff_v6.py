@@ -57,8 +57,9 @@ class ZornPitturaGrafica(ZornBase):
     _REPEAT       = 3      # ripetizioni per traccia (base)
     _ALPHA_BOOST  = 1.10   # boost alpha segni → emergono sul ground
 
-    def __init__(self, width: int = 1600, height: int = 1000, seed: int = 42):
-        super().__init__(width, height, seed)
+    def __init__(self, width: int = 1600, height: int = 1000, seed: int = 42,
+                 quality: str = 'standard'):
+        super().__init__(width, height, seed, quality)
 
         # Spaziatura: 240px/battito → note distribuite su più canvas
         self.px_per_beat = 240
@@ -151,7 +152,7 @@ class ZornPitturaGrafica(ZornBase):
                   f"sz={base_sz:.1f}px  {len(traces)} tracce")
 
             for n_steps, ang, sm, asc, av, (dx, dy) in traces:
-                for _ in range(n_rep):
+                for _ in range(self.q.reps(n_rep)):
                     jitter = np.array([
                         random.gauss(0, self._JITTER),
                         random.gauss(0, self._JITTER)])
@@ -170,7 +171,7 @@ class ZornPitturaGrafica(ZornBase):
                         start, size, n_st, color, note['velocity'],
                         ang=ang + random.gauss(0, 0.07),
                         alpha_scale=asc * self._ALPHA_BOOST,
-                        ang_vel=av)
+                        ang_vel=av, n_rep=n_rep)
 
     # ── entry point ───────────────────────────────────────────────────────────
 
@@ -194,6 +195,10 @@ if __name__ == '__main__':
         description='guitarzorn v6 — i simboli pittorici dell\'algoritmo musica→pittura')
     p.add_argument('--seed', type=int, default=42)
     p.add_argument('--out',  default='johnny_b_goode_zorn_v6.png')
+    p.add_argument('--quality', choices=_v3.QUALITIES, default='standard',
+                   help='densità di setole, passi e ripetizioni '
+                        '(draft per le anteprime, final/print per le consegne)')
     args = p.parse_args()
 
-    ZornPitturaGrafica(seed=args.seed).create(out=args.out)
+    ZornPitturaGrafica(seed=args.seed,
+                       quality=args.quality).create(out=args.out)
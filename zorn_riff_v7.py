@@ -19,11 +19,16 @@ del riff di Johnny B. Goode, palette Zorn rigorosa.
 
 import math
 import random
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 from PIL import Image
 
+import noise_bank
+from quality import QUALITIES, preset
+from zorn_blur import blur, box1d
+from zorn_profile import PhaseProfiler
+
 # ─── Palette Zorn ──────────────────────────────────────────────────────────────
 ZORN = {
     'ochre':     (196, 164, 106),
@@ -62,37 +67,6 @@ def get_note_color(note: str, velocity: str) -> Tuple[int, int, int]:
 
 # ─── utilità numpy ─────────────────────────────────────────────────────────────
 
-def _box(a: np.ndarray, r: int, axis: int) -> np.ndarray:
-    """Box blur 1D via somma cumulativa (vettoriale)."""
-    if r <= 0:
-        return a
-    pad = [(0, 0)] * a.ndim
-    pad[axis] = (r, r)
-    ap = np.pad(a, pad, mode='edge')
-    c = np.cumsum(ap, axis=axis, dtype=np.float64)
-    zshape = list(c.shape)
-    zshape[axis] = 1
-    c = np.concatenate([np.zeros(zshape), c], axis=axis)
-    w = 2 * r + 1
-    hi = [slice(None)] * a.ndim
-    lo = [slice(None)] * a.ndim
-    hi[axis] = slice(w, w + a.shape[axis])
-    lo[axis] = slice(0, a.shape[axis])
-    return ((c[tuple(hi)] - c[tuple(lo)]) / w).astype(np.float32)
-
-
-def blur(a: np.ndarray, sigma: float) -> np.ndarray:
-    """Gaussiana approssimata: 3 box blur ripetuti (separabili)."""
-    if sigma <= 0:
-        return a.astype(np.float32)
-    r = max(1, int(round(sigma)))
-    out = a.astype(np.float32)
-    for _ in range(3):
-        out = _box(out, r, 0)
-        out = _box(out, r, 1)
-    return out
-
-
 def snoise1(rng: np.random.Generator, n: int, scale: float) -> np.ndarray:
     """Rumore liscio 1D in ~[-1,1]."""
     k = max(2, int(n / max(scale, 1.0)) + 2)
@@ -112,7 +86,7 @@ def snoise2(rng: np.random.Generator, nt: int, ns: int,
     ti = np.clip(np.round(np.linspace(0, kt - 1, nt)).astype(int), 0, kt - 1)
     si = np.clip(np.round(np.linspace(0, ks - 1, ns)).astype(int), 0, ks - 1)
     up = g[ti][:, si]
-    up = blur(up, 1.5)
+    blur(up, 1.5, out=up)
     s = np.std(up)
     return up / s if s > 1e-6 else up
 
@@ -124,11 +98,28 @@ class OilCanvas:
     Tela con doppio buffer: colore (float 0..1) e altezza (impasto).
     La trama tessuta della tela vive nel height-field di base, così la
     pittura sottile la lascia trasparire e il dry-brush vi si aggrappa.
+
+    noise — 'bank' (default): il rumore di ogni pennellata è una finestra
+            della NoiseBank del seed (noise_bank.py, condivisa con v8/v9),
+            scelta con 5 estrazioni dallo stream; 'synth': snoise1/snoise2
+            sintetizzati per pennellata (le immagini storiche).
+    quality — preset di quality.py ('standard' = storico): setole e
+              campioni per px (almeno 1 ciascuno), alpha dei campioni
+              diviso per la densità → stessa copertura.
     """
 
-    def __init__(self, W: int, H: int, base_color, seed: int = 42):
+    NOISES = ('bank', 'synth')
+
+    def __init__(self, W: int, H: int, base_color, seed: int = 42,
+                 noise: str = 'bank', quality='standard'):
+        if noise not in self.NOISES:
+            raise ValueError(f"noise sconosciuto: {noise!r} "
+                             f"(attesi: {', '.join(self.NOISES)})")
         self.W, self.H = W, H
+        self.seed, self.noise = seed, noise
+        self.quality = preset(quality)
         self.rng = np.random.default_rng(seed)
+        self.stats = dict(strokes=0, pixels=0)          # per zorn_profile
 
         base = np.asarray(base_color, np.float32) / 255.0
         self.color = np.empty((H, W, 3), np.float32)
@@ -141,7 +132,7 @@ class OilCanvas:
         weft = np.sin(yy * (2 * np.pi / (sp * 1.12)) + np.sin(xx * 0.42) * 0.6)
         weave = (warp * 0.5 + 0.5) * 0.55 + (weft * 0.5 + 0.5) * 0.45
         weave += self.rng.standard_normal((H, W)).astype(np.float32) * 0.06
-        weave = blur(weave, 2)
+        blur(weave, 2, out=weave)
         weave -= weave.min()
         weave /= max(weave.max(), 1e-6)
         self.weave = weave
@@ -150,7 +141,7 @@ class OilCanvas:
         # mottling anisotropico: larghe variazioni orizzontali, piccole verticali
         # → le pennellate del ground affiorano come nel riferimento
         mx = blur(self.rng.standard_normal((H, W)).astype(np.float32), 90)
-        my = _box(mx, 4, 0)                          # schiaccia la variazione verticale
+        my = box1d(mx, 4, 0, out=mx)                  # schiaccia la variazione verticale
         my /= max(np.abs(my).max(), 1e-6)
         self.color += my[..., None] * 0.040          # leggerissima ondulazione calda
         self.color = np.clip(self.color, 0, 1)
@@ -174,15 +165,34 @@ class OilCanvas:
         """
         rng = self.rng
         col = np.asarray(color, np.float32) / 255.0
+        self.stats['strokes'] += 1
+        q = self.quality
+        sps, bps = q.km_steps, q.km_bristles          # campioni per px, setole
+        n = max(8, int(length * sps))
+        nS = max(7, int(width * 1.7 * bps))
+
+        # ── rumore: sintetizzato o letto dalla banca del seed ────────────────
+        if self.noise == 'bank':
+            nb = noise_bank.bank(self.seed)
+            u = rng.random(noise_bank.N_OFFSETS)
+            tremor = nb.smooth1d(u[:1], [n], 30 * sps)[0]
+            depn = nb.smooth1d(u[1:2], [n], 18 * sps)[0]
+            load = nb.uniform(u[2:3], [nS])[0]
+            field = nb.streak(u[3], u[4], n, nS, (sps, bps))
+        else:
+            tremor = snoise1(rng, n, 30 * sps)
+            load = rng.random(nS).astype(np.float32)
+            depn = snoise1(rng, n, 18 * sps)
+            field = snoise2(rng, n, nS, 16 * sps, 1.6 * bps)
 
         # ── traiettoria (1 px per step) ──────────────────────────────────────
-        n = max(8, int(length))
         ts = np.linspace(0.0, 1.0, n).astype(np.float32)
         ang = (angle + curvature * ts
-               + snoise1(rng, n, 30) * 0.045)        # tremolio della mano
+               + tremor * 0.045)                     # tremolio della mano
         dx, dy = np.cos(ang), np.sin(ang)
-        px = x + np.cumsum(dx) - dx[0]
-        py = y + np.cumsum(dy) - dy[0]
+        ex, ey = (dx, dy) if sps == 1.0 else (dx / sps, dy / sps)  # passo
+        px = x + np.cumsum(ex) - ex[0]
+        py = y + np.cumsum(ey) - ey[0]
         if waviness > 0:
             osc = np.sin(ts * 2 * np.pi * wave_freq) * waviness
             px += -dy * osc
@@ -195,18 +205,16 @@ class OilCanvas:
         wt = width * attack * release                 # (n,)
 
         # ── profilo setole attraverso s ──────────────────────────────────────
-        nS = max(7, int(width * 1.7))
         s = np.linspace(-1.0, 1.0, nS).astype(np.float32)
-        load = rng.random(nS).astype(np.float32)
         k = np.array([0.25, 0.5, 0.25], np.float32)
         load = np.convolve(np.pad(load, 1, mode='edge'), k, 'valid')
         bristle = 0.45 + 0.55 * load                  # carico per-setola
         edge = np.clip((1.0 - np.abs(s)) * 3.0, 0, 1) ** 0.65
 
         # ── esaurimento pigmento + striature ────────────────────────────────
-        dep = (1.0 - 0.62 * ts ** 1.25) * (0.85 + 0.30 * snoise1(rng, n, 18))
+        dep = (1.0 - 0.62 * ts ** 1.25) * (0.85 + 0.30 * depn)
         dep = np.clip(dep, 0.05, 1.4)
-        streak = 1.0 + 0.30 * snoise2(rng, n, nS, 16, 1.6)
+        streak = 1.0 + 0.30 * field
         D = dep[:, None] * bristle[None, :] * np.clip(streak, 0.2, 2.0)
         A = np.clip(D, 0, 1.25) * edge[None, :]       # (n, nS) alpha grezza
 
@@ -216,7 +224,7 @@ class OilCanvas:
         under = self.color[cy, cx]                    # (n,3)
         carried = np.empty_like(under)
         carried[0] = under[0]
-        kp = 0.03                                     # pickup lento: non contamina il colore
+        kp = q.per_step(0.03, sps)                    # pickup lento: non contamina il colore
         for i in range(1, n):
             carried[i] = carried[i - 1] * (1 - kp) + under[i] * kp
         m = (smear * (0.25 + 0.6 * ts))[:, None]      # più sporco verso la coda
@@ -244,6 +252,8 @@ class OilCanvas:
         need = np.clip((dryness * 1.15 - d) / max(dryness, 1e-3), 0, 1)
         gate = np.clip((self.weave[yi, xi] + (1.0 - need) - 0.82) / 0.22, 0, 1)
         a = a * (0.12 + 0.88 * gate) * opacity
+        if sps * bps != 1.0:                          # copertura per px
+            a /= np.float32(sps * bps)
 
         # ── accumulo locale (bbox) e compositing ────────────────────────────
         x0, x1 = xi.min(), xi.max() + 1
@@ -265,6 +275,7 @@ class OilCanvas:
 
         roi = self.color[y0:y1, x0:x1]
         roi[nz] = roi[nz] * (1 - Aeff[nz, None]) + mean_col[nz] * Aeff[nz, None]
+        self.stats['pixels'] += int(nz.sum())
 
         # impasto: l'altezza si accumula, con tetto per pennellata.
         # Lieve blur → le creste seguono il gesto invece del rumore per-pixel.
@@ -319,12 +330,15 @@ class ZornOilPainting:
     PX_PER_BEAT = 240
     MARGIN = 110
 
-    def __init__(self, seed: int = 42):
+    def __init__(self, seed: int = 42, noise: str = 'bank',
+                 quality: str = 'standard'):
         random.seed(seed)
         # fondo: ocra gialla satura (Naples yellow caldo, come nel riferimento)
         bg = zorn_blend(ZORN['ochre'], ZORN['white'], 0.18)
         bg = zorn_blend(bg, (230, 180, 40), 0.30)   # shift verso giallo cadmio
-        self.cv = OilCanvas(self.W, self.H, bg, seed)
+        self.q = preset(quality)
+        self.cv = OilCanvas(self.W, self.H, bg, seed, noise=noise,
+                            quality=self.q)
 
     # coordinate musicali (come v6)
     def _tx(self, t: float) -> float:
@@ -400,6 +414,14 @@ class ZornOilPainting:
     _J_POS   = 3.5    # sigma jitter posizione (px)
     _J_ANG   = 0.04   # sigma jitter angolo (rad)
 
+    def _stroke(self, *args, opacity: float, thickness: float, **kw):
+        """cv.stroke di una ripetizione: con quality ≠ standard le
+        ripetizioni cambiano di numero, opacità e spessore compensano
+        (quality.py) perché la nota copra come con _n_rep passate."""
+        n = self._n_rep
+        self.cv.stroke(*args, opacity=self.q.rep_opacity(opacity, n),
+                       thickness=self.q.rep_thickness(thickness, n), **kw)
+
     def riff_marks(self, notes: List[Dict]):
         for i, nd in enumerate(notes):
             x0, y0 = nd['x_pos'], nd['y_pos']
@@ -416,9 +438,10 @@ class ZornOilPainting:
                 ang_next = 0.0
 
             n_rep = self._N_REP_PC if tech == 'powerchord' else self._N_REP
-            print(f"  [{i+1:2d}/12] {nd['note']} {tech}  ×{n_rep}")
+            self._n_rep = n_rep
+            print(f"  [{i+1:2d}/12] {nd['note']} {tech}  ×{self.q.reps(n_rep)}")
 
-            for _rep in range(n_rep):
+            for _rep in range(self.q.reps(n_rep)):
                 # jitter posizione e angolo per ogni ripetizione
                 x   = x0 + random.gauss(0, self._J_POS)
                 y   = y0 + random.gauss(0, self._J_POS)
@@ -426,97 +449,97 @@ class ZornOilPainting:
 
                 if tech == 'staccato':
                     # dab ovale, carico (come i segni ovali scuri nel riferimento)
-                    self.cv.stroke(x, y, math.radians(-30) + aj,
-                                   68 * v, 30 * v, col,
-                                   opacity=0.93, thickness=0.95,
-                                   dryness=0.42, smear=0.08, taper_end=0.52)
+                    self._stroke(x, y, math.radians(-30) + aj,
+                                 68 * v, 30 * v, col,
+                                 opacity=0.93, thickness=0.95,
+                                 dryness=0.42, smear=0.08, taper_end=0.52)
 
                 elif tech == 'legato':
                     # tratto morbido verso la nota seguente
-                    self.cv.stroke(x, y, ang_next + aj,
-                                   (175 + 95 * dur) * v, 26 * v, col,
-                                   opacity=0.88, thickness=0.72,
-                                   curvature=random.gauss(0, 0.14),
-                                   dryness=0.45, smear=0.08, taper_end=0.70)
+                    self._stroke(x, y, ang_next + aj,
+                                 (175 + 95 * dur) * v, 26 * v, col,
+                                 opacity=0.88, thickness=0.72,
+                                 curvature=random.gauss(0, 0.14),
+                                 dryness=0.45, smear=0.08, taper_end=0.70)
 
                 elif tech == 'slide':
                     # tre parallele diagonali, centrale dominante
                     for off, opac, wd in [(-14, 0.66, 8),
                                            (  0, 0.90, 17),
                                            ( 14, 0.62, 7)]:
-                        self.cv.stroke(x, y + off, math.radians(-15) + aj,
-                                       165 * v, wd, col,
-                                       opacity=opac, thickness=0.62,
-                                       dryness=0.52, smear=0.06, taper_end=0.80)
+                        self._stroke(x, y + off, math.radians(-15) + aj,
+                                     165 * v, wd, col,
+                                     opacity=opac, thickness=0.62,
+                                     dryness=0.52, smear=0.06, taper_end=0.80)
 
                 elif tech == 'hammer_on':
                     # stella di dab radiali
                     for adeg in (0, 60, 120, 180, 240, 300):
                         a = math.radians(adeg) + aj
-                        self.cv.stroke(x + 10 * math.cos(a), y + 10 * math.sin(a),
-                                       a, 44 * v, 16 * v, col,
-                                       opacity=0.90, thickness=0.82,
-                                       dryness=0.38, smear=0.06, taper_end=0.52)
+                        self._stroke(x + 10 * math.cos(a), y + 10 * math.sin(a),
+                                     a, 44 * v, 16 * v, col,
+                                     opacity=0.90, thickness=0.82,
+                                     dryness=0.38, smear=0.06, taper_end=0.52)
 
                 elif tech == 'bend':
                     # arco curvo, morbido
-                    self.cv.stroke(x, y, math.radians(-35) + aj,
-                                   142 * v, 28 * v, col,
-                                   opacity=0.92, thickness=0.88,
-                                   curvature=-1.20, dryness=0.36,
-                                   smear=0.07, taper_end=0.60)
+                    self._stroke(x, y, math.radians(-35) + aj,
+                                 142 * v, 28 * v, col,
+                                 opacity=0.92, thickness=0.88,
+                                 curvature=-1.20, dryness=0.36,
+                                 smear=0.07, taper_end=0.60)
 
                 elif tech == 'vibrato':
                     # onda sinusoidale
-                    self.cv.stroke(x, y, aj,
-                                   (155 + 88 * dur) * v, 23 * v, col,
-                                   opacity=0.92, thickness=0.84,
-                                   waviness=9.0, wave_freq=5.0,
-                                   dryness=0.36, smear=0.07, taper_end=0.56)
+                    self._stroke(x, y, aj,
+                                 (155 + 88 * dur) * v, 23 * v, col,
+                                 opacity=0.92, thickness=0.84,
+                                 waviness=9.0, wave_freq=5.0,
+                                 dryness=0.36, smear=0.07, taper_end=0.56)
 
                 elif tech == 'powerchord':
                     # blocco dominante: tre lastre (il segno più grande)
                     for dyy, ww in [(-36, 32 * v), (0, 40 * v), (36, 32 * v)]:
-                        self.cv.stroke(x - 18, y + dyy, aj,
-                                       195 * v, ww, col,
-                                       opacity=0.96, thickness=1.25,
-                                       dryness=0.20, smear=0.06, taper_end=0.46)
+                        self._stroke(x - 18, y + dyy, aj,
+                                     195 * v, ww, col,
+                                     opacity=0.96, thickness=1.25,
+                                     dryness=0.20, smear=0.06, taper_end=0.46)
 
                 elif tech == 'tapping':
                     # 4 tratti a X, secchi
                     for adeg in (45, 135, 225, 315):
                         a = math.radians(adeg) + aj
-                        self.cv.stroke(x + 8 * math.cos(a), y + 8 * math.sin(a),
-                                       a, 48 * v, 14, col,
-                                       opacity=0.90, thickness=0.88,
-                                       dryness=0.40, smear=0.06, taper_end=0.56)
+                        self._stroke(x + 8 * math.cos(a), y + 8 * math.sin(a),
+                                     a, 48 * v, 14, col,
+                                     opacity=0.90, thickness=0.88,
+                                     dryness=0.40, smear=0.06, taper_end=0.56)
 
                 elif tech == 'dive':
                     # curva discendente, leggera
-                    self.cv.stroke(x, y, math.radians(8) + aj,
-                                   195 * v, 25 * v, col,
-                                   opacity=0.90, thickness=0.84,
-                                   curvature=1.10, dryness=0.48,
-                                   smear=0.07, taper_end=0.86)
+                    self._stroke(x, y, math.radians(8) + aj,
+                                 195 * v, 25 * v, col,
+                                 opacity=0.90, thickness=0.84,
+                                 curvature=1.10, dryness=0.48,
+                                 smear=0.07, taper_end=0.86)
 
                 elif tech == 'harmonic_natural':
                     # tre tratti bianchi etereo
                     hcol = zorn_blend(ZORN['white'], ZORN['ochre'], 0.05)
                     for adeg in (30, 150, 270):
                         a = math.radians(adeg) + aj
-                        self.cv.stroke(x + 16 * math.cos(a), y + 16 * math.sin(a),
-                                       a, 72, 27, hcol,
-                                       opacity=0.90, thickness=0.74,
-                                       dryness=0.40, smear=0.06, taper_end=0.70)
+                        self._stroke(x + 16 * math.cos(a), y + 16 * math.sin(a),
+                                     a, 72, 27, hcol,
+                                     opacity=0.90, thickness=0.74,
+                                     dryness=0.40, smear=0.06, taper_end=0.70)
 
                 elif tech == 'harmonic_artificial':
                     # 4 scintille brevi
                     for adeg in (0, 90, 180, 270):
                         a = math.radians(adeg) + aj
-                        self.cv.stroke(x + 7 * math.cos(a), y + 7 * math.sin(a),
-                                       a, 34, 11, col,
-                                       opacity=0.86, thickness=0.72,
-                                       dryness=0.48, smear=0.06, taper_end=0.78)
+                        self._stroke(x + 7 * math.cos(a), y + 7 * math.sin(a),
+                                     a, 34, 11, col,
+                                     opacity=0.86, thickness=0.72,
+                                     dryness=0.48, smear=0.06, taper_end=0.78)
 
     # ── dati riff ─────────────────────────────────────────────────────────────
     def parse_riff(self) -> List[Dict]:
@@ -543,21 +566,30 @@ class ZornOilPainting:
             t += nd['duration']
         return notes
 
-    def create(self, out: str = 'johnny_b_goode_zorn_v7.png'):
+    def create(self, out: str = 'johnny_b_goode_zorn_v7.png',
+               profile: Optional[PhaseProfiler] = None):
+        prof = profile or PhaseProfiler()
+        if prof.canvas_stats is None:
+            prof.canvas_stats = lambda: self.cv.stats
         notes = self.parse_riff()
         print("Ground (campo ocra a impasto)...")
-        self.ground()
+        with prof.phase('ground'):
+            self.ground()
         # Sfuma leggermente il buffer colore dopo il ground per ammorbidire
         # le striature delle pennellate del fondo (come una velatura finale
         # sull'imprimitura prima di iniziare a dipingere i segni).
         # due passaggi: uno trasversale + uno lungo per le striature orizzontali
-        self.cv.color = blur(self.cv.color, 14.0)
-        self.cv.color = np.clip(self.cv.color, 0, 1)
+        with prof.phase('glaze'):
+            self.cv.color = blur(self.cv.color, 14.0, exact=True)
+            self.cv.color = np.clip(self.cv.color, 0, 1)
         print("Segni del riff...")
-        self.riff_marks(notes)
+        with prof.phase('riff_marks'):
+            self.riff_marks(notes)
         print("Relief lighting (diffusa + speculare + AO)...")
-        img = self.cv.render()
-        img.save(out, dpi=(150, 150))
+        with prof.phase('render'):
+            img = self.cv.render()
+        with prof.phase('save'):
+            img.save(out, dpi=(150, 150))
         print(f"\nArtwork v7 salvato: {out}")
 
 
@@ -567,5 +599,19 @@ if __name__ == '__main__':
         description='guitarzorn v7 — olio reale con height-field e relief lighting')
     p.add_argument('--seed', type=int, default=42)
     p.add_argument('--out', default='johnny_b_goode_zorn_v7.png')
+    p.add_argument('--profile', nargs='?', const='', metavar='JSON',
+                   help='report per fase (default: <out>.profile.json)')
+    p.add_argument('--profile-cprofile', metavar='DIR',
+                   help='con --profile: un dump cProfile per fase in DIR')
+    p.add_argument('--noise', choices=OilCanvas.NOISES, default='bank',
+                   help="'bank' = finestre della banca del seed, "
+                        "'synth' = sintesi per pennellata (storico)")
+    p.add_argument('--quality', choices=QUALITIES, default='standard',
+                   help='densità di setole, campioni e ripetizioni '
+                        '(draft per le anteprime, final/print per le consegne)')
     args = p.parse_args()
-    ZornOilPainting(seed=args.seed).create(out=args.out)
+    prof = PhaseProfiler(enabled=args.profile is not None,
+                         cprofile_dir=args.profile_cprofile)
+    ZornOilPainting(seed=args.seed, noise=args.noise,
+                    quality=args.quality).create(out=args.out, profile=prof)
+    prof.write(args.profile or args.out.rsplit('.', 1)[0] + '.profile.json')
@@ -27,17 +27,47 @@ PARTE B — traslitterazione v2 (partitura canonica in score.py):
   bicolore wet-on-wet | shuffle forte/debole | barline a velatura |
   pausa = tela nuda.
 
-Standalone: importa solo score.py, numpy, PIL.  Output 1920x1080, seed 42.
+Standalone: importa solo score.py, ground_cache.py, png_stream.py,
+zorn_blur.py, zorn_profile.py, km_lut.py, noise_bank.py, quality.py,
+stroke_plan.py, stroke_map.py, stroke_sched.py, stroke_fronts.py,
+checkpoints.py, stroke_journal.py, numpy, PIL.
+Output 1920x1080, seed 42.
 """
 
+import hashlib
+import inspect
 import math
 import random
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 from PIL import Image
 
-from score import JOHNNY_B_GOODE_INTRO, BEATS_TOTAL, pitch_class, octave
+from stroke_fronts import SharedArrays, conflict_dag
+import stroke_fronts
+from checkpoints import CheckpointRun, CheckpointStore
+import ground_cache
+from ground_cache import GroundCache
+from km_lut import KMLut, PowLut
+import noise_bank
+from quality import QUALITIES, Quality, preset
+import zorn_blur
+from zorn_blur import blur, support
+from png_stream import PNGStream
+from zorn_profile import PhaseProfiler
+import stroke_plan
+from stroke_plan import StrokePlan, on_canvas, reach_box, ribbon_box
+import stroke_journal
+from stroke_journal import StrokeJournal
+import stroke_sched
+from stroke_map import (TECH, TECHS, compile_score, conc_lut, expand,
+                        first_diff, gauss, layout, lut, paint_table)
+from score import (JOHNNY_B_GOODE_INTRO, BEATS_TOTAL, VELOCITIES as VELS,
+                   Score, octave, pitch_class)
 
 # ═══════════════════════════════════════════════════════════════════════════
 # T1 — Kubelka-Munk a 4 pigmenti Zorn
@@ -68,6 +98,20 @@ def km_rgb(conc: np.ndarray) -> np.ndarray:
     return np.clip(1.0 + ks - np.sqrt(ks * ks + 2.0 * ks), 0.0, 1.0)
 
 
+# render(km=…): 'exact' = km_rgb; 'lut' = LUT 3D trilineare (km_lut.py);
+# 'lut_fused' = LUT 3D + pow speculare da tabella 1D
+KM_MODES = ('exact', 'lut', 'lut_fused')
+_KM_LUTS: Dict[int, KMLut] = {}
+
+
+def km_table(res: int = 65) -> KMLut:
+    """La LUT KM di KS_PIG a risoluzione res (costruita una volta sola)."""
+    lut = _KM_LUTS.get(res)
+    if lut is None:
+        lut = _KM_LUTS[res] = KMLut(KS_PIG, res)
+    return lut
+
+
 # vettori-concentrazione dei pigmenti puri
 OCHRE = np.array([1, 0, 0, 0], np.float32)
 VERM  = np.array([0, 1, 0, 0], np.float32)
@@ -80,6 +124,14 @@ def mixc(a: np.ndarray, b: np.ndarray, t: float) -> np.ndarray:
     return (a * (1.0 - t) + b * t).astype(np.float32)
 
 
+def stroke_table(rows: List[Dict]) -> Dict[str, np.ndarray]:
+    """Lista di kwargs di stroke() → colonne per OilCanvas.stroke_many()."""
+    keys = {k for r in rows for k in r}
+    return {k: (np.stack([np.asarray(r[k], np.float32) for r in rows])
+                if k == 'conc' else np.array([float(r[k]) for r in rows]))
+            for k in keys}
+
+
 # Ricette colore per pitch class (mapping v2).
 # Nota: nel KM il vermiglio domina i mix con l'ocra (K/S alto in G,B), quindi
 # i pesi sono riequilibrati per centrare i target percettivi del report
@@ -134,37 +186,6 @@ MAX_ANG = math.radians(35.0)     # clamp dell'angolo melodico
 # utilità numpy (invariata da v7)
 # ═══════════════════════════════════════════════════════════════════════════
 
-def _box(a: np.ndarray, r: int, axis: int) -> np.ndarray:
-    """Box blur 1D via somma cumulativa (vettoriale)."""
-    if r <= 0:
-        return a
-    pad = [(0, 0)] * a.ndim
-    pad[axis] = (r, r)
-    ap = np.pad(a, pad, mode='edge')
-    c = np.cumsum(ap, axis=axis, dtype=np.float64)
-    zshape = list(c.shape)
-    zshape[axis] = 1
-    c = np.concatenate([np.zeros(zshape), c], axis=axis)
-    w = 2 * r + 1
-    hi = [slice(None)] * a.ndim
-    lo = [slice(None)] * a.ndim
-    hi[axis] = slice(w, w + a.shape[axis])
-    lo[axis] = slice(0, a.shape[axis])
-    return ((c[tuple(hi)] - c[tuple(lo)]) / w).astype(np.float32)
-
-
-def blur(a: np.ndarray, sigma: float) -> np.ndarray:
-    """Gaussiana approssimata: 3 box blur ripetuti (separabili)."""
-    if sigma <= 0:
-        return a.astype(np.float32)
-    r = max(1, int(round(sigma)))
-    out = a.astype(np.float32)
-    for _ in range(3):
-        out = _box(out, r, 0)
-        out = _box(out, r, 1)
-    return out
-
-
 def snoise1(rng: np.random.Generator, n: int, scale: float) -> np.ndarray:
     """Rumore liscio 1D in ~[-1,1]."""
     k = max(2, int(n / max(scale, 1.0)) + 2)
@@ -175,20 +196,119 @@ def snoise1(rng: np.random.Generator, n: int, scale: float) -> np.ndarray:
     return (v / s if s > 1e-6 else v).astype(np.float32)
 
 
+# Scopi delle estrazioni counter-based: ogni (seed, scopo) è una chiave
+# Philox distinta, l'indice della pennellata sta nella word alta del
+# contatore (le word basse restano libere per ~2^128 blocchi per tratto).
+RNG_PURPOSE = {'tremor': 0, 'load': 1, 'depletion': 2, 'streak': 3,
+               'weave': 4, 'mottle': 5}
+
+
+def counter_rng(seed: int, index: int, purpose: str) -> np.random.Generator:
+    """Generatore Philox funzione pura di (seed, indice, scopo)."""
+    key = np.array([seed & 0xFFFFFFFFFFFFFFFF, RNG_PURPOSE[purpose]], np.uint64)
+    ctr = np.array([0, 0, index & 0xFFFFFFFFFFFFFFFF, 0], np.uint64)
+    return np.random.Generator(np.random.Philox(key=key, counter=ctr))
+
+
 def snoise2(rng: np.random.Generator, nt: int, ns: int,
-            ts: float, ss: float) -> np.ndarray:
+            ts: float, ss: float, sigma: float = 1.5) -> np.ndarray:
     """Rumore liscio 2D in ~[-1,1], shape (nt, ns)."""
+    return snoise2_expand(snoise2_knots(rng, nt, ns, ts, ss), nt, ns, sigma)
+
+
+def snoise2_knots(rng: np.random.Generator, nt: int, ns: int,
+                  ts: float, ss: float) -> np.ndarray:
+    """Nodi grezzi di snoise2 (l'unica parte che consuma rng)."""
     kt = max(2, int(nt / max(ts, 1.0)) + 2)
     ks = max(2, int(ns / max(ss, 1.0)) + 2)
-    g = rng.standard_normal((kt, ks)).astype(np.float32)
+    return rng.standard_normal((kt, ks)).astype(np.float32)
+
+
+def snoise2_expand(g: np.ndarray, nt: int, ns: int,
+                   sigma: float = 1.5) -> np.ndarray:
+    """Espansione deterministica dei nodi di snoise2 a shape (nt, ns)."""
+    kt, ks = g.shape
     ti = np.clip(np.round(np.linspace(0, kt - 1, nt)).astype(int), 0, kt - 1)
     si = np.clip(np.round(np.linspace(0, ks - 1, ns)).astype(int), 0, ks - 1)
     up = g[ti][:, si]
-    up = blur(up, 1.5)
+    blur(up, sigma, out=up)
     s = np.std(up)
     return up / s if s > 1e-6 else up
 
 
+def ema_pickup(under: np.ndarray, kp: float, block: int = 64) -> np.ndarray:
+    """EMA del pickup lungo il tratto, in forma chiusa a blocchi.
+
+    Stessa ricorrenza del loop di riferimento
+        carried[0] = under[0]
+        carried[i] = carried[i-1]·(1-kp) + under[i]·kp
+    ma risolta per blocchi di ``block`` campioni con una matrice di Toeplitz
+    triangolare kp·(1-kp)^(i-j): dentro il blocco è un matmul, fra i blocchi
+    si propaga solo l'ultimo valore (n/block iterazioni Python invece di n).
+    I pesi restano ≤ 1 (nessuna potenza negativa) → stabile in float32.
+    """
+    n = under.shape[0]
+    w = 1.0 - kp
+    # carried[-1] := under[0] riproduce carried[0] = under[0] (w + kp = 1)
+    pw = w ** np.arange(1, block + 1, dtype=np.float64)              # w^(i+1)
+    ii = np.arange(block)
+    lag = ii[:, None] - ii[None, :]
+    T = np.where(lag >= 0, kp * w ** np.maximum(lag, 0), 0.0)         # (B,B)
+
+    nb = -(-n // block)
+    up = np.zeros((nb * block,) + under.shape[1:], np.float64)
+    up[:n] = under
+    up = up.reshape((nb, block) + under.shape[1:])
+    intra = np.einsum('ij,bj...->bi...', T, up)                      # (nb,B,...)
+    out = np.empty_like(intra)
+    prev = under[0].astype(np.float64)
+    pw_ = pw.reshape((block,) + (1,) * (under.ndim - 1))
+    for b in range(nb):
+        out[b] = intra[b] + pw_ * prev
+        prev = out[b, -1]
+    return out.reshape((nb * block,) + under.shape[1:])[:n].astype(under.dtype)
+
+
+def resample(a: np.ndarray, h: int, w: int, step,
+             wrap: bool = False) -> np.ndarray:
+    """Campi (H,W[,C]) → (h,w[,C]) bilineare, out[i,j] = a(i·sy, j·sx).
+
+    step — passo comune o (sy, sx). Le coordinate delle pennellate cadono
+    sui centri dei pixel (round), quindi il pixel i di una griglia a passo
+    step corrisponde al punto i·step dell'altra: nessuno sfasamento di
+    mezzo pixel fra i livelli. wrap → tessera periodica; altrimenti bordo
+    'edge'.
+    """
+    sy, sx = (step, step) if np.isscalar(step) else step
+
+    def idx(n_out, n_in, step):
+        u = np.arange(n_out, dtype=np.float64) * step
+        if wrap:
+            u %= n_in
+        else:
+            u = np.minimum(u, n_in - 1)
+        i0 = u.astype(np.int64)
+        i1 = (i0 + 1) % n_in if wrap else np.minimum(i0 + 1, n_in - 1)
+        return i0, i1, (u - i0).astype(np.float32)
+    y0, y1, fy = idx(h, a.shape[0], sy)
+    x0, x1, fx = idx(w, a.shape[1], sx)
+    fy = fy.reshape((h, 1) + (1,) * (a.ndim - 2))
+    fx = fx.reshape((1, w) + (1,) * (a.ndim - 2))
+    a = np.asarray(a, np.float32)
+    # separabile: prima le righe (alla larghezza di a), poi le colonne
+    rows = a.take(y0, 0)
+    d = a.take(y1, 0)
+    d -= rows
+    d *= fy
+    rows += d
+    out = rows.take(x0, 1)
+    d = rows.take(x1, 1)
+    d -= out
+    d *= fx
+    out += d
+    return out
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # Tela a olio: concentrazioni KM (H,W,4) + height field
 # ═══════════════════════════════════════════════════════════════════════════
@@ -197,43 +317,452 @@ class OilCanvas:
     """
     Tela con doppio buffer: concentrazioni pigmento (float, somma≈1) e
     altezza (impasto). Il colore RGB nasce solo in render() via KM.
+
+    kernel — 'fast' (default): pickup EMA a blocchi (ema_pickup), campioni
+             collassati sui pixel unici con np.bincount su indice lineare,
+             compositing solo sui pixel toccati.
+             'reference': il kernel storico (loop Python + np.add.at),
+             tenuto per confronto. Le due modalità differiscono solo per
+             l'ordine delle somme in virgola mobile (bincount accumula in
+             float64): sul quadro v8 completo |Δconc| e |Δheight| ≤ 1e-6,
+             |ΔRGB| ≤ 1/255 su una manciata di pixel.
+
+    storage — 'float32' (default): conc (H,W,4), height e weave (H,W) float32.
+              'u16' / 'f16': memoria compatta (~40% del float32). Le
+              concentrazioni sommano a 1, quindi se ne salvano solo 3 in
+              layout planare (3,H,W) — uint16 a virgola fissa (passo
+              1/65535) o float16 — e il bianco si ricava come 1-Σ;
+              height e weave in float16. Pennellate e render convertono
+              a float32 solo la ROI che toccano (conc_roi/conc_put…).
+              In modalità compatta le proprietà conc/height/weave
+              restituiscono COPIE float32 dell'intera tela: si scrive
+              riassegnandole, non modificandole sul posto.
+
+    rng_mode — 'stream' (default): un solo np.random.default_rng(seed)
+               consumato in sequenza — ogni pennellata dipende da tutte le
+               precedenti (le immagini storiche dei seed).
+               'counter': tremolio, carico setole, esaurimento e striature
+               della pennellata k vengono da counter_rng(seed, k, scopo),
+               così come trama e mottling (indice 0): il rumore di ogni
+               pennellata è funzione pura del suo indice, e lo stesso seed
+               dà lo stesso quadro qualunque sia l'ordine di generazione
+               (thread, processi). L'indice è il contatore stroke_index
+               della tela, o esplicito con stroke_many(index=...).
+
+    scale — risoluzione di lavoro (proxy): W, H e tutte le coordinate
+            delle pennellate restano in px nominali (1920×1080 per v8/v9),
+            la griglia è round(W·scale)×round(H·scale). Posizioni,
+            lunghezze, larghezze, ondulazioni, scale del rumore, periodo
+            della trama, sigma di blur e pendenza del rilievo scalano
+            insieme: la miniatura è lo stesso quadro, non un crop.
+            A scale=1 (default) nulla cambia. self.W/self.H sono i px reali.
+
+    noise — 'bank' (default): tremolio, esaurimento, carico e striature di
+            ogni pennellata sono finestre della NoiseBank del seed
+            (noise_bank.py, precalcolata una volta e condivisa da tutte le
+            tele): per tratto si estraggono solo 5 offset (dallo stream o,
+            in 'counter', da un hash di seed e indice). Stessa std, stessa
+            levigatezza di snoise1/snoise2; le immagini cambiano.
+            'synth': il rumore sintetizzato per pennellata (storico).
+
+    quality — preset di quality.py ('standard' = storico): densità delle
+              setole (nS = 1.7·larghezza·bristles) e campioni per px di
+              lunghezza (steps), entrambe almeno 1 (ogni campione tocca un
+              pixel: sotto, buchi), con l'alpha dei campioni diviso per la
+              densità → stessa copertura, stesso impasto.
     """
 
-    def __init__(self, W: int, H: int, base_conc: np.ndarray, seed: int = 42):
+    KERNELS = ('fast', 'reference')
+    STORAGES = ('float32', 'u16', 'f16')
+    RNG_MODES = ('stream', 'counter')
+    NOISES = ('bank', 'synth')
+
+    def __init__(self, W: int, H: int, base_conc: np.ndarray, seed: int = 42,
+                 kernel: str = 'fast', storage: str = 'float32',
+                 rng_mode: str = 'stream', scale: float = 1.0,
+                 noise: str = 'bank', quality='standard'):
+        if kernel not in self.KERNELS:
+            raise ValueError(f"kernel sconosciuto: {kernel!r} "
+                             f"(attesi: {', '.join(self.KERNELS)})")
+        if storage not in self.STORAGES:
+            raise ValueError(f"storage sconosciuto: {storage!r} "
+                             f"(attesi: {', '.join(self.STORAGES)})")
+        if rng_mode not in self.RNG_MODES:
+            raise ValueError(f"rng_mode sconosciuto: {rng_mode!r} "
+                             f"(attesi: {', '.join(self.RNG_MODES)})")
+        if noise not in self.NOISES:
+            raise ValueError(f"noise sconosciuto: {noise!r} "
+                             f"(attesi: {', '.join(self.NOISES)})")
+        if not scale > 0:
+            raise ValueError(f"scale deve essere > 0, non {scale!r}")
+        self.scale = float(scale)
+        # ciò che serve a rifare la tela a un'altra scala (record/replay)
+        self._origin = dict(W=W, H=H, base_conc=[
+            float(v) for v in np.asarray(base_conc, np.float32)])
+        W, H = max(1, round(W * self.scale)), max(1, round(H * self.scale))
         self.W, self.H = W, H
+        self.kernel = kernel
+        self.storage = storage
+        self.seed = seed
+        self.rng_mode = rng_mode
+        self.noise = noise
+        self.quality = preset(quality)
+        self.stroke_index = 0
+        self.threads = 0                # deposito su thread (stroke_sched)
+        self.sched: Dict = {}           # report cumulato dello scheduler
+        self._adopted: set = set()      # id dei piani già dipinti qui
+        self.journal: Optional[StrokeJournal] = None    # vedi record()
         self.rng = np.random.default_rng(seed)
-
-        self.conc = np.empty((H, W, 4), np.float32)
-        self.conc[:] = base_conc
+        self._scratch: Dict[Tuple[str, int], np.ndarray] = {}
+        self.stats = dict(strokes=0, pixels=0, culled=0)  # per zorn_profile
 
         # ── trama tessuta — sottile ma pronta ad affiorare nel lighting (T5b)
-        yy, xx = np.mgrid[0:H, 0:W].astype(np.float32)
-        sp = 6.0
-        warp = np.sin(xx * (2 * np.pi / sp) + np.sin(yy * 0.55) * 0.6)
-        weft = np.sin(yy * (2 * np.pi / (sp * 1.12)) + np.sin(xx * 0.42) * 0.6)
-        weave = (warp * 0.5 + 0.5) * 0.55 + (weft * 0.5 + 0.5) * 0.45
-        weave += self.rng.standard_normal((H, W)).astype(np.float32) * 0.06
-        weave = blur(weave, 2)
-        weave -= weave.min()
-        weave /= max(weave.max(), 1e-6)
-        self.weave = weave
+        #    una tessera periodica, letta a modulo (weave_roi/weave_at)
+        self._weave = None
+        self._weave_tile = self._make_weave_tile()
         self.height = np.zeros((H, W), np.float32)
 
         # mottling anisotropico in spazio-concentrazione: larghe variazioni
         # orizzontali di luminosità (verso bianco / verso ocra scura)
-        mx = blur(self.rng.standard_normal((H, W)).astype(np.float32), 90)
-        my = _box(mx, 4, 0)
-        my /= max(np.abs(my).max(), 1e-6)
-        t = my * 0.035
-        pos = np.clip(t, 0, None)[..., None]
-        neg = np.clip(-t, 0, None)[..., None]
+        t = self._make_mottle() * np.float32(0.035)
+        pos, neg = np.maximum(t, 0), np.maximum(-t, 0)
+        base = np.asarray(base_conc, np.float32)
         dark = mixc(OCHRE, BLACK, 0.05)
-        self.conc = (self.conc * (1.0 - pos - neg)
-                     + WHITE[None, None, :] * pos
-                     + dark[None, None, :] * neg)
-        self.conc = np.clip(self.conc, 0, 1)
+        conc = np.empty((H, W, 4), np.float32)
+        for c in range(4):
+            ch = conc[..., c]
+            np.multiply(pos, WHITE[c] - base[c], out=ch)
+            ch += neg * (dark[c] - base[c])
+            ch += base[c]
+        self.conc = np.clip(conc, 0, 1, out=conc)
+
+    # ── texture procedurali: costo indipendente dalla tela ───────────────
+    # Trama: tessera di WEAVE_TILE px nominali, periodica per costruzione
+    # (numeri interi di cicli: ordito 15 → passo 6, trama 14 → 6.71,
+    # ondulazioni 8 e 6 cicli ≈ sin(0.55·y), sin(0.42·x) della v8 storica).
+    # Mottling: rumore su una griglia rada (un nodo ogni MOTTLE_CELL px
+    # nominali) sfocato alla stessa sigma e interpolato bilineare: a sigma
+    # 90 la griglia da 16 non perde nulla.
+    # Livelli: il fondo storico normalizzava min/max sull'intera tela, ma
+    # gli estremi stavano nei bordi (replica 'edge': il box non media un
+    # periodo intero della trama, la coda del blur σ=90 ripete un solo
+    # campione di rumore). Le costanti riproducono la statistica storica
+    # all'interno della tela (200 px dai bordi), mediane su 40 seed: trama
+    # media ≈ 0.432, std ≈ 0.027, |∂x| ≈ 0.0057, |∂y| ≈ 0.0119; mottling
+    # rms ≈ 0.019 (il campo storico normalizzato). MOTTLE_RMS è lo std
+    # della griglia, gonfiato dai bordi dell'IIR: 0.027 sulla griglia dà
+    # 0.019 all'interno. zorn_bench --check-texture li ricontrolla.
+    WEAVE_TILE = (94, 90)                # (alto, largo) px nominali
+    WEAVE_LO, WEAVE_SPAN = 0.3658, 0.311
+    MOTTLE_CELL = 16
+    MOTTLE_RMS = 0.027
+
+    def _make_weave_tile(self) -> np.ndarray:
+        Ty = max(1, round(self.WEAVE_TILE[0] * self.scale))
+        Tx = max(1, round(self.WEAVE_TILE[1] * self.scale))
+        py = (np.arange(Ty, dtype=np.float32) / np.float32(Ty))[:, None]
+        px = (np.arange(Tx, dtype=np.float32) / np.float32(Tx))[None, :]
+        tau = np.float32(2 * np.pi)
+        warp = np.sin(tau * 15 * px + np.sin(tau * 8 * py) * 0.6)
+        weft = np.sin(tau * 14 * py + np.sin(tau * 6 * px) * 0.6)
+        tile = (warp * 0.5 + 0.5) * 0.55 + (weft * 0.5 + 0.5) * 0.45
+        tile += self._rng(0, 'weave').standard_normal(
+            (Ty, Tx)).astype(np.float32) * 0.06
+        # blur periodico: contesto avvolto, poi si ritaglia la tessera
+        p = support(2 * self.scale)
+        ext = np.pad(tile, ((p, p), (p, p)), mode='wrap')
+        tile = blur(ext, 2 * self.scale, out=ext)[p:p + Ty, p:p + Tx]
+        tile = (tile - np.float32(self.WEAVE_LO)) / np.float32(self.WEAVE_SPAN)
+        return np.ascontiguousarray(tile)
+
+    def _make_mottle(self) -> np.ndarray:
+        """Campo liscio (H,W) a media 0, rms MOTTLE_RMS, correlazione ~90 px."""
+        cell = self.MOTTLE_CELL * self.scale        # px reali fra due nodi
+        hc = int(math.ceil((self.H - 1) / cell)) + 2
+        wc = int(math.ceil((self.W - 1) / cell)) + 2
+        g = self._rng(0, 'mottle').standard_normal((hc, wc)).astype(np.float32)
+        # sigma effettivo del blur storico (3 box r=90, + box verticale r=4)
+        sx = math.sqrt(90 * 91) / self.MOTTLE_CELL
+        sy = math.sqrt(90 * 91 + 4 * 5 / 3) / self.MOTTLE_CELL
+        zorn_blur.iir1d(g, sy, 0, out=g)
+        zorn_blur.iir1d(g, sx, 1, out=g)
+        g *= np.float32(self.MOTTLE_RMS / max(float(g.std()), 1e-6))
+
+        def lerp_idx(n):
+            u = np.arange(n, dtype=np.float32) / np.float32(cell)
+            i = u.astype(np.int32)
+            return i, (u - i)
+        iy, fy = lerp_idx(self.H)
+        ix, fx = lerp_idx(self.W)
+        a = g[:, ix] * (1 - fx) + g[:, ix + 1] * fx            # (hc, W)
+        out = a[iy] * (1 - fy)[:, None]
+        out += a[iy + 1] * fy[:, None]
+        return out
+
+    def _rng(self, index: int, purpose: str) -> np.random.Generator:
+        """Sorgente di rumore per (pennellata, scopo) secondo rng_mode."""
+        if self.rng_mode == 'counter':
+            return counter_rng(self.seed, index, purpose)
+        return self.rng
+
+    @classmethod
+    def from_state(cls, conc: np.ndarray, height: np.ndarray,
+                   weave: np.ndarray, rng_state: Dict,
+                   kernel: str = 'fast', storage: str = 'float32',
+                   rng_mode: str = 'stream', seed: int = 42,
+                   stroke_index: int = 0, scale: float = 1.0,
+                   noise: str = 'bank', quality='standard') -> 'OilCanvas':
+        """Tela ricostruita da buffer esistenti (es. ground in cache).
+
+        In float32 nessuna copia: conc/height/weave sono usati così come
+        sono (anche memory-mapped); rng riparte esattamente da rng_state
+        (e, in rng_mode='counter', dall'indice stroke_index).
+        """
+        cv = cls.__new__(cls)
+        cv.H, cv.W = height.shape
+        cv.kernel = kernel
+        cv.storage = storage
+        cv.seed, cv.rng_mode, cv.stroke_index = seed, rng_mode, stroke_index
+        cv.threads, cv.sched, cv._adopted = 0, {}, set()
+        cv.journal, cv._origin = None, None
+        cv.scale, cv.noise = float(scale), noise
+        cv.quality = preset(quality)
+        cv.rng = np.random.Generator(np.random.PCG64())
+        cv.rng.bit_generator.state = rng_state
+        cv._scratch = {}
+        cv.stats = dict(strokes=0, pixels=0, culled=0)
+        cv.conc, cv.height, cv.weave = conc, height, weave
+        return cv
+
+    # ── piramide: strati a risoluzione ridotta (imprimitura) ─────────────
+    def layer(self, level: int) -> 'OilCanvas':
+        """Strato a 1/2^level della risoluzione con lo stato attuale.
+
+        Condivide rng, seed, indice delle pennellate e modalità di rumore:
+        le pennellate date allo strato consumano le stesse estrazioni che
+        consumerebbero qui. conc e height sono ricampionati (bilineare),
+        la trama è la stessa tessera a passo ridotto. absorb() riporta lo
+        strato nella tela.
+        """
+        if level < 1:
+            raise ValueError(f"level deve essere ≥ 1, non {level}")
+        if self.journal is not None:
+            self.journal.op(stroke_journal.LAYER, level)
+        f = 1 << level
+        h, w = max(1, round(self.H / f)), max(1, round(self.W / f))
+        t = self.weave_tile
+        if t is not None:                   # un periodo intero per asse
+            ty = max(1, round(self.WEAVE_TILE[0] * self.scale / f))
+            tx = max(1, round(self.WEAVE_TILE[1] * self.scale / f))
+            tile = resample(t, ty, tx, (t.shape[0] / ty, t.shape[1] / tx),
+                            wrap=True)
+        else:
+            tile = resample(self.weave, h, w, f)
+        sub = OilCanvas.from_state(
+            resample(self.conc, h, w, f), resample(self.height, h, w, f),
+            tile, self.rng.bit_generator.state, kernel=self.kernel,
+            rng_mode=self.rng_mode, seed=self.seed,
+            stroke_index=self.stroke_index, scale=self.scale / f,
+            noise=self.noise, quality=self.quality)
+        sub.rng = self.rng
+        sub.threads = self.threads
+        sub.journal = self.journal
+        return sub
+
+    def absorb(self, sub: 'OilCanvas'):
+        """Riporta uno strato di layer() nella tela (conc e height)."""
+        if self.journal is not None:
+            self.journal.op(stroke_journal.ABSORB)
+        step = sub.scale / self.scale
+        self.conc = np.clip(resample(sub.conc, self.H, self.W, step), 0, 1)
+        self.height = resample(sub.height, self.H, self.W, step)
+        self.stroke_index = max(self.stroke_index, sub.stroke_index)
+        for k, v in sub.stats.items():
+            self.stats[k] += v
+        if sub.sched:
+            stroke_sched.merge(self.sched, sub.sched)
+
+    # ── velatura e diario delle pennellate (stroke_journal) ──────────────
+    def glaze(self, sigma: float):
+        """Velatura: conc sfocata di sigma px nominali (e nel diario)."""
+        if self.journal is not None:
+            self.journal.op(stroke_journal.GLAZE, sigma)
+        conc = blur(self.conc, sigma * self.scale, exact=True)
+        self.conc = np.clip(conc, 0, 1, out=conc)
+
+    def record(self, path: str) -> StrokeJournal:
+        """Apre il diario delle pennellate in path: da qui ogni plan(),
+        glaze(), layer() e absorb() vi lascia un record. Solo su una tela
+        appena costruita (il diario parte dalla tela nuda)."""
+        if self._origin is None or self.stroke_index:
+            raise ValueError("il diario parte da una tela nuova, non da "
+                             "from_state o già dipinta")
+        self.journal = StrokeJournal(path, dict(
+            self._origin, seed=self.seed, kernel=self.kernel,
+            storage=self.storage, rng_mode=self.rng_mode, noise=self.noise,
+            quality=self.quality.name, scale=self.scale))
+        return self.journal
+
+    @classmethod
+    def replay(cls, path: str, scale: Optional[float] = None,
+               upto: Optional[int] = None, **overrides) -> 'OilCanvas':
+        """La tela di un diario rifatta da zero, letto a blocchi.
+
+        scale — risoluzione della tela nuova (default: quella registrata);
+                le pennellate sono in px nominali e scalano con lei.
+        upto  — solo le prime upto pennellate (replay parziale); gli
+                strati rimasti aperti tornano comunque nella tela.
+        overrides — kernel, storage, quality… diversi da quelli registrati.
+        """
+        hdr = stroke_journal.header(path)
+        kw = {k: hdr[k] for k in ('seed', 'kernel', 'storage', 'rng_mode',
+                                  'noise', 'quality', 'scale')}
+        kw.update(overrides)
+        if scale is not None:
+            kw['scale'] = scale
+        cv = cls(hdr['W'], hdr['H'], np.array(hdr['base_conc'], np.float32),
+                 **kw)
+        stack = [cv]
+        for block in stroke_journal.records(path, upto=upto):
+            for run in stroke_journal.runs(block):
+                kind, top = int(run['kind'][0]), stack[-1]
+                if kind == stroke_journal.STROKE:
+                    top.stroke_many(conc=run['conc'], index=run['index'],
+                                    **{k: run[k]
+                                       for k in stroke_journal.PARAMS})
+                elif kind == stroke_journal.GLAZE:
+                    top.glaze(float(run['arg'][0]))
+                elif kind == stroke_journal.LAYER:
+                    stack.append(top.layer(int(run['arg'][0])))
+                else:
+                    stack.pop()
+                    stack[-1].absorb(top)
+        while len(stack) > 1:
+            top = stack.pop()
+            stack[-1].absorb(top)
+        return cv
+
+    # ── storage: float32 pieno o compatto (planare, 3 canali + 1-Σ) ──────
+    @property
+    def compact(self) -> bool:
+        return self.storage != 'float32'
+
+    def _pack_conc(self, c: np.ndarray) -> np.ndarray:
+        """(...,4) float → (3,...) planare nel dtype dello storage."""
+        p = np.moveaxis(np.asarray(c)[..., :3], -1, 0)
+        if self.storage == 'u16':
+            return np.round(np.clip(p, 0, 1) * 65535.0).astype(np.uint16)
+        return p.astype(np.float16)
+
+    def _unpack_conc(self, p: np.ndarray) -> np.ndarray:
+        """(3,...) planare → (...,4) float32, bianco = 1 - Σ dei primi 3."""
+        c = np.empty(p.shape[1:] + (4,), np.float32)
+        c[..., :3] = np.moveaxis(p, 0, -1)
+        if self.storage == 'u16':
+            c[..., :3] *= np.float32(1.0 / 65535.0)
+        c[..., 3] = np.clip(1.0 - c[..., :3].sum(-1), 0, 1)
+        return c
+
+    @property
+    def conc(self) -> np.ndarray:
+        if self.compact:
+            return self._unpack_conc(self._conc)
+        return self._conc
+
+    @conc.setter
+    def conc(self, v: np.ndarray):
+        self._conc = self._pack_conc(v) if self.compact else v
+
+    @property
+    def height(self) -> np.ndarray:
+        if self.compact:
+            return self._height.astype(np.float32)
+        return self._height
+
+    @height.setter
+    def height(self, v: np.ndarray):
+        self._height = np.asarray(v, np.float16) if self.compact else v
+
+    @property
+    def weave(self) -> np.ndarray:
+        """Trama (H,W) float32 — materializzata dalla tessera se periodica."""
+        if self._weave_tile is not None:
+            return self.weave_roi(0, self.H)
+        if self.compact:
+            return self._weave.astype(np.float32)
+        return self._weave
+
+    @weave.setter
+    def weave(self, v: np.ndarray):
+        """(H,W) = trama piena; qualunque altra shape = tessera periodica."""
+        v = np.asarray(v)
+        if v.shape == (self.H, self.W):
+            self._weave_tile = None
+            self._weave = np.asarray(v, np.float16) if self.compact else v
+        else:
+            self._weave_tile = np.ascontiguousarray(v, np.float32)
+            self._weave = None
+
+    @property
+    def weave_tile(self) -> Optional[np.ndarray]:
+        return self._weave_tile
+
+    def conc_at(self, iy, ix) -> np.ndarray:
+        """Concentrazioni float32 ai pixel (iy, ix) (gather)."""
+        if self.compact:
+            return self._unpack_conc(self._conc[:, iy, ix])
+        return self._conc[iy, ix]
+
+    def conc_roi(self, y0: int, y1: int, x0: int = 0,
+                 x1: Optional[int] = None) -> np.ndarray:
+        """ROI (h,w,4) float32: vista in float32, copia se compatto."""
+        if self.compact:
+            return self._unpack_conc(self._conc[:, y0:y1, x0:x1])
+        return self._conc[y0:y1, x0:x1]
+
+    def conc_put(self, y0: int, y1: int, x0: int, x1: int, roi: np.ndarray):
+        """Riscrive una ROI ottenuta da conc_roi (no-op se era una vista)."""
+        if self.compact:
+            self._conc[:, y0:y1, x0:x1] = self._pack_conc(roi)
+
+    def height_roi(self, y0: int, y1: int, x0: int = 0,
+                   x1: Optional[int] = None) -> np.ndarray:
+        if self.compact:
+            return self._height[y0:y1, x0:x1].astype(np.float32)
+        return self._height[y0:y1, x0:x1]
+
+    def height_put(self, y0: int, y1: int, x0: int, x1: int, roi: np.ndarray):
+        if self.compact:
+            self._height[y0:y1, x0:x1] = roi
+
+    def weave_at(self, iy, ix) -> np.ndarray:
+        t = self._weave_tile
+        if t is not None:
+            return t[np.asarray(iy) % t.shape[0], np.asarray(ix) % t.shape[1]]
+        return self._weave[iy, ix].astype(np.float32, copy=False)
+
+    def weave_roi(self, y0: int, y1: int) -> np.ndarray:
+        t = self._weave_tile
+        if t is not None:
+            rows = t.take(np.arange(y0, y1), 0, mode='wrap')
+            return rows.take(np.arange(self.W), 1, mode='wrap')
+        return self._weave[y0:y1].astype(np.float32, copy=False)
+
+    def nbytes(self) -> int:
+        """Memoria dei buffer persistenti della tela."""
+        w = self._weave_tile if self._weave_tile is not None else self._weave
+        return self._conc.nbytes + self._height.nbytes + w.nbytes
 
     # ── pennellata ────────────────────────────────────────────────────────
+    # Parametri di una pennellata, nell'ordine di stroke(); stroke_many()
+    # accetta ciascuno come scalare o come array (N,).
+    STROKE_PARAMS = ('x', 'y', 'angle', 'length', 'width', 'conc',
+                     'opacity', 'thickness', 'curvature', 'waviness',
+                     'wave_freq', 'dryness', 'smear', 'taper_end')
+    STROKE_DEFAULTS = dict(opacity=0.92, thickness=1.0, curvature=0.0,
+                           waviness=0.0, wave_freq=4.0, dryness=0.35,
+                           smear=0.40, taper_end=0.55)
+
     def stroke(self, x: float, y: float, angle: float,
                length: float, width: float, conc,
                opacity: float = 0.92, thickness: float = 1.0,
@@ -247,53 +776,353 @@ class OilCanvas:
         conc — vettore (4,) di concentrazioni pigmenti [ocra,verm,nero,bianco].
         Gli altri parametri come v7.
         """
-        rng = self.rng
-        col = np.asarray(conc, np.float32)
-
-        # ── traiettoria (1 px per step) ─────────────────────────────────
-        n = max(8, int(length))
-        ts = np.linspace(0.0, 1.0, n).astype(np.float32)
-        ang = (angle + curvature * ts
-               + snoise1(rng, n, 30) * 0.045)          # tremolio della mano
+        self.stroke_many(x, y, angle, length, width, np.asarray(conc)[None],
+                         opacity=opacity, thickness=thickness,
+                         curvature=curvature, waviness=waviness,
+                         wave_freq=wave_freq, dryness=dryness,
+                         smear=smear, taper_end=taper_end)
+
+    def stroke_many(self, x, y, angle, length, width, conc,
+                    index=None, **kw):
+        """
+        N pennellate in ordine, con la stessa semantica di N chiamate a
+        stroke() (stesso rng, stessa sequenza di estrazioni → stesso quadro).
+
+        Parametri in forma structure-of-arrays: ogni argomento di stroke()
+        può essere un array (N,) o uno scalare condiviso; conc è (N,4) o
+        (4,). È paint(plan(...)): traiettorie e profili di larghezza sono
+        generati in un solo passo vettoriale su array (N, n_max), poi ogni
+        pennellata viene depositata sulla tela nell'ordine dato.
+
+        index — (N,) indici delle pennellate per rng_mode='counter'
+                (default: i successivi a stroke_index). Ignorato in 'stream'.
+        """
+        self.paint(self.plan(x, y, angle, length, width, conc,
+                             index=index, **kw))
+
+    def _buf(self, key: str, shape: Tuple[int, ...]) -> np.ndarray:
+        """Buffer di lavoro riusato fra pennellate (cresce, non si libera);
+        uno per thread, per il deposito in parallelo."""
+        size = int(np.prod(shape))
+        key = (key, threading.get_ident())
+        b = self._scratch.get(key)
+        if b is None or b.size < size:
+            b = self._scratch[key] = np.empty(max(size, 1 << 16), np.float32)
+        return b[:size].reshape(shape)
+
+    def plan_signature(self) -> Dict:
+        """Ciò da cui dipende la geometria di un piano, oltre a parametri,
+        indici e stato rng (StrokePlan.check)."""
+        return dict(W=self.W, H=self.H, scale=float(self.scale),
+                    seed=self.seed, noise=self.noise,
+                    rng_mode=self.rng_mode, quality=self.quality.name)
+
+    def plan(self, x, y, angle, length, width, conc,
+             index=None, **kw) -> StrokePlan:
+        """Geometria di N pennellate (solo rng, nessuna lettura della tela).
+
+        Argomenti come stroke_many(). Le pennellate che non possono
+        toccare la tela sono scartate prima del rumore e delle traiettorie
+        (portata dai parametri) e dopo (nastro esatto): vedi stroke_plan.
+        Le estrazioni dallo stream restano quelle di N stroke() in serie.
+        """
+        unknown = set(kw) - set(self.STROKE_DEFAULTS)
+        if unknown:
+            raise TypeError(f"parametri sconosciuti: {sorted(unknown)}")
+        prm = dict(self.STROKE_DEFAULTS, **kw)
+        prm.update(x=x, y=y, angle=angle, length=length, width=width)
+        nominal = dict(prm)                 # per il diario
+        sc = self.scale
+        for k in ('x', 'y', 'length', 'width', 'waviness'):   # nominali → px
+            prm[k] = np.asarray(prm[k], np.float64) * sc
+        cols = np.atleast_2d(np.asarray(conc, np.float32))
+        N = max([cols.shape[0]] + [np.size(v) for v in prm.values()])
+        # float64 come i float Python della chiamata singola (per n, nS e
+        # per le soglie scalari); le colonne f32 replicano la promozione
+        # "scalare Python × array float32" di stroke() (NEP 50).
+        p64 = {k: np.broadcast_to(np.asarray(v, np.float64), (N,))
+               for k, v in prm.items()}
+        cols = np.broadcast_to(cols, (N, 4))
+
+        if index is None:
+            index = np.arange(self.stroke_index, self.stroke_index + N)
+        index = np.broadcast_to(np.asarray(index, np.int64), (N,))
+        if self.journal is not None:
+            self.journal.stroke_many(nominal, cols, index)
+        index_end = max(self.stroke_index, int(index.max()) + 1)
+        self.stroke_index = index_end
+        stream = self.rng_mode == 'stream'
+        rng_before = self.rng.bit_generator.state if stream else None
+        # densità (quality): sps campioni per px lungo il tratto,
+        # 1.7·bps setole per px attraverso
+        q = self.quality
+        sps, bps = q.km_steps, q.km_bristles
+        n = np.maximum(8, (p64['length'] * sps).astype(int))
+        nS = np.maximum(7, (p64['width'] * 1.7 * bps).astype(int))
+
+        # ── culling sulla portata: prima di rumore e traiettorie ────────
+        keep = on_canvas(reach_box(p64['x'], p64['y'], p64['width'],
+                                   p64['waviness'], n, sps), self.W, self.H)
+
+        # ── rumore: estrazioni nello stesso ordine di N stroke() in serie
+        #    ('stream') o per (indice, scopo) ('counter'); solo le
+        #    pennellate tenute, ma lo stream avanza per tutte ───────────
+        noise, knots = {}, None
+        kn, knS, kidx = n[keep], nS[keep], index[keep]
+        if self.noise == 'bank':
+            # 5 offset per pennellata nella banca del seed, letti tutti
+            # insieme (random((N,5)) = N estrazioni random(5) in serie)
+            nb = noise_bank.bank(self.seed)
+            if stream:
+                u = self.rng.random((N, noise_bank.N_OFFSETS))[keep]
+            else:
+                u = noise_bank.hash_uniform(self.seed, kidx)
+            if len(kn):
+                tremor = nb.smooth1d(u[:, 0], kn, 30 * sc * sps)
+                depn = nb.smooth1d(u[:, 1], kn, 18 * sc * sps)
+            loads = nb.uniform(u[:, 2], knS)
+            noise.update(soff=u[:, 3:5])
+        else:
+            nmax = int(kn.max()) if len(kn) else 0
+            tremor = np.zeros((len(kn), nmax), np.float32)
+            depn = np.zeros((len(kn), nmax), np.float32)
+            loads, knots, r = [], [], 0
+            for i in range(N):
+                if not (keep[i] or stream):       # in 'counter' nulla da estrarre
+                    continue
+                k, ni, nsi = int(index[i]), int(n[i]), int(nS[i])
+                trm = snoise1(self._rng(k, 'tremor'), ni, 30 * sc * sps)
+                ld = self._rng(k, 'load').random(nsi).astype(np.float32)
+                dpn = snoise1(self._rng(k, 'depletion'), ni, 18 * sc * sps)
+                kts = snoise2_knots(self._rng(k, 'streak'), ni, nsi,
+                                    16 * sc * sps, 1.6 * sc * bps)
+                if keep[i]:
+                    tremor[r, :ni], depn[r, :ni] = trm, dpn
+                    loads.append(ld)
+                    knots.append(kts)
+                    r += 1
+            noise.update(kshape=np.array([g.shape for g in knots],
+                                         np.int64).reshape(-1, 2))
+        rng_after = self.rng.bit_generator.state if stream else None
+
+        def plan_of(rows: Dict[str, np.ndarray], box: np.ndarray,
+                    sel: np.ndarray) -> StrokePlan:
+            a = {k: v[sel] for k, v in rows.items()}
+            a['bbox'] = StrokePlan.roi_box(box[sel], math.ceil(6 * sc),
+                                           self.W, self.H)
+            a['loads'] = StrokePlan.pack(
+                [ld for ld, v in zip(loads, sel) if v])
+            if knots is not None:
+                a['knots'] = StrokePlan.pack(
+                    [g for g, v in zip(knots, sel) if v])
+            meta = dict(canvas=self.plan_signature(), requested=N,
+                        index_end=index_end, rng_before=rng_before,
+                        rng_after=rng_after, sps=sps, bps=bps,
+                        dens=sps * bps)
+            P = StrokePlan(a, meta)
+            P.owner = id(self)
+            return P
+
+        rows = dict(index=kidx, n=kn, nS=knS,
+                    conc=np.ascontiguousarray(cols[keep]), **noise)
+        rows.update({k: p64[k][keep] for k in StrokePlan.PARAMS})
+        if not len(kn):
+            rows.update({k: np.zeros((0, 0), np.float32)
+                         for k in StrokePlan.ROWS})
+            return plan_of(rows, np.zeros((0, 4)), np.zeros(0, bool))
+        p64 = {k: v[keep] for k, v in p64.items()}
+        c32 = {k: v.astype(np.float32)[:, None] for k, v in p64.items()}
+        nmax = int(kn.max())
+
+        # ── traiettorie (1 px per step), tutte insieme ──────────────────
+        j = np.arange(nmax, dtype=np.float64)
+        ts = j[None, :] * (1.0 / (kn - 1))[:, None]       # = np.linspace
+        ts[np.arange(len(kn)), kn - 1] = 1.0
+        ts = ts.astype(np.float32)
+        ang = (c32['angle'] + c32['curvature'] * ts
+               + tremor * 0.045)                          # tremolio della mano
         dx, dy = np.cos(ang), np.sin(ang)
-        px = x + np.cumsum(dx) - dx[0]
-        py = y + np.cumsum(dy) - dy[0]
-        if waviness > 0:
-            osc = np.sin(ts * 2 * np.pi * wave_freq) * waviness
-            px += -dy * osc
-            py += dx * osc
-        nx, ny = -dy, dx                                # normali al tratto
+        ex, ey = (dx, dy) if sps == 1.0 else (dx / sps, dy / sps)  # passo
+        px = c32['x'] + np.cumsum(ex, axis=1) - ex[:, :1]
+        py = c32['y'] + np.cumsum(ey, axis=1) - ey[:, :1]
+        wav = p64['waviness'] > 0
+        if np.any(wav):
+            osc = (np.sin(ts[wav] * 2 * np.pi * c32['wave_freq'][wav])
+                   * c32['waviness'][wav])
+            px[wav] += -dy[wav] * osc
+            py[wav] += dx[wav] * osc
 
         # ── profilo larghezza lungo t (attacco + rilascio) ──────────────
         attack = np.minimum(1.0, ts / 0.06) ** 0.6
-        release = 1.0 - taper_end * np.clip((ts - 0.72) / 0.28, 0, 1) ** 1.6
-        wt = width * attack * release                   # (n,)
+        release = 1.0 - c32['taper_end'] * np.clip((ts - 0.72) / 0.28, 0, 1) ** 1.6
+        wt = c32['width'] * attack * release              # (N, n_max)
+
+        # ── esaurimento pigmento lungo t ────────────────────────────────
+        dep = (1.0 - 0.62 * ts ** 1.25) * (0.85 + 0.30 * depn)
+        dep = np.clip(dep, 0.05, 1.4)
+
+        # ── culling sul nastro esatto ───────────────────────────────────
+        rows.update(ts=ts, px=px, py=py, nx=-dy, ny=dx, wt=wt, dep=dep)
+        box = ribbon_box(px, py, wt, kn)
+        return plan_of(rows, box, on_canvas(box, self.W, self.H))
+
+    def paint(self, plan: StrokePlan, threads: Optional[int] = None):
+        """Deposita le pennellate di un piano, nell'ordine.
+
+        Un piano fatto da un'altra tela (o caricato da disco) deve avere
+        la stessa firma e, in 'stream', partire dallo stato rng attuale:
+        lo rng avanza allora a fine piano, come se fosse stato fatto qui.
+
+        threads ≥ 1 (default self.threads) → le pennellate i cui bbox non
+        si toccano si depositano insieme su un pool di thread, nell'ordine
+        del piano dove si toccano (stroke_sched): stesso quadro; il report
+        si accumula in self.sched.
+        """
+        self._adopt(plan)
+        threads = self.threads if threads is None else threads
+        if threads >= 1:
+            px = np.zeros(len(plan), np.int64)
+
+            def one(i: int):
+                px[i] = self._deposit(plan, i)
+            rep = stroke_sched.run(one, conflict_dag(plan.bbox),
+                                   threads)
+            stroke_sched.merge(self.sched, rep)
+            pixels = int(px.sum())
+        else:
+            pixels = sum(self._deposit(plan, i) for i in range(len(plan)))
+        self.stats['strokes'] += len(plan)
+        self.stats['pixels'] += pixels
+        self.stats['culled'] += plan.culled
+
+    def _adopt(self, plan: StrokePlan):
+        """Verifica un piano fatto altrove e porta rng e indice a fine piano;
+        ValueError se il piano è già stato dipinto su questa tela."""
+        if plan.meta['id'] in self._adopted:
+            raise ValueError("piano già dipinto su questa tela "
+                             "(ripianificare per ridipingere)")
+        if getattr(plan, 'owner', None) != id(self):
+            stream = self.rng_mode == 'stream'
+            plan.check(self.plan_signature(),
+                       self.rng.bit_generator.state if stream else None)
+            if stream:
+                self.rng.bit_generator.state = plan.meta['rng_after']
+            self.stroke_index = max(self.stroke_index,
+                                    plan.meta['index_end'])
+        self._adopted.add(plan.meta['id'])
+
+    # paint_bands: bande di BAND_ROWS righe nominali, ognuna dipinta con
+    # BAND_HALO righe di contesto per lato (stroke_fronts.bands)
+    BAND_ROWS = 128
+    BAND_HALO = 32
+
+    def paint_bands(self, plan: StrokePlan, workers: int = 0,
+                    band_rows: Optional[int] = None,
+                    halo: Optional[int] = None) -> Dict:
+        """Come paint(plan), a bande orizzontali di righe (stroke_fronts).
+
+        Ogni banda dipinge, nell'ordine del piano, le pennellate il cui
+        bbox tocca la banda allargata di halo righe, su una sua copia
+        float32 di quelle righe presa dallo stato prima del piano; poi
+        tiene solo le righe proprie. Il rumore sta tutto nel piano (in
+        rng_mode='counter' quello della pennellata i è counter_rng(seed,
+        i), qualunque banda la dipinga): il quadro dipende da seed, piano,
+        band_rows e halo — non da workers né dall'ordine dei processi —
+        ma non è quello di paint(): una pennellata a cavallo di due bande
+        vede in ognuna solo le precedenti che toccano quella banda.
+
+        workers ≥ 2 → le bande su un pool di processi che leggono lo stato
+        e scrivono le righe proprie in memoria condivisa; altrimenti in
+        questo processo, una dopo l'altra (stesso quadro).
+        → report: strokes, bands, painted (pennellate dipinte sommando le
+        bande), busy_s (CPU per banda), wall_s. I motori non lo usano:
+        la scalatura su più core è ancora da misurare (zorn_bench
+        ground/*), su un core solo la duplicazione la fa perdere.
+        """
+        w0 = time.perf_counter()
+        self._adopt(plan)
+        rows = band_rows or max(1, round(self.BAND_ROWS * self.scale))
+        halo = round(self.BAND_HALO * self.scale) if halo is None else halo
+        bands = stroke_fronts.bands(self.H, rows, halo)
+        tile = self.weave_tile
+        src = dict(conc=self.conc_roi(0, self.H),
+                   height=self.height_roi(0, self.H))
+        if tile is None:
+            src['weave'] = self.weave
+        ctx = dict(plan=plan, tile=tile,
+                   canvas=dict(kernel=self.kernel, rng_mode=self.rng_mode,
+                               seed=self.seed, scale=self.scale,
+                               noise=self.noise, quality=self.quality))
+        out = dict(conc=np.empty_like(src['conc']),
+                   height=np.empty_like(src['height']))
+        if workers >= 2:
+            with SharedArrays.create(src) as si, \
+                    SharedArrays.create(out) as so:
+                ctx.update(src=si.spec(), out=so.spec())
+                with ProcessPoolExecutor(workers, initializer=_band_init,
+                                         initargs=(ctx,)) as pool:
+                    res = list(pool.map(_band_paint, bands))
+                out = {k: a.copy() for k, a in so.arrays.items()}
+        else:
+            res = [_paint_band(ctx, src, out, b) for b in bands]
+        self.conc, self.height = out['conc'], out['height']
+        busy = [dt for _, _, dt in res]
+        self.stats['strokes'] += len(plan)
+        self.stats['pixels'] += sum(px for _, px, _ in res)
+        self.stats['culled'] += plan.culled
+        return dict(strokes=len(plan), bands=len(bands),
+                    painted=sum(k for k, _, _ in res), busy_s=busy,
+                    wall_s=time.perf_counter() - w0)
+
+    def _deposit(self, plan: StrokePlan, i: int, dy: int = 0) -> int:
+        """Pennellata i-esima del piano: pickup, dry-brush, aratura, KM.
+        Legge e scrive solo dentro plan.bbox[i] (spostato di -dy righe:
+        una tela che è la banda da dy in giù, paint_bands). → pixel
+        composti."""
+        P = plan.a
+        n, nS = int(P['n'][i]), int(P['nS'][i])
+        ts, px, py = P['ts'][i, :n], P['px'][i, :n], P['py'][i, :n]
+        if dy:
+            py = py - np.float32(dy)
+        nx, ny, wt = P['nx'][i, :n], P['ny'][i, :n], P['wt'][i, :n]
+        dep = P['dep'][i, :n]
+        col = P['conc'][i]
+        opacity, thickness, dryness, smear = (
+            float(P[k][i]) for k in StrokePlan.PARAMS)
+        sps, bps = plan.meta['sps'], plan.meta['bps']
 
         # ── profilo setole attraverso s ─────────────────────────────────
-        nS = max(7, int(width * 1.7))
         s = np.linspace(-1.0, 1.0, nS).astype(np.float32)
-        load = rng.random(nS).astype(np.float32)
         k = np.array([0.25, 0.5, 0.25], np.float32)
-        load = np.convolve(np.pad(load, 1, mode='edge'), k, 'valid')
+        load = np.convolve(np.pad(plan.bristle_loads(i), 1, mode='edge'), k,
+                           'valid')
         bristle = 0.45 + 0.55 * load                    # carico per-setola
         edge = np.clip((1.0 - np.abs(s)) * 3.0, 0, 1) ** 0.65
 
-        # ── esaurimento pigmento + striature ────────────────────────────
-        dep = (1.0 - 0.62 * ts ** 1.25) * (0.85 + 0.30 * snoise1(rng, n, 18))
-        dep = np.clip(dep, 0.05, 1.4)
-        streak = 1.0 + 0.30 * snoise2(rng, n, nS, 16, 1.6)
+        # ── striature ───────────────────────────────────────────────────
+        sc = self.scale
+        if 'soff' in P:
+            ut, us = P['soff'][i]
+            field = noise_bank.bank(self.seed).streak(ut, us, n, nS,
+                                                      (sc * sps, sc * bps))
+        else:
+            field = snoise2_expand(plan.streak_knots(i), n, nS, 1.5 * sc)
+        streak = 1.0 + 0.30 * field
         D = dep[:, None] * bristle[None, :] * np.clip(streak, 0.2, 2.0)
         A = np.clip(D, 0, 1.25) * edge[None, :]         # (n, nS) alpha grezza
 
         # ── smearing: pickup delle CONCENTRAZIONI sottostanti (EMA) ─────
         cx = np.clip(px.astype(int), 0, self.W - 1)
         cy = np.clip(py.astype(int), 0, self.H - 1)
-        under = self.conc[cy, cx]                       # (n,4)
-        carried = np.empty_like(under)
-        carried[0] = under[0]
-        kp = 0.03
-        for i in range(1, n):
-            carried[i] = carried[i - 1] * (1 - kp) + under[i] * kp
+        under = self.conc_at(cy, cx)                    # (n,4)
+        kp = Quality.per_step(0.03, sps)
+        if self.kernel == 'reference':
+            carried = np.empty_like(under)
+            carried[0] = under[0]
+            for j in range(1, n):
+                carried[j] = carried[j - 1] * (1 - kp) + under[j] * kp
+        else:
+            carried = ema_pickup(under, kp)
         m = (smear * (0.25 + 0.6 * ts))[:, None]
         pc = col[None, :] * (1 - m) + carried * m       # (n,4) conc depositata
 
@@ -304,39 +1133,57 @@ class OilCanvas:
         xi = np.round(X).astype(int).ravel()
         yi = np.round(Y).astype(int).ravel()
         a = A.ravel()
-        pcol = np.repeat(pc, nS, axis=0)
         d = D.ravel()
-        tsf = np.repeat(ts, nS)                         # ts per campione
 
         ok = (xi >= 0) & (xi < self.W) & (yi >= 0) & (yi < self.H) & (a > 0.01)
         if not np.any(ok):
-            return
-        xi, yi, a, d, tsf = xi[ok], yi[ok], a[ok], d[ok], tsf[ok]
-        pcol = pcol[ok]
+            return 0
+        # indice del passo t di ogni campione (sostituisce np.repeat di
+        # pc e ts: si indicizza solo ciò che sopravvive al filtro)
+        si = np.flatnonzero(ok) // nS
+        xi, yi, a, d = xi[ok], yi[ok], a[ok], d[ok]
+        tsf = ts[si]
 
         # ── dry-brush: la coda scarica aggrappa solo la trama ───────────
         need = np.clip((dryness * 1.15 - d) / max(dryness, 1e-3), 0, 1)
-        gate = np.clip((self.weave[yi, xi] + (1.0 - need) - 0.82) / 0.22, 0, 1)
+        gate = np.clip((self.weave_at(yi, xi) + (1.0 - need) - 0.82) / 0.22,
+                       0, 1)
         a = a * (0.12 + 0.88 * gate) * opacity
+        if plan.meta['dens'] != 1.0:                    # copertura per px
+            a /= np.float32(plan.meta['dens'])
 
         # ── bbox locale (con bordo per le creste dell'aratura) ──────────
-        pad = 6
+        pad = math.ceil(6 * sc)
         x0 = max(0, xi.min() - pad); x1 = min(self.W, xi.max() + 1 + pad)
         y0 = max(0, yi.min() - pad); y1 = min(self.H, yi.max() + 1 + pad)
         lw, lh = x1 - x0, y1 - y0
         lx, ly = xi - x0, yi - y0
 
-        wsum = np.zeros((lh, lw), np.float32)
-        csum = np.zeros((lh, lw, 4), np.float32)
-        hsum = np.zeros((lh, lw), np.float32)
-        np.add.at(wsum, (ly, lx), a)
-        np.add.at(csum, (ly, lx), pcol * a[:, None])
         # rilascio finale: monticello dove ts→1, scalato con (1-dryness)
         rel = np.clip((tsf - 0.80) / 0.20, 0, 1) ** 1.6
-        np.add.at(hsum, (ly, lx), a * (d + rel * 0.55 * (1.0 - dryness)))
+        hw = a * (d + rel * 0.55 * (1.0 - dryness))
+        if self.kernel == 'reference':
+            pcol = pc[si]
+            wsum = np.zeros((lh, lw), np.float32)
+            csum = np.zeros((lh, lw, 4), np.float32)
+            hsum = np.zeros((lh, lw), np.float32)
+            np.add.at(wsum, (ly, lx), a)
+            np.add.at(csum, (ly, lx), pcol * a[:, None])
+            np.add.at(hsum, (ly, lx), hw)
+        else:
+            # ~1.7 setole per px: molti campioni cadono sullo stesso pixel.
+            # Accumulo su indice lineare; csum passa per il passo t (pc è
+            # costante lungo s) → 4 bincount sui soli pesi, non sui colori.
+            li = ly * lw + lx
+            npx = lh * lw
+            wsum = np.bincount(li, a, npx).astype(np.float32).reshape(lh, lw)
+            hsum = np.bincount(li, hw, npx).astype(np.float32).reshape(lh, lw)
+            csum = self._buf('csum', (lh, lw, 4))
+            for c in range(4):
+                csum[..., c] = np.bincount(li, a * pc[si, c], npx).reshape(lh, lw)
 
         # ── T2: aratura — il pennello raschia la pasta esistente ────────
-        Hroi = self.height[y0:y1, x0:x1]
+        Hroi = self.height_roi(y0, y1, x0, x1)
         body = wsum > 0.15
         if np.any(body):
             plow = np.where(body, Hroi, 0.0).astype(np.float32) \
@@ -345,70 +1192,771 @@ class OilCanvas:
             removed = float(plow.sum())
             if removed > 1e-5:
                 bodyf = body.astype(np.float32)
-                dil = blur(bodyf, 2)                    # dilatazione morbida
+                dil = blur(bodyf, 2 * sc)               # dilatazione morbida
                 ridge = dil * (1.0 - bodyf)             # solo fuori dal corpo
                 rs = float(ridge.sum())
                 if rs > 1e-6:                            # ~70% in creste laterali
                     Hroi += ridge * (removed * 0.70 / rs)
-                tail = np.zeros_like(wsum)               # ~30% in coda
-                np.add.at(tail, (ly, lx),
-                          a * np.clip((tsf - 0.65) / 0.35, 0, 1) ** 2)
+                tw = a * np.clip((tsf - 0.65) / 0.35, 0, 1) ** 2
+                if self.kernel == 'reference':               # ~30% in coda
+                    tail = np.zeros_like(wsum)
+                    np.add.at(tail, (ly, lx), tw)
+                else:
+                    tail = np.bincount(li, tw, npx).astype(
+                        np.float32).reshape(lh, lw)
                 tsum = float(tail.sum())
                 if tsum > 1e-6:
                     Hroi += tail * (removed * 0.30 / tsum)
             np.clip(Hroi, 0, None, out=Hroi)
 
         # ── compositing concentrazioni ──────────────────────────────────
-        nz = wsum > 1e-4
-        Aeff = np.clip(wsum, 0, 0.94)
-        mean_col = np.zeros_like(csum)
-        mean_col[nz] = csum[nz] / wsum[nz, None]
-
-        roi = self.conc[y0:y1, x0:x1]
-        roi[nz] = roi[nz] * (1 - Aeff[nz, None]) + mean_col[nz] * Aeff[nz, None]
+        roi = self.conc_roi(y0, y1, x0, x1)
+        if self.kernel == 'reference':
+            nz = wsum > 1e-4
+            Aeff = np.clip(wsum, 0, 0.94)
+            mean_col = np.zeros_like(csum)
+            mean_col[nz] = csum[nz] / wsum[nz, None]
+            roi[nz] = (roi[nz] * (1 - Aeff[nz, None])
+                       + mean_col[nz] * Aeff[nz, None])
+            npix = int(nz.sum())
+        else:
+            # compositing solo sui pixel unici toccati dal tratto
+            u = np.flatnonzero(wsum.ravel() > 1e-4)
+            uy, ux = np.divmod(u, lw)
+            wu = wsum.ravel()[u]
+            Au = np.minimum(wu, 0.94)[:, None]
+            mean_u = csum.reshape(-1, 4)[u] / wu[:, None]
+            roi[uy, ux] = roi[uy, ux] * (1 - Au) + mean_u * Au
+            npix = int(u.size)
 
         # impasto: deposito d'altezza (dopo l'aratura)
-        hadd = blur(np.clip(hsum, 0, 1.9), 1) * (0.70 * thickness)
+        np.clip(hsum, 0, 1.9, out=hsum)
+        hadd = blur(hsum, sc, out=hsum) * (0.70 * thickness)
         Hroi += hadd
+        self.conc_put(y0, y1, x0, x1, roi)
+        self.height_put(y0, y1, x0, x1, Hroi)
+        return npix
 
     # ── rendering finale con illuminazione ──────────────────────────────
+    # Supporto verticale del relief: blur(·,1.5) e blur(·,6) sono 3 box di
+    # raggio 2 e 6 per asse → una riga d'uscita dipende da ±(6+18) righe
+    # di height/weave (il gradiente, ±1, sta dentro il supporto dell'AO).
+    # A scale≠1 i sigma scalano: vedi zorn_blur.support(). Sempre col box
+    # (exact=True): dal sigma 8 in su l'IIR a bande non rifà il monolitico.
+    RELIEF_HALO = 3 * 2 + 3 * 6
+
+    @staticmethod
+    def _relief_height(height: np.ndarray, weave: np.ndarray,
+                       scale: float = 1.0) -> np.ndarray:
+        """T5b: la trama affiora nelle velature, sparisce sotto l'impasto."""
+        h = height + weave * 0.15 * np.exp(-height / 0.35)
+        return blur(h, 1.5 * scale, out=h, exact=True)
+
+    # ── ombre portate: orizzonte a scansione lungo l'azimut della luce ──
+    # Quota reale z = SHADOW_DEPTH·relief·scale·h px: l'height-field è
+    # tarato per le normali (pochi px di escursione su 1920), mentre un
+    # impasto vero è spesso come parecchi px della tela — senza questo
+    # fattore l'ombra non esce nemmeno a luce radente. Un punto è in
+    # ombra se verso la luce c'è un rilievo sopra il raggio che scende di
+    # tan(elevazione) per px. Invece di marciare un raggio per pixel, si
+    # scorre la tela lungo l'asse dominante dell'azimut portando
+    # l'orizzonte M: M(p) = max(z(p), M(p⁻) − drop),
+    # con p⁻ il vicino verso la luce (interpolato sull'asse laterale) —
+    # un passo vettoriale per riga/colonna, O(N) in tutto.
+
+    SHADOW_DEPTH = 6.0      # px nominali di quota per unità di height (×relief)
+    SHADOW_SOFT = 0.5       # px nominali sotto l'orizzonte per l'ombra piena
+
+    @staticmethod
+    def _light_dir(light) -> Tuple[float, float, float, float]:
+        """(Lx, Ly, |L_xy|, tan elevazione) della luce normalizzata."""
+        L = np.asarray(light, np.float64)
+        L = L / np.linalg.norm(L)
+        lh = math.hypot(L[0], L[1])
+        return L[0], L[1], lh, max(L[2], 1e-3) / max(lh, 1e-9)
+
+    @staticmethod
+    def shadow_reach(hmin: float, hmax: float, light, relief: float,
+                     scale: float = 1.0) -> int:
+        """Px reali oltre i quali nessun rilievo proietta ombra.
+
+        Il raggio scende di tan(elev) per px: a distanza > Δz / tan(elev)
+        l'orizzonte è sotto anche il punto più basso. È l'alone che serve
+        al render a bande per avere ombre identiche al monolitico.
+        """
+        _, _, lh, t = OilCanvas._light_dir(light)
+        if lh < 1e-6:
+            return 0
+        k = OilCanvas.SHADOW_DEPTH * relief * scale
+        return int(math.ceil((hmax - hmin) * k / t)) + 2
+
+    @staticmethod
+    def _horizon_shadow(h: np.ndarray, light, relief: float,
+                        scale: float = 1.0) -> np.ndarray:
+        """Ombra portata in [0,1] (1 = luce diretta del tutto coperta).
+
+        Penombra lineare su SHADOW_SOFT px di quota sotto l'orizzonte:
+        evita la scalettatura della griglia.
+        """
+        Lx, Ly, lh, t = OilCanvas._light_dir(light)
+        if lh < 1e-6:                       # luce a picco: nessuna ombra
+            return np.zeros(h.shape, np.float32)
+        # si riduce al caso "asse dominante = righe dell'array, luce a
+        # indice 0": trasposta se domina x, capovolta se la luce è in fondo
+        if abs(Lx) > abs(Ly):
+            Z, step, lat = h.T, Lx, Ly
+        else:
+            Z, step, lat = h, Ly, Lx
+        if step > 0:
+            Z = Z[::-1]
+        Z = np.ascontiguousarray(Z, np.float32) * np.float32(
+            OilCanvas.SHADOW_DEPTH * relief * scale)
+        m, n = Z.shape
+        dl = lat / abs(step)                # spostamento laterale per passo
+        k = min(math.floor(dl), 0)
+        f = np.float32(dl - k)
+        drop = np.float32(t * math.hypot(1.0, dl))
+        LOW = np.float32(-1e30)
+
+        P = np.empty(n + 2, np.float32)     # orizzonte della riga prima
+        P[0] = P[-1] = LOW
+        P[1:-1] = Z[0]
+        a0, a1 = 1 + k, 2 + k
+        Hz = np.empty_like(Z)
+        Hz[0] = LOW
+        tmp = np.empty(n, np.float32)
+        for i in range(1, m):
+            hz = Hz[i]
+            np.multiply(P[a0:a0 + n], 1 - f, out=hz)
+            np.multiply(P[a1:a1 + n], f, out=tmp)
+            hz += tmp
+            hz -= drop
+            np.maximum(Z[i], hz, out=P[1:-1])
+
+        Hz -= Z
+        Hz *= np.float32(1.0 / (OilCanvas.SHADOW_SOFT * scale))
+        S = np.clip(Hz, 0, 1, out=Hz)
+        if step > 0:
+            S = S[::-1]
+        if abs(Lx) > abs(Ly):
+            S = S.T
+        return np.ascontiguousarray(S)
+
+    @staticmethod
+    def _geometry(conc: np.ndarray, h: np.ndarray, hmax: float,
+                  relief: float, scale: float = 1.0, km: str = 'exact',
+                  km_res: int = 65) -> Dict[str, np.ndarray]:
+        """La parte di _shade che non dipende dalla luce.
+
+        color (KM), nx/ny (normale non normalizzata, nz = 1), inv = 1/|n|,
+        gloss, ao, h (per le ombre): float32 sul blocco di righe. Vedi
+        Relighter.
+        """
+        if km not in KM_MODES:
+            raise ValueError(f"km sconosciuto: {km!r} (ammessi: {KM_MODES})")
+        if km == 'exact':
+            color = km_rgb(np.clip(conc, 0, None))
+        else:
+            color = km_table(km_res)(conc)
+
+        gy, gx = np.gradient(h)
+        nx = -gx * (relief * scale)
+        ny = -gy * (relief * scale)
+        inv = 1.0 / np.sqrt(nx * nx + ny * ny + 1.0)
+
+        gloss = 0.45 + 0.55 * np.clip(h / max(hmax, 1e-6), 0, 1)
+        ao = np.clip((blur(h, 6 * scale, exact=True) - h) * 0.55, 0, 0.6)
+        return dict(color=color, nx=nx, ny=ny, inv=inv, gloss=gloss, ao=ao,
+                    h=h)
+
+    @staticmethod
+    def _light(g: Dict[str, np.ndarray], light, ambient: float,
+               spec_strength: float, shininess: float,
+               km: str = 'exact',
+               shadow: Optional[np.ndarray] = None) -> np.ndarray:
+        """Blinn-Phong + gloss + AO sulla geometria di _geometry → RGB [0,1].
+
+        light (3,) → (h,w,3); light (N,3) → (N,h,w,3), le N luci in un
+        colpo solo (stessa aritmetica, valori identici al caso singolo).
+        shadow — ombra portata (h,w) o (N,h,w): spegne diffusa e speculare,
+        l'ambiente resta.
+        """
+        lights = np.asarray(light, np.float32)
+        batched = lights.ndim == 2
+        Ls, Hs = [], []
+        for L in lights.reshape(-1, 3):
+            L = L / np.linalg.norm(L)
+            Hv = L + np.array([0, 0, 1], np.float32)
+            Ls.append(L)
+            Hs.append(Hv / np.linalg.norm(Hv))
+        L, Hv = np.stack(Ls, -1), np.stack(Hs, -1)          # (3, N)
+        if batched:
+            L, Hv = L[:, :, None, None], Hv[:, :, None, None]
+        else:
+            L, Hv = L[:, 0], Hv[:, 0]
+        ex = (lambda a: a[None]) if batched else (lambda a: a)
+        nx, ny, inv = ex(g['nx']), ex(g['ny']), ex(g['inv'])
+
+        diff = np.clip((nx * L[0] + ny * L[1] + L[2]) * inv, 0, 1)
+        spec = np.clip((nx * Hv[0] + ny * Hv[1] + Hv[2]) * inv, 0, 1)
+        if km == 'lut_fused':
+            spec = PowLut(shininess)(spec)
+        else:
+            spec = spec ** shininess
+        if shadow is not None:
+            lit = 1 - shadow
+            diff = diff * lit
+            spec = spec * lit
+
+        color = ex(g['color'])
+        gloss, ao = ex(g['gloss']), ex(g['ao'])
+        out = (color * (ambient + (1 - ambient) * diff)[..., None]
+               - (ao * 0.55)[..., None] * color
+               + (spec * spec_strength * gloss)[..., None])
+        return np.clip(out, 0, 1)
+
+    @staticmethod
+    def _shade(conc: np.ndarray, h: np.ndarray, hmax: float,
+               light, relief: float, ambient: float,
+               spec_strength: float, shininess: float,
+               scale: float = 1.0, km: str = 'exact',
+               km_res: int = 65, shadows: bool = False) -> np.ndarray:
+        """KM + Blinn-Phong + gloss + AO su un blocco di righe → RGB [0,1].
+
+        scale   — px reali per px nominale: la pendenza si misura in unità
+                  nominali (gradiente × scale), l'AO su blur(·, 6·scale).
+        km      — vedi KM_MODES; le LUT stanno entro km_table(km_res).max_error.
+        shadows — ombre portate dell'impasto (_horizon_shadow).
+        """
+        g = OilCanvas._geometry(conc, h, hmax, relief, scale, km, km_res)
+        S = (OilCanvas._horizon_shadow(h, light, relief, scale)
+             if shadows else None)
+        return OilCanvas._light(g, light, ambient, spec_strength, shininess,
+                                km, S)
+
+    # render(workers=…): bande di almeno RENDER_MIN_ROWS righe, circa
+    # RENDER_BANDS_PER_WORKER per thread (bilancia le bande di bordo,
+    # più corte, senza moltiplicare gli aloni)
+    RENDER_MIN_ROWS = 64
+    RENDER_BANDS_PER_WORKER = 2
+
     def render(self, light=(-0.40, -0.55, 0.82),
                relief: float = 0.9, ambient: float = 0.68,
-               spec_strength: float = 0.08, shininess: float = 18.0
-               ) -> Image.Image:
+               spec_strength: float = 0.08, shininess: float = 18.0,
+               km: str = 'exact', km_res: int = 65,
+               shadows: bool = False, workers: int = 0,
+               band_rows: Optional[int] = None) -> Image.Image:
         """
         Relief lighting su un height-field che include la trama della tela
         dove la pittura è sottile (T5b) — il colore nasce qui dal KM (T1).
+        km='lut' / 'lut_fused' usa le tabelle di km_lut.py (vedi KM_MODES).
+        shadows=True aggiunge le ombre portate dell'impasto (luce radente).
+
+        workers ≥ 1 → bande di band_rows righe (default: ~2 per thread)
+        con l'alone di render_to, ombreggiate su un pool di thread (numpy
+        rilascia il GIL) e scritte in un'unica uscita uint8 preallocata:
+        stesso quadro di render() bit per bit a ogni scale (rilievo e AO
+        sempre col box, exact=True); dei temporanei (H,W) resta solo il
+        rilievo, calcolato una volta nella passata del max.
+        """
+        if workers < 0:
+            raise ValueError(f"workers deve essere ≥ 0, non {workers!r}")
+        if not workers:
+            h = self._relief_height(self.height, self.weave, self.scale)
+            out = self._shade(self.conc, h, float(h.max()), light, relief,
+                              ambient, spec_strength, shininess, self.scale,
+                              km, km_res, shadows)
+            return Image.fromarray((out * 255).astype(np.uint8))
+
+        if km != 'exact':
+            km_table(km_res)                # la LUT una volta, non per thread
+        rows = band_rows or max(self.RENDER_MIN_ROWS, -(-self.H // (
+            workers * self.RENDER_BANDS_PER_WORKER)))
+        img = np.empty((self.H, self.W, 3), np.uint8)
+        relief_h = np.empty((self.H, self.W), np.float32)
+        with ThreadPoolExecutor(workers) as pool:
+            hmax, hmin = self._relief_range(rows, pool.map, relief_h)
+            halo = self._render_halo(hmin, hmax, light, relief, shadows)
+
+            def put(band: Tuple[int, int, int, int]):
+                out = self._shade_band(band, hmax, light, relief, ambient,
+                                       spec_strength, shininess, km, km_res,
+                                       shadows, relief_h)
+                img[band[0]:band[1]] = (out * 255).astype(np.uint8)
+            list(pool.map(put, self._bands(rows, halo)))
+        return Image.fromarray(img)
+
+    def _bands(self, tile_rows: int, halo: int):
+        """(y0, y1, e0, e1): banda utile [y0,y1) e banda estesa [e0,e1)."""
+        for y0 in range(0, self.H, tile_rows):
+            y1 = min(self.H, y0 + tile_rows)
+            yield y0, y1, max(0, y0 - halo), min(self.H, y1 + halo)
+
+    # ── render a bande (render_to, render(workers=…)) ───────────────────
+    def _relief_range(self, tile_rows: int, map_=map,
+                      out: Optional[np.ndarray] = None) -> Tuple[float, float]:
+        """(max, min) del rilievo, banda per banda: il max serve al gloss
+        (globale nel monolitico), il min all'alone delle ombre. out (H,W)
+        → vi resta anche il rilievo, per non rifarlo in _shade_band."""
+        sc = self.scale
+
+        def one(band: Tuple[int, int, int, int]) -> Tuple[float, float]:
+            y0, y1, e0, e1 = band
+            h = self._relief_height(self.height_roi(e0, e1),
+                                    self.weave_roi(e0, e1), sc)
+            h = h[y0 - e0:y1 - e0]
+            if out is not None:
+                out[y0:y1] = h
+            return float(h.max()), float(h.min())
+        halo = support(1.5 * sc, exact=True)
+        r = list(map_(one, self._bands(tile_rows, halo)))
+        return max(0.0, *(a for a, _ in r)), min(b for _, b in r)
+
+    def _render_halo(self, hmin: float, hmax: float, light, relief: float,
+                     shadows: bool) -> int:
+        """Righe di contesto per banda: blur del rilievo + AO (+ ombre)."""
+        sc = self.scale
+        halo = (support(1.5 * sc, exact=True)
+                + support(6 * sc, exact=True))
+        if shadows:
+            halo += self.shadow_reach(hmin, hmax, light, relief, sc)
+        return halo
+
+    def _shade_band(self, band: Tuple[int, int, int, int], hmax: float,
+                    light, relief: float, ambient: float,
+                    spec_strength: float, shininess: float, km: str,
+                    km_res: int, shadows: bool,
+                    relief_h: Optional[np.ndarray] = None) -> np.ndarray:
+        """RGB [0,1] (y1-y0, W, 3) della banda utile, dalla banda estesa
+        (rilievo da relief_h se c'è, di _relief_range)."""
+        y0, y1, e0, e1 = band
+        sc = self.scale
+        if relief_h is not None:
+            h = relief_h[e0:e1]
+        else:
+            h = self._relief_height(self.height_roi(e0, e1),
+                                    self.weave_roi(e0, e1), sc)
+        out = self._shade(self.conc_roi(e0, e1), h, hmax, light, relief,
+                          ambient, spec_strength, shininess, sc, km, km_res,
+                          shadows)
+        return out[y0 - e0:y1 - e0]
+
+    def render_to(self, path: str, tile_rows: int = 256, bits: int = 8,
+                  dpi=(150, 150), light=(-0.40, -0.55, 0.82),
+                  relief: float = 0.9, ambient: float = 0.68,
+                  spec_strength: float = 0.08, shininess: float = 18.0,
+                  km: str = 'exact', km_res: int = 65,
+                  shadows: bool = False):
+        """
+        Come render() + save(), ma a bande di tile_rows righe scritte subito
+        in un PNG a streaming: i temporanei float32 sono (tile_rows+2·halo,
+        W), non (H, W). Ogni banda è calcolata con RELIEF_HALO righe di
+        contesto sopra e sotto, quindi niente cuciture; ai bordi veri la
+        banda estesa finisce dove finisce la tela, come nel monolitico.
+
+        Due passate: la prima (halo 6) trova solo max(h) per il gloss, che
+        nel monolitico è globale; la seconda ombreggia e scrive. Con
+        shadows l'alone cresce di shadow_reach() (dal min/max di h della
+        prima passata): oltre quella distanza nessun rilievo fa ombra,
+        quindi anche le ombre sono identiche al monolitico.
+        bits=8 riproduce render(); bits=16 quantizza su 0..65535 (stampa).
         """
-        color = km_rgb(np.clip(self.conc, 0, None))
+        tile_rows = max(1, int(tile_rows))
+        hmax, hmin = self._relief_range(tile_rows)
+        halo = self._render_halo(hmin, hmax, light, relief, shadows)
+        qmax = 255 if bits == 8 else 65535
+        with PNGStream(path, self.W, self.H, bits=bits, dpi=dpi) as png:
+            for band in self._bands(tile_rows, halo):
+                out = self._shade_band(band, hmax, light, relief, ambient,
+                                       spec_strength, shininess, km, km_res,
+                                       shadows)
+                if bits == 8:
+                    png.write_rows((out * qmax).astype(np.uint8))
+                else:
+                    png.write_rows(np.round(out * qmax).astype(np.uint16))
+
+    def relighter(self, relief: float = 0.9, km: str = 'exact',
+                  km_res: int = 65) -> 'Relighter':
+        """Geometria del rilievo in cache → molte luci al costo di poche."""
+        return Relighter.from_canvas(self, relief, km, km_res)
 
-        # T5b: la trama affiora nelle velature, sparisce sotto l'impasto
-        h = blur(self.height
-                 + self.weave * 0.15 * np.exp(-self.height / 0.35), 1.5)
-        gy, gx = np.gradient(h)
-        nx = -gx * relief
-        ny = -gy * relief
-        nz = np.ones_like(h)
-        inv = 1.0 / np.sqrt(nx * nx + ny * ny + 1.0)
 
-        L = np.asarray(light, np.float32)
-        L = L / np.linalg.norm(L)
-        Hv = L + np.array([0, 0, 1], np.float32)
-        Hv = Hv / np.linalg.norm(Hv)
+# ═══════════════════════════════════════════════════════════════════════════
+# Relighting: la geometria una volta, N luci dopo
+# ═══════════════════════════════════════════════════════════════════════════
 
-        diff = np.clip((nx * L[0] + ny * L[1] + nz * L[2]) * inv, 0, 1)
-        spec = np.clip((nx * Hv[0] + ny * Hv[1] + nz * Hv[2]) * inv, 0, 1)
-        spec = spec ** shininess
+def turntable(n: int = 36, light=(-0.40, -0.55, 0.82)) -> np.ndarray:
+    """n luci radenti (n,3) a passi d'azimut uguali, con l'elevazione di light.
 
-        gloss = 0.45 + 0.55 * np.clip(h / max(h.max(), 1e-6), 0, 1)
-        ao = np.clip((blur(h, 6) - h) * 0.55, 0, 0.6)
+    La prima è light stessa (normalizzata): turntable(n)[0] rifà render().
+    """
+    L = np.asarray(light, np.float64)
+    L = L / np.linalg.norm(L)
+    r, az0 = math.hypot(L[0], L[1]), math.atan2(L[1], L[0])
+    az = az0 + 2 * math.pi * np.arange(n) / n
+    return np.stack([r * np.cos(az), r * np.sin(az),
+                     np.full(n, L[2])], -1).astype(np.float32)
 
-        out = (color * (ambient + (1 - ambient) * diff)[..., None]
-               - (ao * 0.55)[..., None] * color
-               + (spec * spec_strength * gloss)[..., None])
-        out = np.clip(out, 0, 1)
+
+class Relighter:
+    """
+    Tutto ciò che in render() non dipende dalla luce — rilievo con la
+    trama, gradiente, normali, gloss, AO, colore KM — calcolato una volta
+    (OilCanvas._geometry) e tenuto in memoria o su disco (save/load). Ogni
+    luce costa poi solo diff/spec/composizione (OilCanvas._light): una
+    frazione di render(), e render(light) è identico a OilCanvas.render.
+
+    render_many() valuta N luci insieme a bande di righe: per ogni banda
+    un'unica passata vettoriale (N, b, W, 3), con la banda scelta perché
+    i temporanei restino entro band_bytes. Le ombre portate (shadows=True)
+    dipendono dalla luce: una scansione d'orizzonte per luce sul piano h.
+    """
+
+    PLANES = ('color', 'nx', 'ny', 'inv', 'gloss', 'ao', 'h')
+
+    def __init__(self, geom: Dict[str, np.ndarray], km: str = 'exact',
+                 relief: float = 0.9, scale: float = 1.0):
+        self.g = geom
+        self.km = km
+        self.relief, self.scale = relief, scale
+        self.H, self.W = geom['inv'].shape
+
+    @classmethod
+    def from_canvas(cls, cv: 'OilCanvas', relief: float = 0.9,
+                    km: str = 'exact', km_res: int = 65) -> 'Relighter':
+        h = cv._relief_height(cv.height, cv.weave, cv.scale)
+        return cls(cv._geometry(cv.conc, h, float(h.max()), relief,
+                                cv.scale, km, km_res), km, relief, cv.scale)
+
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self.g.values())
+
+    def shadow(self, light) -> np.ndarray:
+        return OilCanvas._horizon_shadow(self.g['h'], light, self.relief,
+                                         self.scale)
+
+    def render(self, light=(-0.40, -0.55, 0.82), ambient: float = 0.68,
+               spec_strength: float = 0.08, shininess: float = 18.0,
+               shadows: bool = False) -> Image.Image:
+        out = OilCanvas._light(self.g, light, ambient, spec_strength,
+                               shininess, self.km,
+                               self.shadow(light) if shadows else None)
         return Image.fromarray((out * 255).astype(np.uint8))
 
+    def render_many(self, lights, ambient: float = 0.68,
+                    spec_strength: float = 0.08, shininess: float = 18.0,
+                    shadows: bool = False, band_bytes: int = 32 << 20
+                    ) -> np.ndarray:
+        """(N,3) luci → (N,H,W,3) uint8, immagine k = render(lights[k])."""
+        lights = np.asarray(lights, np.float32).reshape(-1, 3)
+        n = len(lights)
+        res = np.empty((n, self.H, self.W, 3), np.uint8)
+        S = np.stack([self.shadow(L) for L in lights]) if shadows else None
+        # ~8 temporanei (N,b,W) o (N,b,W,3) float32 vivi insieme
+        rows = max(1, band_bytes // (self.W * n * 3 * 4 * 8))
+        for y0 in range(0, self.H, rows):
+            y1 = min(self.H, y0 + rows)
+            band = {k: v[y0:y1] for k, v in self.g.items()}
+            out = OilCanvas._light(band, lights, ambient, spec_strength,
+                                   shininess, self.km,
+                                   None if S is None else S[:, y0:y1])
+            out *= 255
+            res[:, y0:y1] = out
+        return res
+
+    # ── persistenza accanto alla tela ───────────────────────────────────
+    def save(self, path: str):
+        """npz non compresso: i piani float32 non si comprimono quasi."""
+        np.savez(path, km=np.array(self.km), relief=self.relief,
+                 scale=self.scale, **self.g)
+
+    @classmethod
+    def load(cls, path: str) -> 'Relighter':
+        with np.load(path) as z:
+            return cls({k: z[k] for k in cls.PLANES}, str(z['km']),
+                       float(z['relief']), float(z['scale']))
+
+
+def save_turntable(cv: 'OilCanvas', out: str, n: int = 36, dpi=(150, 150),
+                   chunk: int = 12, shadows: bool = False) -> List[str]:
+    """n varianti a luce radente di cv: a.png → a.light00.png … (turntable).
+
+    La geometria si calcola una volta; le luci a gruppi di chunk (il
+    risultato uint8 di un gruppo è chunk·H·W·3 byte).
+    """
+    rl = cv.relighter()
+    lights = turntable(n)
+    stem, dot, ext = out.rpartition('.')
+    stem, ext = (stem, ext) if dot else (out, 'png')
+    paths = []
+    for k0 in range(0, n, chunk):
+        rgbs = rl.render_many(lights[k0:k0 + chunk], shadows=shadows)
+        for k, rgb in enumerate(rgbs, k0):
+            paths.append(f"{stem}.light{k:02d}.{ext}")
+            Image.fromarray(rgb).save(paths[-1], dpi=dpi)
+    return paths
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Imprimitura in cache (condivisa da v8 e v9)
+# ═══════════════════════════════════════════════════════════════════════════
+
+# ── imprimitura a piramide (--ground-level) ─────────────────────────────
+# Le pennellate del fondo sono lunghe 350–700 px, larghe 40–70, molto
+# trascinate, e poi la velatura le sfoca a sigma 14: il dettaglio delle
+# setole a piena risoluzione si butta via. Con level ≥ 1 le pennellate
+# ancora larghe almeno GROUND_MIN_PX px reali sullo strato a 1/2^level
+# vi si dipingono (costo ~1/4^level), poi lo strato torna nella tela
+# (bilineare); le altre restano a piena risoluzione, sopra. Il rilievo
+# del fondo perde il dettaglio sotto i 2^level px.
+GROUND_LEVELS = (0, 1, 2)
+GROUND_MIN_PX = 10.0
+
+
+def paint_ground(cv: OilCanvas, rows: List[Dict], level: int = 0):
+    """Pennellate dell'imprimitura, le larghe sullo strato cv.layer(level)."""
+    if level not in GROUND_LEVELS:
+        raise ValueError(f"livello sconosciuto: {level!r} "
+                         f"(attesi: {', '.join(map(str, GROUND_LEVELS))})")
+
+    def paint(c: OilCanvas, rr: List[Dict]):
+        c.paint(c.plan(**stroke_table(rr)))
+
+    lim = GROUND_MIN_PX * (1 << level) / cv.scale     # px nominali
+    coarse = [r for r in rows if level and r['width'] >= lim]
+    fine = [r for r in rows if not (level and r['width'] >= lim)]
+    if coarse:
+        sub = cv.layer(level)
+        paint(sub, coarse)
+        cv.absorb(sub)
+    if fine:
+        paint(cv, fine)
+
+
+# ── bande su un pool di processi (OilCanvas.paint_bands) ─────────────
+_BAND: Dict = {}
+
+
+def _paint_band(ctx: Dict, src: Dict[str, np.ndarray],
+                out: Dict[str, np.ndarray],
+                band: Tuple[int, int, int, int]) -> Tuple[int, int, float]:
+    """Una banda (y0, y1, e0, e1): le pennellate che toccano [e0, e1) su
+    una tela fatta delle righe e0..e1 di src; le righe [y0, y1) in out.
+    → (pennellate, pixel composti, secondi di CPU)."""
+    t0 = time.thread_time()
+    y0, y1, e0, e1 = band
+    plan, tile = ctx['plan'], ctx['tile']
+    if tile is not None:                    # la tessera in fase con e0
+        weave = np.roll(tile, -(e0 % tile.shape[0]), 0)
+    else:
+        weave = src['weave'][e0:e1]
+    cv = OilCanvas.from_state(src['conc'][e0:e1].copy(),
+                              src['height'][e0:e1].copy(), weave,
+                              np.random.default_rng().bit_generator.state,
+                              **ctx['canvas'])
+    idx = stroke_fronts.band_strokes(plan.bbox, e0, e1)
+    pixels = sum(cv._deposit(plan, int(i), e0) for i in idx)
+    out['conc'][y0:y1] = cv.conc[y0 - e0:y1 - e0]
+    out['height'][y0:y1] = cv.height[y0 - e0:y1 - e0]
+    return len(idx), pixels, time.thread_time() - t0
+
+
+def _band_init(ctx: Dict):
+    """Worker: apre lo stato (sola lettura) e l'uscita condivisi."""
+    si, so = SharedArrays.attach(ctx['src']), SharedArrays.attach(ctx['out'])
+    _BAND.update(ctx, si=si, so=so)
+
+
+def _band_paint(band: Tuple[int, int, int, int]) -> Tuple[int, int, float]:
+    return _paint_band(_BAND, _BAND['si'].arrays, _BAND['so'].arrays, band)
+
+
+def ground_recipe(engine, bg: np.ndarray, seed: int, kernel: str,
+                  storage: str = 'float32', rng_mode: str = 'stream',
+                  scale: float = 1.0, noise: str = 'bank',
+                  ground_level: int = 0, quality: str = 'standard') -> Dict:
+    """Tutto ciò da cui dipende lo stato post-ground di un motore.
+
+    Include il sorgente di tutto questo modulo (OilCanvas e le funzioni
+    di modulo che usa: ema_pickup, resample, snoise2_expand, counter_rng,
+    km_rgb, paint_ground…), di engine.ground() e dei moduli importati dal
+    fondo: cambiare il motore o la ricetta del fondo invalida la cache da
+    sé (anche un ritocco fuori dal fondo, al prezzo di rifarlo una volta).
+    """
+    mods = (sys.modules[OilCanvas.__module__], sys.modules[Quality.__module__],
+            zorn_blur, noise_bank, stroke_plan, stroke_fronts, ground_cache)
+    src = (inspect.getsource(type(engine).ground)
+           + ''.join(inspect.getsource(m) for m in mods))
+    return dict(engine=type(engine).__name__, seed=seed,
+                W=engine.W, H=engine.H, kernel=kernel, storage=storage,
+                rng_mode=rng_mode, scale=float(scale), noise=noise,
+                ground_level=ground_level, quality=quality,
+                bg=[round(float(v), 7) for v in bg],
+                src=hashlib.sha256(src.encode('utf-8')).hexdigest())
+
+
+def ground_from_cache(cache: GroundCache, recipe: Dict
+                      ) -> Optional[OilCanvas]:
+    """Tela post-ground dalla cache (mmap) + stato di `random`, o None."""
+    hit = cache.get(cache.key(recipe))
+    if hit is None:
+        return None
+    arrays, meta = hit
+    ver, st, gauss = meta['random']
+    random.setstate((ver, tuple(st), gauss))
+    return OilCanvas.from_state(arrays['conc'], arrays['height'],
+                                arrays['weave'], meta['rng'],
+                                kernel=recipe['kernel'],
+                                storage=recipe['storage'],
+                                rng_mode=recipe['rng_mode'],
+                                seed=recipe['seed'],
+                                stroke_index=meta['stroke_index'],
+                                scale=recipe['scale'],
+                                noise=recipe['noise'],
+                                quality=recipe['quality'])
+
+
+def ground_to_cache(cache: GroundCache, recipe: Dict, cv: OilCanvas):
+    """Salva lo stato post-ground (buffer + entrambi gli rng)."""
+    cache.put(cache.key(recipe),
+              dict(conc=cv.conc, height=cv.height,
+                   weave=cv.weave if cv.weave_tile is None else cv.weave_tile),
+              dict(rng=cv.rng.bit_generator.state,
+                   stroke_index=cv.stroke_index,
+                   random=random.getstate(), recipe=recipe))
+
+
+# ── checkpoint dei segni (--checkpoints), condivisi da v8 e v9 ────────
+# La base è la tela subito prima dei segni (ground, velatura, barline):
+# dipende dalla ricetta del ground e dal codice che la completa. La
+# tabella dei segni si ricompila sempre (qualche ms) dallo stato di
+# `random` della base: il confronto con quella dipinta decide da dove
+# riprendere, quindi anche le dipendenze fra eventi sono coperte.
+def marks_recipe(engine) -> Dict:
+    """Ricetta della base dei checkpoint (vedi checkpoints.py)."""
+    cls = type(engine)
+    src = inspect.getsource(cls.create) + (
+        inspect.getsource(cls.barlines) if hasattr(cls, 'barlines') else '')
+    return dict(engine._recipe,
+                marks=hashlib.sha256(src.encode('utf-8')).hexdigest())
+
+
+def _canvas_meta(cv: OilCanvas, **extra) -> Dict:
+    return dict(rng=cv.rng.bit_generator.state, stroke_index=cv.stroke_index,
+                stats=dict(cv.stats), **extra)
+
+
+def marks_base(engine, run: CheckpointRun):
+    """Salva la base: la tela prima dei segni + lo stato di `random`."""
+    cv = engine.cv
+    run.save(0, cv.conc, cv.height, _canvas_meta(cv, random=random.getstate()))
+
+
+def marks_resume(engine, run: CheckpointRun, layout_name: str
+                 ) -> Optional[Tuple[Dict[str, np.ndarray], int,
+                                     Optional[int]]]:
+    """Ripresa da un run esistente: la partitura del motore ricompilata
+    dallo stato `random` della base, la tela riportata all'ultimo
+    checkpoint prima della prima pennellata diversa da quelle dipinte.
+    → (tabella, pennellate già dipinte, primo evento cambiato) o None se
+    il run non ha la base."""
+    base = run.base_meta()
+    if base is None:
+        return None
+    ver, st, g = base['random']
+    random.setstate((ver, tuple(st), g))
+    tab = compile_score(engine.score, layout_name, engine)
+    old = run.load_table()
+    r = first_diff(old[0], tab) if old else 0
+    pos = max(p for p in run.positions() if p <= r)
+    conc, height, meta = run.load(pos)
+    cv = engine.cv
+    cv.conc, cv.height = conc, height
+    cv.rng.bit_generator.state = meta['rng']
+    cv.stroke_index = meta['stroke_index']
+    cv.stats.update(meta['stats'])
+    run.drop_after(pos)
+    changed = (Score.from_events(old[1]).first_change(engine.score)
+               if old else 0)
+    return tab, pos, changed
+
+
+def marks_resume_note(engine, tab: Dict[str, np.ndarray], pos: int,
+                      changed: Optional[int]) -> str:
+    """Riga di log della ripresa."""
+    N = len(tab['x'])
+    where = (f"battuta {int(engine.score.bar()[tab['event'][pos]]) + 1}"
+             if pos < N else 'fine')
+    what = ('partitura invariata' if changed is None
+            else f'primo evento cambiato: {changed}')
+    return (f"Ripresa dal checkpoint ({where}): {pos}/{N} pennellate già "
+            f"dipinte, {what}")
+
+
+def marks_paint(engine, run: Optional[CheckpointRun],
+                tab: Dict[str, np.ndarray], start: int = 0,
+                every: Optional[int] = None):
+    """Dipinge le righe [start, N) della tabella; con un run salva uno
+    stato a ogni battuta (ogni `every` eventi) e alla fine."""
+    cv = engine.cv
+    if run is None:
+        paint_table(cv, tab, start=start)
+        return
+    run.save_table(tab, engine.score.to_events())
+    ev = tab['event']
+    group = ev // every if every else engine.score.bar()[ev]
+    stops = [int(p) for p in np.flatnonzero(np.diff(group)) + 1 if p > start]
+    for s, e in zip([start] + stops, stops + [len(ev)]):
+        if e > s:
+            paint_table(cv, tab, start=s, stop=e)
+            run.save(e, cv.conc, cv.height, _canvas_meta(cv))
+
+
+# ── diario delle pennellate (--journal / --replay), condiviso da v8 e v9 ──
+def journal_note(cv: OilCanvas) -> str:
+    """Chiude il diario della tela → una riga: pennellate e byte contro i
+    buffer della tela."""
+    j = cv.journal
+    j.close()
+    canvas = sum(a.nbytes for a in (cv.conc, cv.height))
+    return (f"diario: {j.strokes} pennellate, {j.nbytes() / 1024:.0f} KB "
+            f"({canvas / j.nbytes():.0f}× meno di conc+height) → {j.path}")
+
+
+def replay_to(path: str, out: str, scale: Optional[float] = None,
+              upto: Optional[int] = None, tile_rows: Optional[int] = None,
+              bits: int = 8, shadows: bool = False, workers: int = 0):
+    """Rifà il quadro di un diario (OilCanvas.replay) e lo salva in out."""
+    n = stroke_journal.count(path)
+    print(f"Replay di {path}: {n if upto is None else min(upto, n)}/{n} "
+          f"pennellate...")
+    cv = OilCanvas.replay(path, scale=scale, upto=upto)
+    dpi = (150 * cv.scale,) * 2
+    if tile_rows:
+        cv.render_to(out, tile_rows=tile_rows, bits=bits, dpi=dpi,
+                     shadows=shadows)
+    else:
+        cv.render(shadows=shadows, workers=workers).save(out, dpi=dpi)
+    print(f"Replay salvato: {out} ({cv.W}×{cv.H})")
+
+
+# ── proxy (--preview / --progressive), condiviso da v8 e v9 ───────────
+def preview_scales(preview: Optional[float], progressive: bool) -> List[float]:
+    """Scale da renderizzare in ordine: [S], [S, 1.0] o [1.0]."""
+    if preview is not None and not 0 < preview <= 1:
+        raise ValueError(f"--preview deve stare in (0, 1], non {preview}")
+    if progressive and (preview or 0.25) < 1.0:
+        return [preview or 0.25, 1.0]
+    return [preview or 1.0]
+
+
+def preview_path(out: str, scale: float) -> str:
+    """Il proxy non sovrascrive mai il quadro: a.png → a.preview.png."""
+    if scale == 1.0:
+        return out
+    stem, dot, ext = out.rpartition('.')
+    return f"{stem}.preview.{ext}" if dot else f"{out}.preview"
+
 
 # ═══════════════════════════════════════════════════════════════════════════
 # Composizione: partitura → quadro (mapping v2)
@@ -422,28 +1970,60 @@ class ZornOilPaintingV8:
     _J_POS = 3.5        # sigma jitter posizione (px)
     _J_ANG = 0.04       # sigma jitter angolo (rad)
 
-    def __init__(self, seed: int = 42):
+    def __init__(self, seed: int = 42, kernel: str = 'fast',
+                 ground_cache: Optional[GroundCache] = None,
+                 storage: str = 'float32', rng_mode: str = 'stream',
+                 scale: float = 1.0, noise: str = 'bank',
+                 ground_level: Optional[int] = None,
+                 quality: str = 'standard',
+                 stroke_threads: int = 0,
+                 render_workers: int = 0,
+                 checkpoints: Optional[CheckpointStore] = None,
+                 checkpoint_every: Optional[int] = None,
+                 journal: Optional[str] = None):
         random.seed(seed)
         self.ppb = (self.W - 2 * self.MARGIN) / BEATS_TOTAL   # px per beat
 
         # range dinamico Y: [min_midi-3, max_midi+3] sulla partitura
-        midis = []
-        for e in JOHNNY_B_GOODE_INTRO:
-            midis += e.get('dyad') or [e['midi']]
-            if 'slide_to' in e:
-                midis.append(e['slide_to'])
-            if 'hammer_to' in e:
-                midis.append(e['hammer_to'])
-            if 'bend' in e:
-                midis.append(e['midi'] + e['bend'])
-        self.midi_lo = min(midis) - 3
-        self.midi_hi = max(midis) + 3
+        self.score = Score.from_events(JOHNNY_B_GOODE_INTRO)
+        lo, hi = self.score.pitch_range()
+        self.midi_lo = lo - 3
+        self.midi_hi = hi + 3
         self.semipx = (self.H - 2 * self.MARGIN) / (self.midi_hi - self.midi_lo)
 
         # fondo: Naples yellow caldo in concentrazioni (ocra + bianco
         # + un soffio di vermiglio per il calore dorato del v7)
         bg = mixc(mixc(OCHRE, WHITE, 0.35), VERM, 0.012)
-        self.cv = OilCanvas(self.W, self.H, bg, seed)
+
+        # con la cache: ground già steso (e rng già avanzati) se presente
+        self.ground_cache = ground_cache
+        self.q = preset(quality)
+        self.ground_level = (self.q.ground if ground_level is None
+                             else ground_level)
+        self._recipe = ground_recipe(self, bg, seed, kernel, storage, rng_mode,
+                                     scale, noise, self.ground_level,
+                                     self.q.name)
+        self.cv, self._ground_ready = None, False
+        # il diario parte dalla tela nuda: niente ground dalla cache
+        if ground_cache is not None and journal is None:
+            self.cv = ground_from_cache(ground_cache, self._recipe)
+            self._ground_ready = self.cv is not None
+        if self.cv is None:
+            self.cv = OilCanvas(self.W, self.H, bg, seed, kernel=kernel,
+                                storage=storage, rng_mode=rng_mode,
+                                scale=scale, noise=noise, quality=self.q)
+        # deposito su thread dove i bbox non si toccano: stesso quadro
+        self.cv.threads = stroke_threads
+        self.render_workers = render_workers    # render a bande su thread
+        # checkpoint per battuta (o ogni checkpoint_every eventi) dei segni
+        self.checkpoint_every = checkpoint_every
+        self._ckpt = (checkpoints.run(marks_recipe(self))
+                      if checkpoints is not None and journal is None
+                      else None)
+        # diario delle pennellate (stroke_journal): il quadro rifattibile
+        # a qualunque scala con OilCanvas.replay
+        if journal is not None:
+            self.cv.record(journal)
 
     # ── coordinate musicali ─────────────────────────────────────────────
     def _tx(self, t: float) -> float:
@@ -458,14 +2038,14 @@ class ZornOilPaintingV8:
         return max(-MAX_ANG, min(MAX_ANG, a))
 
     @staticmethod
-    def _dry(t: float) -> float:
-        """Downbeat = pennello carico, levare = più secco."""
-        return 0.28 if (t % 1.0) < 0.05 else 0.52
+    def _dry(t):
+        """Downbeat = pennello carico, levare = più secco (t scalare o array)."""
+        return np.where(np.mod(t, 1.0) < 0.05, 0.28, 0.52)
 
     @staticmethod
-    def _shuffle_w(t: float) -> float:
-        """Alternanza deterministica ottavo forte/debole."""
-        return 1.15 if (t % 1.0) < 0.5 else 0.85
+    def _shuffle_w(t):
+        """Alternanza deterministica ottavo forte/debole (t scalare o array)."""
+        return np.where(np.mod(t, 1.0) < 0.5, 1.15, 0.85)
 
     # ── ground: campo ocra liscio (stile v7, in concentrazioni) ────────
     # NB: nel KM nero e vermiglio hanno un potere tingente enorme —
@@ -478,12 +2058,13 @@ class ZornOilPaintingV8:
             mixc(OCHRE, BLACK, 0.022),
             mixc(OCHRE, VERM, 0.030),
         ]
+        rows = []
         y = -20.0
         while y < self.H + 20:
             x = random.uniform(-300, -80)
             while x < self.W + 50:
                 L = random.uniform(350, 700)
-                self.cv.stroke(
+                rows.append(dict(
                     x=x, y=y + random.gauss(0, 6),
                     angle=random.gauss(0.0, 0.04),
                     length=L,
@@ -495,7 +2076,7 @@ class ZornOilPaintingV8:
                     dryness=random.uniform(0.55, 0.78),
                     smear=random.uniform(0.20, 0.38),
                     taper_end=random.uniform(0.50, 0.80),
-                )
+                ))
                 x += L * random.uniform(0.65, 0.90)
             y += random.uniform(30, 46)
 
@@ -503,7 +2084,7 @@ class ZornOilPaintingV8:
         for col, count in [(mixc(OCHRE, WHITE, 0.30), 8),
                            (mixc(OCHRE, VERM, 0.035), 6)]:
             for _ in range(count):
-                self.cv.stroke(
+                rows.append(dict(
                     x=random.uniform(0, self.W),
                     y=random.uniform(0, self.H),
                     angle=random.gauss(0.0, 0.08),
@@ -516,7 +2097,8 @@ class ZornOilPaintingV8:
                     dryness=random.uniform(0.60, 0.85),
                     smear=random.uniform(0.25, 0.45),
                     taper_end=random.uniform(0.6, 0.92),
-                )
+                ))
+        paint_ground(self.cv, rows, self.ground_level)
 
     # ── barline: velatura verticale quasi invisibile a t=4,8,12 ────────
     def barlines(self):
@@ -534,135 +2116,34 @@ class ZornOilPaintingV8:
             )
 
     # ── segni del riff (mapping v2) ─────────────────────────────────────
-    def riff_marks(self):
-        evs = JOHNNY_B_GOODE_INTRO
-        centers = []
-        for e in evs:
-            notes = e.get('dyad') or [e['midi']]
-            mm = sum(notes) / len(notes)
-            centers.append((self._tx(e['t']), self._ty(mm)))
-
+    def riff_marks(self, tab: Optional[Dict[str, np.ndarray]] = None,
+                   start: int = 0):
+        """tab/start → la tabella già compilata e le pennellate già
+        dipinte (ripresa da un checkpoint, marks_resume)."""
+        if tab is None:
+            tab = compile_score(self.score, 'timeline', self)
+        evs = self.score.to_events()
         for i, e in enumerate(evs):
-            tech = e['tech']
-            t, d, vel = e['t'], e['d'], e['vel']
-            x0, y0 = centers[i]
-            sw = self._shuffle_w(t)                       # shuffle forte/debole
-            width = VEL_WIDTH[vel] * sw
-            thick = VEL_THICK[vel]
-            opac = VEL_OPAC[vel]
-            dry = self._dry(t)
-            k = K_TECH.get(tech, 0.85)
-            length = max(d * self.ppb * k, width * 1.05)
-
-            # angolo = direzione melodica verso la nota successiva
-            if i + 1 < len(evs):
-                nx_, ny_ = centers[i + 1]
-                dir_ang = self._clamp_ang(math.atan2(ny_ - y0, nx_ - x0))
-            else:
-                dir_ang = 0.0
-
-            names = '+'.join(pitch_class(m) for m in (e.get('dyad') or [e['midi']]))
-            print(f"  [{i+1:2d}/{len(evs)}] t={t:6.3f}  {names:5s} {tech}")
-
-            for _rep in range(self._N_REP):
-                x = x0 + random.gauss(0, self._J_POS)
-                y = y0 + random.gauss(0, self._J_POS)
-                aj = random.gauss(0, self._J_ANG)
-
-                if tech == 'staccato':
-                    conc = note_conc(e['midi'])
-                    self.cv.stroke(x, y, math.radians(-30) + aj,
-                                   length, width, conc,
-                                   opacity=opac, thickness=thick,
-                                   dryness=dry, smear=0.08, taper_end=0.52)
-
-                elif tech == 'legato':
-                    conc = note_conc(e['midi'])
-                    self.cv.stroke(x, y, dir_ang + aj,
-                                   length, width, conc,
-                                   opacity=opac, thickness=thick,
-                                   curvature=random.gauss(0, 0.10),
-                                   dryness=dry, smear=0.10, taper_end=0.70)
-
-                elif tech == 'slide':
-                    # ESATTAMENTE dal (x,y) della nota al y del slide_to
-                    conc = note_conc(e['midi'])
-                    ty1 = self._ty(e['slide_to'])
-                    run = d * self.ppb
-                    s_ang = math.atan2(ty1 - y0, run)
-                    s_len = math.hypot(run, ty1 - y0)
-                    nxp, nyp = -math.sin(s_ang), math.cos(s_ang)
-                    for off, om, wf in [(-0.55, 0.72, 0.34),
-                                        (0.0, 1.0, 0.70),
-                                        (0.55, 0.68, 0.30)]:
-                        self.cv.stroke(x + nxp * off * width,
-                                       y + nyp * off * width,
-                                       s_ang + aj,
-                                       s_len, width * wf, conc,
-                                       opacity=opac * om, thickness=thick * 0.8,
-                                       dryness=dry + 0.10, smear=0.06,
-                                       taper_end=0.72)
-
-                elif tech == 'bend':
-                    # curvatura ∝ semitoni; il tratto si alza di bend*semipx
-                    conc = note_conc(e['midi'])
-                    semi = e['bend']
-                    rise = semi * self.semipx
-                    blen = max(length, rise * 1.55, 60.0)
-                    curv = -0.65 * semi                    # 2 semitoni → -1.3
-                    mean = math.asin(max(-0.95, min(0.95, -rise / blen)))
-                    a0 = mean - curv / 2
-                    self.cv.stroke(x, y, a0 + aj,
-                                   blen, width * 0.82, conc,
-                                   opacity=opac, thickness=thick,
-                                   curvature=curv, dryness=dry,
-                                   smear=0.07, taper_end=0.60)
-
-                elif tech == 'hammer_on':
-                    # dab sulla nota + tratto verso hammer_to
-                    conc = note_conc(e['midi'])
-                    self.cv.stroke(x, y, math.radians(-30) + aj,
-                                   width * 1.3, width * 0.9, conc,
-                                   opacity=opac, thickness=thick,
-                                   dryness=dry, smear=0.06, taper_end=0.50)
-                    ty1 = self._ty(e['hammer_to'])
-                    run = d * self.ppb
-                    h_ang = math.atan2(ty1 - y0, run)
-                    h_len = math.hypot(run, ty1 - y0)
-                    conc2 = note_conc(e['hammer_to'])
-                    self.cv.stroke(x, y, h_ang + aj,
-                                   h_len, width * 0.7, conc2,
-                                   opacity=opac * 0.92, thickness=thick * 0.8,
-                                   dryness=dry + 0.08, smear=0.10,
-                                   taper_end=0.70)
-
-                elif tech == 'vibrato':
-                    conc = note_conc(e['midi'])
-                    self.cv.stroke(x, y, dir_ang + aj,
-                                   length, width, conc,
-                                   opacity=opac, thickness=thick,
-                                   waviness=9.0, wave_freq=5.0,
-                                   dryness=dry, smear=0.07, taper_end=0.56)
-
-                elif tech in ('double_stop', 'double_stop_final'):
-                    # DUE pennellate, una per nota del dyad, ciascuna al suo
-                    # Y col suo colore; la superiore wet-on-wet (smear 0.5)
-                    lo_m, hi_m = e['dyad']
-                    final = (tech == 'double_stop_final')
-                    wav = 8.0 if final else 0.0
-                    thk = 1.30 if final else thick
-                    for j, (m_, sm) in enumerate([(lo_m, 0.10), (hi_m, 0.50)]):
-                        conc = note_conc(m_)
-                        ym = self._ty(m_) + (y - y0)
-                        self.cv.stroke(x, ym, math.radians(-30) + aj,
-                                       length, width, conc,
-                                       opacity=opac, thickness=thk,
-                                       waviness=wav, wave_freq=4.0,
-                                       dryness=dry, smear=sm,
-                                       taper_end=0.52 if not final else 0.60)
+            names = '+'.join(pitch_class(m)
+                             for m in (e.get('dyad') or [e['midi']]))
+            print(f"  [{i+1:2d}/{len(evs)}] t={e['t']:6.3f}  {names:5s} "
+                  f"{e['tech']}")
+        print(f"  {len(self.score)} eventi → {len(tab['x'])} "
+              f"pennellate")
+        marks_paint(self, self._ckpt, tab, start, self.checkpoint_every)
 
     # ── creazione ───────────────────────────────────────────────────────
-    def create(self, out: str = 'johnny_b_goode_zorn_v8.png'):
+    def create(self, out: str = 'johnny_b_goode_zorn_v8.png',
+               tile_rows: Optional[int] = None, bits: int = 8,
+               profile: Optional[PhaseProfiler] = None, turntable: int = 0,
+               shadows: bool = False):
+        """tile_rows → render a bande in streaming (memoria limitata).
+        profile → PhaseProfiler: tempi, memoria e pennellate per fase.
+        turntable → anche N varianti a luce radente (save_turntable).
+        shadows → ombre portate dell'impasto (OilCanvas._horizon_shadow)."""
+        prof = profile or PhaseProfiler()
+        if prof.canvas_stats is None:
+            prof.canvas_stats = lambda: self.cv.stats
         # sanity check T1: il "verde Zorn" (ocra+nero 50/50)
         zg = km_rgb(mixc(OCHRE, BLACK, 0.5)[None, :])[0] * 255
         print(f"Sanity KM — verde Zorn (ocra+nero 50/50): "
@@ -672,25 +2153,281 @@ class ZornOilPaintingV8:
             c = km_rgb(NOTE_CONC[nm][None, :])[0] * 255
             print(f"  masstone {nm}: RGB=({c[0]:.0f}, {c[1]:.0f}, {c[2]:.0f})")
 
-        print("Ground (campo ocra a impasto, concentrazioni KM)...")
-        self.ground()
-        # velatura di ammorbidimento sull'imprimitura (come v7)
-        self.cv.conc = np.clip(blur(self.cv.conc, 14.0), 0, 1)
-        print("Barline (velature verticali)...")
-        self.barlines()
+        resume = None
+        if self._ckpt is not None:
+            with prof.phase('resume'):
+                resume = marks_resume(self, self._ckpt, 'timeline')
+        if resume:
+            print(marks_resume_note(self, *resume))
+        else:
+            if self._ground_ready:
+                print("Ground (dalla cache, memory-mapped)...")
+            else:
+                print("Ground (campo ocra a impasto, concentrazioni KM)...")
+                with prof.phase('ground'):
+                    self.ground()
+                # velatura di ammorbidimento sull'imprimitura (come v7)
+                with prof.phase('glaze'):
+                    self.cv.glaze(14.0)
+                if self.ground_cache is not None:
+                    ground_to_cache(self.ground_cache, self._recipe, self.cv)
+            print("Barline (velature verticali)...")
+            with prof.phase('barlines'):
+                self.barlines()
+            if self._ckpt is not None:
+                marks_base(self, self._ckpt)
         print("Segni del riff (mapping v2)...")
-        self.riff_marks()
+        with prof.phase('riff_marks'):
+            self.riff_marks(*resume[:2] if resume else ())
         print("Relief lighting (KM → RGB, tela nel rilievo)...")
-        img = self.cv.render()
-        img.save(out, dpi=(150, 150))
+        dpi = (150 * self.cv.scale,) * 2           # stessa misura in stampa
+        if tile_rows:
+            with prof.phase('render_save'):
+                self.cv.render_to(out, tile_rows=tile_rows, bits=bits, dpi=dpi,
+                                  shadows=shadows)
+        else:
+            with prof.phase('render'):
+                img = self.cv.render(shadows=shadows,
+                                     workers=self.render_workers)
+            with prof.phase('save'):
+                img.save(out, dpi=dpi)
+        if turntable:
+            with prof.phase('turntable'):
+                save_turntable(self.cv, out, turntable, dpi, shadows=shadows)
+        if self.cv.sched:
+            print("  " + stroke_sched.summary(self.cv.sched, self.cv.threads))
+        if self.cv.journal is not None:
+            print("  " + journal_note(self.cv))
         print(f"\nArtwork v8 salvato: {out}")
 
 
+# ═══════════════════════════════════════════════════════════════════════════
+# layout 'timeline' — il mapping v2 della v8 compilato (stroke_map)
+# ═══════════════════════════════════════════════════════════════════════════
+# pennellate per ripetizione, per codice di tecnica
+_TL_SUB = np.zeros(len(TECH), np.int64)
+for _k, _n in dict(staccato=1, legato=1, slide=3, bend=1, hammer_on=2,
+                   vibrato=1, double_stop=2, double_stop_final=2).items():
+    _TL_SUB[TECH[_k]] = _n
+# slide: tre fili (offset ⟂ in larghezze, opacità, larghezza)
+_TL_SLIDE = np.array([(-0.55, 0.72, 0.34),
+                      (0.0, 1.0, 0.70),
+                      (0.55, 0.68, 0.30)])
+
+
+@layout('timeline')
+def timeline_layout(eng: ZornOilPaintingV8,
+                    sc: Score) -> Dict[str, np.ndarray]:
+    """Beat → X, media delle voci → Y, direzione melodica → angolo ±35°,
+    un gesto per tecnica; _N_REP passate per nota col jitter della mano."""
+    tech, t, d, vel = sc.tech, sc.t, sc.d, sc.vel
+    E, q, nrep = len(t), eng.q, eng.q.reps(eng._N_REP)
+    conc = conc_lut(note_conc)
+    x0 = eng._tx(t)
+    v0, v1 = sc.voice(0), sc.voice(1)
+    y0 = eng._ty((v0 + v1) / 2)
+    width = lut(VEL_WIDTH, VELS)[vel] * eng._shuffle_w(t)
+    # quality: meno/più ripetizioni, stessa copertura (quality.py)
+    thick = np.array([q.rep_thickness(VEL_THICK[v], eng._N_REP)
+                      for v in VELS])[vel]
+    opac = np.array([q.rep_opacity(VEL_OPAC[v], eng._N_REP)
+                     for v in VELS])[vel]
+    dry = eng._dry(t)
+    length = np.maximum(d * eng.ppb * lut(K_TECH, TECHS, 0.85)[tech],
+                        width * 1.05)
+    # angolo = direzione melodica verso la nota successiva
+    dir_ang = np.zeros(E)
+    dir_ang[:-1] = np.clip(np.arctan2(np.diff(y0), np.diff(x0)),
+                           -MAX_ANG, MAX_ANG)
+
+    # jitter per passata, nell'ordine storico: x, y, angolo (+ curvatura
+    # del legato)
+    nd = 3 + (tech == TECH['legato'])
+    er, r = expand(np.full(E, nrep))                     # (evento, passata)
+    zo = (np.cumsum(nrep * nd) - nrep * nd)[er] + r * nd[er]
+    z = gauss(random, int((nrep * nd).sum()))
+    x = x0[er] + z[zo] * eng._J_POS
+    y = y0[er] + z[zo + 1] * eng._J_POS
+    aj = z[zo + 2] * eng._J_ANG
+
+    p, j = expand(_TL_SUB[tech[er]])                     # (passata, gesto)
+    e, tk, aj = er[p], tech[er[p]], aj[p]
+    o = {k: np.full(len(e), v) for k, v in OilCanvas.STROKE_DEFAULTS.items()}
+    o.update(x=x[p], y=y[p], angle=math.radians(-30) + aj, length=length[e],
+             width=width[e], conc=conc[v0[e]], opacity=opac[e],
+             thickness=thick[e], dryness=dry[e], event=e)
+
+    def put(m, **cols):
+        for k, v in cols.items():
+            o[k][m] = v
+
+    m = tk == TECH['staccato']
+    put(m, smear=0.08, taper_end=0.52)
+
+    m = tk == TECH['legato']
+    put(m, angle=dir_ang[e[m]] + aj[m], curvature=z[zo[p[m]] + 3] * 0.10,
+        smear=0.10, taper_end=0.70)
+
+    # slide: ESATTAMENTE dal (x,y) della nota al y del slide_to
+    m = tk == TECH['slide']
+    em = e[m]
+    rise = eng._ty(sc.slide_to.data[em]) - y0[em]
+    run = d[em] * eng.ppb
+    s_ang = np.arctan2(rise, run)
+    off, om, wf = _TL_SLIDE[j[m]].T
+    put(m, x=o['x'][m] + -np.sin(s_ang) * off * width[em],
+        y=o['y'][m] + np.cos(s_ang) * off * width[em],
+        angle=s_ang + aj[m], length=np.hypot(run, rise),
+        width=width[em] * wf, opacity=opac[em] * om,
+        thickness=thick[em] * 0.8, dryness=dry[em] + 0.10, smear=0.06,
+        taper_end=0.72)
+
+    # bend: curvatura ∝ semitoni; il tratto si alza di bend*semipx
+    m = tk == TECH['bend']
+    em = e[m]
+    semi = sc.bend.data[em]
+    rise = semi * eng.semipx
+    blen = np.maximum(np.maximum(length[em], rise * 1.55), 60.0)
+    curv = -0.65 * semi                                  # 2 semitoni → -1.3
+    mean = np.arcsin(np.clip(-rise / blen, -0.95, 0.95))
+    put(m, angle=mean - curv / 2 + aj[m], length=blen,
+        width=width[em] * 0.82, curvature=curv, smear=0.07, taper_end=0.60)
+
+    # hammer-on: dab sulla nota + tratto verso hammer_to
+    m = (tk == TECH['hammer_on']) & (j == 0)
+    put(m, length=width[e[m]] * 1.3, width=width[e[m]] * 0.9, smear=0.06,
+        taper_end=0.50)
+    m = (tk == TECH['hammer_on']) & (j == 1)
+    em = e[m]
+    to = sc.hammer_to.data[em]
+    rise = eng._ty(to) - y0[em]
+    run = d[em] * eng.ppb
+    put(m, angle=np.arctan2(rise, run) + aj[m], length=np.hypot(run, rise),
+        width=width[em] * 0.7, conc=conc[to], opacity=opac[em] * 0.92,
+        thickness=thick[em] * 0.8, dryness=dry[em] + 0.08, smear=0.10,
+        taper_end=0.70)
+
+    m = tk == TECH['vibrato']
+    put(m, angle=dir_ang[e[m]] + aj[m], waviness=9.0, wave_freq=5.0,
+        smear=0.07, taper_end=0.56)
+
+    # double-stop: una pennellata per voce, al suo Y col suo colore; la
+    # superiore wet-on-wet (smear 0.5)
+    final = tk == TECH['double_stop_final']
+    m = (tk == TECH['double_stop']) | final
+    em, jm, fm = e[m], j[m], final[m]
+    mid = np.where(jm == 0, v0[em], v1[em])
+    put(m, y=eng._ty(mid) + (o['y'][m] - y0[em]), conc=conc[mid],
+        thickness=np.where(fm, 1.30, thick[em]),
+        waviness=np.where(fm, 8.0, 0.0), wave_freq=4.0,
+        smear=np.where(jm == 0, 0.10, 0.50),
+        taper_end=np.where(fm, 0.60, 0.52))
+    return o
+
+
 if __name__ == '__main__':
     import argparse
     p = argparse.ArgumentParser(
         description='guitarzorn v8 — KM 4 pigmenti + aratura + mapping v2')
     p.add_argument('--seed', type=int, default=42)
     p.add_argument('--out', default='johnny_b_goode_zorn_v8.png')
+    p.add_argument('--kernel', choices=OilCanvas.KERNELS, default='fast',
+                   help="kernel di pennellata ('reference' = loop storico)")
+    p.add_argument('--ground-cache', nargs='?', const=GroundCache.DEFAULT_ROOT,
+                   metavar='DIR', help='cache su disco dell\'imprimitura')
+    p.add_argument('--ground-cache-mb', type=int, default=2048)
+    p.add_argument('--storage', choices=OilCanvas.STORAGES,
+                   default='float32', help='memoria della tela (compatta: '
+                   'u16/f16 planare)')
+    p.add_argument('--rng', choices=OilCanvas.RNG_MODES, default='stream',
+                   help="rumore per pennellata ('counter' = Philox per indice)")
+    p.add_argument('--noise', choices=OilCanvas.NOISES, default='bank',
+                   help="'bank' = finestre della banca del seed, "
+                        "'synth' = sintesi per pennellata (storico)")
+    p.add_argument('--ground-level', type=int, choices=GROUND_LEVELS,
+                   help='imprimitura su uno strato a 1/2^N della '
+                   'risoluzione (1 = metà, 2 = quarto; default: quello '
+                   'di --quality, 0 tranne draft)')
+    p.add_argument('--stroke-threads', type=int, default=0, metavar='T',
+                   help='pennellate con bbox disgiunti su T thread '
+                        '(stesso quadro; 0 = in serie)')
+    p.add_argument('--render-workers', type=int, default=0, metavar='N',
+                   help='render a bande di righe su N thread (stesso '
+                        'quadro; senza --tile-rows)')
+    p.add_argument('--checkpoints', nargs='?',
+                   const=CheckpointStore.DEFAULT_ROOT, metavar='DIR',
+                   help='checkpoint per battuta: dopo una modifica alla '
+                        'partitura riparte dalla prima battuta cambiata')
+    p.add_argument('--checkpoint-mb', type=int, default=2048)
+    p.add_argument('--checkpoint-every', type=int, default=None, metavar='N',
+                   help='un checkpoint ogni N eventi invece che per battuta')
+    p.add_argument('--checkpoint-exact', action='store_true',
+                   help='checkpoint in float32 (ripresa identica bit per '
+                        'bit; default quantizzati)')
+    p.add_argument('--journal', metavar='PATH',
+                   help='diario delle pennellate (niente cache né '
+                        'checkpoint): rifattibile con --replay; col proxy '
+                        'a.zj → a.preview.zj')
+    p.add_argument('--replay', metavar='PATH',
+                   help='rifà il quadro da un diario invece che dalla '
+                        'partitura')
+    p.add_argument('--replay-scale', type=float, default=None, metavar='S',
+                   help='con --replay: scala della tela (default: quella '
+                        'registrata)')
+    p.add_argument('--replay-upto', type=int, default=None, metavar='K',
+                   help='con --replay: solo le prime K pennellate')
+    p.add_argument('--profile', nargs='?', const='', metavar='JSON',
+                   help='report per fase (default: <out>.profile.json)')
+    p.add_argument('--profile-cprofile', metavar='DIR',
+                   help='con --profile: un dump cProfile per fase in DIR')
+    p.add_argument('--preview', type=float, default=None, metavar='S',
+                   help='proxy a scala S (es. 0.25) → <out>.preview.png')
+    p.add_argument('--progressive', action='store_true',
+                   help='prima il proxy (--preview, default 0.25), poi la '
+                        'piena risoluzione')
+    p.add_argument('--tile-rows', type=int, default=None,
+                   help='render a bande di N righe, PNG in streaming')
+    p.add_argument('--bits', type=int, choices=(8, 16), default=8,
+                   help='profondità del PNG a bande (16 = stampa)')
+    p.add_argument('--turntable', type=int, default=0, metavar='N',
+                   help='anche N luci radenti → <out>.lightNN.png')
+    p.add_argument('--shadows', action='store_true',
+                   help="ombre portate dell'impasto (scansione d'orizzonte)")
+    p.add_argument('--quality', choices=QUALITIES, default='standard',
+                   help='densità di setole, campioni e ripetizioni '
+                        '(draft per le anteprime, final/print per le consegne)')
     args = p.parse_args()
-    ZornOilPaintingV8(seed=args.seed).create(out=args.out)
+    if args.replay:
+        replay_to(args.replay, args.out, scale=args.replay_scale,
+                  upto=args.replay_upto, tile_rows=args.tile_rows,
+                  bits=args.bits, shadows=args.shadows,
+                  workers=args.render_workers)
+        raise SystemExit(0)
+    gc = (GroundCache(args.ground_cache, args.ground_cache_mb << 20)
+          if args.ground_cache else None)
+    ck = (CheckpointStore(args.checkpoints, exact=args.checkpoint_exact,
+                          max_bytes=args.checkpoint_mb << 20)
+          if args.checkpoints else None)
+    scales = preview_scales(args.preview, args.progressive)
+    for scale in scales:
+        out = preview_path(args.out, scale)
+        # un diario per scala, come il PNG: il proxy non sovrascrive
+        journal = args.journal and preview_path(args.journal, scale)
+        prof = PhaseProfiler(enabled=args.profile is not None,
+                             cprofile_dir=args.profile_cprofile)
+        eng = ZornOilPaintingV8(seed=args.seed, kernel=args.kernel,
+                                ground_cache=gc, storage=args.storage,
+                                rng_mode=args.rng, scale=scale,
+                                noise=args.noise,
+                                ground_level=args.ground_level,
+                                quality=args.quality,
+                                stroke_threads=args.stroke_threads,
+                                render_workers=args.render_workers,
+                                checkpoints=ck,
+                                checkpoint_every=args.checkpoint_every,
+                                journal=journal)
+        eng.create(out=out, tile_rows=args.tile_rows, bits=args.bits,
+                   profile=prof, turntable=args.turntable,
+                   shadows=args.shadows)
+        prof.write(args.profile if args.profile and scale == scales[-1]
+                   else out.rsplit('.', 1)[0] + '.profile.json')
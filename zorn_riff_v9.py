@@ -30,13 +30,27 @@ fisica della mano (tremolio, setole, jitter di ripetizione).
 
 import math
 import random
+from typing import Dict, Optional
 
 import numpy as np
 
-from zorn_riff_v8 import (OilCanvas, blur, mixc, note_conc,
+from ground_cache import GroundCache
+from zorn_profile import PhaseProfiler
+from checkpoints import CheckpointStore
+from zorn_riff_v8 import (OilCanvas, mixc, note_conc, paint_ground,
+                          GROUND_LEVELS, QUALITIES, preset,
+                          ground_recipe, ground_from_cache, ground_to_cache,
+                          marks_base, marks_paint, marks_recipe,
+                          marks_resume, marks_resume_note,
+                          preview_path, preview_scales, save_turntable,
+                          journal_note, replay_to,
                           OCHRE, VERM, BLACK, WHITE,
                           VEL_WIDTH, VEL_THICK, VEL_OPAC, K_TECH)
-from score import JOHNNY_B_GOODE_INTRO, pitch_class
+from stroke_map import (TECH, TECHS, compile_score, conc_lut, expand,
+                        gauss, layout, lut)
+from score import (JOHNNY_B_GOODE_INTRO, VELOCITIES as VELS, Score,
+                   pitch_class)
+import stroke_sched
 
 
 def _wrap(a: float) -> float:
@@ -62,24 +76,66 @@ class ZornMelodicWalk:
     _J_POS = 3.5
     _J_ANG = 0.04
 
-    def __init__(self, seed: int = 42):
+    def __init__(self, seed: int = 42, kernel: str = 'fast',
+                 ground_cache: Optional[GroundCache] = None,
+                 storage: str = 'float32', rng_mode: str = 'stream',
+                 scale: float = 1.0, noise: str = 'bank',
+                 ground_level: Optional[int] = None,
+                 quality: str = 'standard',
+                 stroke_threads: int = 0,
+                 render_workers: int = 0,
+                 checkpoints: Optional[CheckpointStore] = None,
+                 checkpoint_every: Optional[int] = None,
+                 journal: Optional[str] = None):
         random.seed(seed)
         bg = mixc(mixc(OCHRE, WHITE, 0.35), VERM, 0.012)
-        self.cv = OilCanvas(self.W, self.H, bg, seed)
 
+        # con la cache: ground già steso (e rng già avanzati) se presente
+        self.ground_cache = ground_cache
+        self.q = preset(quality)
+        self.ground_level = (self.q.ground if ground_level is None
+                             else ground_level)
+        self._recipe = ground_recipe(self, bg, seed, kernel, storage, rng_mode,
+                                     scale, noise, self.ground_level,
+                                     self.q.name)
+        self.cv, self._ground_ready = None, False
+        # il diario parte dalla tela nuda: niente ground dalla cache
+        if ground_cache is not None and journal is None:
+            self.cv = ground_from_cache(ground_cache, self._recipe)
+            self._ground_ready = self.cv is not None
+        if self.cv is None:
+            self.cv = OilCanvas(self.W, self.H, bg, seed, kernel=kernel,
+                                storage=storage, rng_mode=rng_mode,
+                                scale=scale, noise=noise, quality=self.q)
+        # deposito su thread dove i bbox non si toccano: stesso quadro
+        self.cv.threads = stroke_threads
+        self.render_workers = render_workers    # render a bande su thread
+        # checkpoint per battuta (o ogni checkpoint_every eventi) dei segni
+        self.checkpoint_every = checkpoint_every
+        self._ckpt = (checkpoints.run(marks_recipe(self))
+                      if checkpoints is not None and journal is None
+                      else None)
+        # diario delle pennellate (stroke_journal): il quadro rifattibile
+        # a qualunque scala con OilCanvas.replay
+        if journal is not None:
+            self.cv.record(journal)
+
+        self.score = Score.from_events(JOHNNY_B_GOODE_INTRO)
         # stato della passeggiata
         self.x = self.W * 0.15
         self.y = self.H * 0.70
         self.theta = math.radians(-16.0)   # partenza: verso destra, un filo su
+        # (bx, by, ang, cluster_k, repeating) per evento, da walk_layout
+        self.path = None
 
     # ── dinamiche condivise col v8 ──────────────────────────────────────────
     @staticmethod
-    def _dry(t: float) -> float:
-        return 0.28 if (t % 1.0) < 0.05 else 0.52
+    def _dry(t):
+        return np.where(np.mod(t, 1.0) < 0.05, 0.28, 0.52)
 
     @staticmethod
-    def _shuffle_w(t: float) -> float:
-        return 1.15 if (t % 1.0) < 0.5 else 0.85
+    def _shuffle_w(t):
+        return np.where(np.mod(t, 1.0) < 0.5, 1.15, 0.85)
 
     # ── sterzo dolce verso il centro (deterministico) ───────────────────────
     def _steer(self):
@@ -102,32 +158,19 @@ class ZornMelodicWalk:
         self.x = max(self.MARGIN, min(self.W - self.MARGIN, self.x))
         self.y = max(self.MARGIN, min(self.H - self.MARGIN, self.y))
 
-    # ── il gesto di una nota (con ripetizioni "mano che ritorna") ──────────
-    def _mark(self, x, y, ang, length, width, conc, opacity, thickness,
-              curvature=0.0, waviness=0.0, wave_freq=4.0,
-              dryness=0.4, smear=0.10, taper_end=0.55):
-        for _ in range(self._N_REP):
-            self.cv.stroke(
-                x + random.gauss(0, self._J_POS),
-                y + random.gauss(0, self._J_POS),
-                ang + random.gauss(0, self._J_ANG),
-                length, width, conc,
-                opacity=opacity, thickness=thickness,
-                curvature=curvature, waviness=waviness, wave_freq=wave_freq,
-                dryness=dryness, smear=smear, taper_end=taper_end)
-
     # ── ground: riusa lo stile v8 ───────────────────────────────────────────
     def ground(self):
         base_cols = [
             mixc(OCHRE, WHITE, 0.16), OCHRE, OCHRE,
             mixc(OCHRE, BLACK, 0.022), mixc(OCHRE, VERM, 0.030),
         ]
+        rows = []
         y = -20.0
         while y < self.H + 20:
             x = random.uniform(-300, -80)
             while x < self.W + 50:
                 L = random.uniform(350, 700)
-                self.cv.stroke(
+                rows.append(dict(
                     x=x, y=y + random.gauss(0, 6),
                     angle=random.gauss(0.0, 0.04),
                     length=L, width=random.uniform(40, 70),
@@ -137,13 +180,13 @@ class ZornMelodicWalk:
                     curvature=random.gauss(0, 0.04),
                     dryness=random.uniform(0.55, 0.78),
                     smear=random.uniform(0.20, 0.38),
-                    taper_end=random.uniform(0.50, 0.80))
+                    taper_end=random.uniform(0.50, 0.80)))
                 x += L * random.uniform(0.65, 0.90)
             y += random.uniform(30, 46)
         for col, count in [(mixc(OCHRE, WHITE, 0.30), 8),
                            (mixc(OCHRE, VERM, 0.035), 6)]:
             for _ in range(count):
-                self.cv.stroke(
+                rows.append(dict(
                     x=random.uniform(0, self.W), y=random.uniform(0, self.H),
                     angle=random.gauss(0.0, 0.08),
                     length=random.uniform(120, 280),
@@ -153,170 +196,371 @@ class ZornMelodicWalk:
                     curvature=random.gauss(0, 0.10),
                     dryness=random.uniform(0.60, 0.85),
                     smear=random.uniform(0.25, 0.45),
-                    taper_end=random.uniform(0.6, 0.92))
+                    taper_end=random.uniform(0.6, 0.92)))
+        paint_ground(self.cv, rows, self.ground_level)
 
     # ── la passeggiata ──────────────────────────────────────────────────────
-    def walk(self):
-        evs = JOHNNY_B_GOODE_INTRO
-        prev_end = 0.0
-        prev_bar = 0
-        prev_pitches = None
-        cluster_k = 0
-        cluster_anchor = None
-        phrase_sign = 1.0
-
-        for i, e in enumerate(evs):
-            notes = sorted(e.get('dyad') or [e['midi']])
-            tech = e['tech']
-            vel = e['vel']
-            t, d = e['t'], e['d']
-
-            # pausa → il cammino avanza in silenzio (tela nuda)
-            gap = t - prev_end
-            if gap > 0.05:
-                self._advance(gap * self.L_BEAT * 0.5)
-                self._steer()
-
-            # cambio battuta → svolta di fraseggio (alternata)
-            bar = int(t // 4)
-            if bar > prev_bar:
-                self.theta = _wrap(self.theta + phrase_sign * self.PHRASE_TURN)
-                phrase_sign = -phrase_sign
-                prev_bar = bar
-
-            # ripetizione (stesso contenuto) → rosetta, non avanzare
-            pitches = tuple(notes)
-            repeating = (pitches == prev_pitches
-                         and tech.startswith('double_stop'))
-            if repeating:
-                cluster_k += 1
-            else:
-                cluster_k = 0
-                cluster_anchor = (self.x, self.y)
-
-            # parametri materia (mapping v2)
-            width0 = VEL_WIDTH[vel] * self._shuffle_w(t) * 1.15
-            thick = VEL_THICK[vel]
-            opac = VEL_OPAC[vel]
-            dry = self._dry(t)
-            L = d * self.L_BEAT * K_TECH.get(tech, 0.8)
-
-            # rosetta a girasole per le ripetizioni: r∝√k, angolo aureo
-            if repeating and cluster_anchor is not None:
-                ga = cluster_k * 2.39996
-                r = width0 * 0.88 * math.sqrt(cluster_k)
-                bx = cluster_anchor[0] + r * math.cos(ga)
-                by = cluster_anchor[1] + r * math.sin(ga)
-                ang = self.theta + math.sin(cluster_k * 2.4) * 0.30
-                thick *= (1.0 + 0.06 * cluster_k)      # l'impasto si accumula
-            else:
-                bx, by = self.x, self.y
-                ang = self.theta
-
-            names = '+'.join(pitch_class(m) for m in notes)
-            print(f"  [{i+1:2d}/{len(evs)}] t={t:6.3f} {names:5s} {tech:18s} "
-                  f"P=({bx:6.0f},{by:6.0f}) θ={math.degrees(ang):6.1f}°"
-                  f"{'  ⟲' + str(cluster_k) if repeating else ''}")
-
-            # ── il gesto, per ogni voce del dyad ────────────────────────────
-            n_lo, n_hi = notes[0], notes[-1]
-            for vi, midi in enumerate(notes):
-                conc = note_conc(midi)
-                # voci del dyad separate perpendicolarmente al cammino
-                if len(notes) > 1:
-                    off = (midi - (n_lo + n_hi) / 2) * self.DYAD_SEP
-                    ox = bx + math.sin(ang) * off      # voce acuta sopra
-                    oy = by - math.cos(ang) * off
-                else:
-                    ox, oy = bx, by
-                smear = 0.5 if (len(notes) > 1 and vi == 1) else 0.10
-
-                if tech == 'staccato':
-                    self._mark(ox, oy, ang, max(26, L), width0, conc,
-                               opac, thick * 1.05, dryness=0.42,
-                               smear=smear, taper_end=0.35)
-                elif tech == 'legato':
-                    self._mark(ox, oy, ang, L, width0, conc,
-                               opac, thick, dryness=dry,
-                               smear=smear, taper_end=0.70)
-                elif tech == 'slide':
-                    # lo slide accelera: tratto pieno, coda lunga
-                    self._mark(ox, oy, ang, L, width0 * 0.9, conc,
-                               opac, thick, dryness=0.50,
-                               smear=smear, taper_end=0.82)
-                elif tech == 'bend':
-                    semis = e.get('bend', 2)
-                    self._mark(ox, oy, ang, L, width0 * 0.82, conc,
-                               opac, thick * 1.15,
-                               curvature=-0.65 * semis,
-                               dryness=0.30, smear=smear, taper_end=0.55)
-                elif tech == 'vibrato':
-                    self._mark(ox, oy, ang, L, width0 * 0.85, conc,
-                               opac, thick,
-                               waviness=9.0, wave_freq=5.0,
-                               dryness=dry, smear=smear, taper_end=0.55)
-                elif tech == 'hammer_on':
-                    # dab + frustata verso la nota martellata
-                    self._mark(ox, oy, ang, max(22, L * 0.5), width0, conc,
-                               opac, thick * 1.1, dryness=0.30,
-                               smear=smear, taper_end=0.4)
-                    to = e.get('hammer_to', midi + 1)
-                    a2 = _wrap(ang - (to - midi) * self.SEMI_TURN * 2)
-                    self._mark(ox + 10 * math.cos(ang), oy + 10 * math.sin(ang),
-                               a2, L * 0.7, width0 * 0.55,
-                               note_conc(to), opac * 0.9, thick * 0.8,
-                               dryness=0.45, smear=smear, taper_end=0.8)
-                elif tech.startswith('double_stop'):
-                    if tech == 'double_stop_final':
-                        self._mark(ox, oy, ang, L, width0 * 1.1, conc,
-                                   opac, thick * 1.30,
-                                   waviness=7.0, wave_freq=4.0,
-                                   dryness=0.22, smear=smear, taper_end=0.6)
-                    else:
-                        self._mark(ox, oy, ang, max(24, L), width0, conc,
-                                   opac, thick, dryness=0.40,
-                                   smear=smear, taper_end=0.45)
-                else:
-                    self._mark(ox, oy, ang, L, width0, conc, opac, thick,
-                               dryness=dry, smear=smear)
-
-            # ── avanzamento + svolta melodica ───────────────────────────────
-            if not repeating:
-                curv = -0.65 * e.get('bend', 0) if tech == 'bend' else 0.0
-                self._advance(L * 0.92, ang + curv * 0.5)
-                self._advance(8)                      # respiro tra i gesti
-            elif tech == 'double_stop_final':
-                self._advance(L * 0.9)
-
-            # svolta = intervallo verso la prossima nota
-            if i + 1 < len(evs):
-                nxt = sorted(evs[i + 1].get('dyad') or [evs[i + 1]['midi']])
-                iv = nxt[-1] - notes[-1]
-                turn = max(-self.MAX_TURN,
-                           min(self.MAX_TURN, iv * self.SEMI_TURN))
-                self.theta = _wrap(self.theta - turn)   # salita = verso l'alto
-            self._steer()
-
-            prev_end = t + d
-            prev_pitches = pitches
-
-    def create(self, out: str = 'johnny_b_goode_zorn_v9.png'):
-        print("Ground (campo ocra, concentrazioni KM)...")
-        self.ground()
-        self.cv.conc = np.clip(blur(self.cv.conc, 14.0), 0, 1)
+    def walk(self, tab: Optional[Dict[str, np.ndarray]] = None,
+             start: int = 0):
+        """tab/start → la tabella già compilata (il cammino è già fatto)
+        e le pennellate già dipinte (ripresa da un checkpoint)."""
+        if tab is None:
+            tab = compile_score(self.score, 'walk', self)
+        self._log_events()
+        print(f"  {len(self.score)} eventi → {len(tab['x'])} "
+              f"pennellate, arrivo P=({self.x:.0f},{self.y:.0f}) "
+              f"θ={math.degrees(self.theta):.1f}°")
+        marks_paint(self, self._ckpt, tab, start, self.checkpoint_every)
+
+    def _log_events(self):
+        """Una riga per evento: note, tecnica, punto e direzione del
+        cammino (⟲k nelle rosette), dal cammino di walk_layout."""
+        evs = self.score.to_events()
+        for i, (e, bx, by, ang, ck, rep) in enumerate(zip(evs, *self.path)):
+            names = '+'.join(pitch_class(m)
+                             for m in sorted(e.get('dyad') or [e['midi']]))
+            print(f"  [{i+1:2d}/{len(evs)}] t={e['t']:6.3f} {names:5s} "
+                  f"{e['tech']:18s} P=({bx:6.0f},{by:6.0f}) "
+                  f"θ={math.degrees(ang):6.1f}°{'  ⟲' + str(ck) if rep else ''}")
+
+    def create(self, out: str = 'johnny_b_goode_zorn_v9.png',
+               tile_rows: Optional[int] = None, bits: int = 8,
+               profile: Optional[PhaseProfiler] = None, turntable: int = 0,
+               shadows: bool = False):
+        """tile_rows → render a bande in streaming (memoria limitata).
+        profile → PhaseProfiler: tempi, memoria e pennellate per fase.
+        turntable → anche N varianti a luce radente (save_turntable).
+        shadows → ombre portate dell'impasto (OilCanvas._horizon_shadow)."""
+        prof = profile or PhaseProfiler()
+        if prof.canvas_stats is None:
+            prof.canvas_stats = lambda: self.cv.stats
+        resume = None
+        if self._ckpt is not None:
+            with prof.phase('resume'):
+                resume = marks_resume(self, self._ckpt, 'walk')
+        if resume:
+            print(marks_resume_note(self, *resume))
+        elif self._ground_ready:
+            print("Ground (dalla cache, memory-mapped)...")
+        else:
+            print("Ground (campo ocra, concentrazioni KM)...")
+            with prof.phase('ground'):
+                self.ground()
+            with prof.phase('glaze'):
+                self.cv.glaze(14.0)
+            if self.ground_cache is not None:
+                ground_to_cache(self.ground_cache, self._recipe, self.cv)
+        if self._ckpt is not None and not resume:
+            marks_base(self, self._ckpt)
         print("La passeggiata melodica...")
-        self.walk()
+        with prof.phase('walk'):
+            self.walk(*resume[:2] if resume else ())
         print("Relief lighting (KM → RGB, tela nel rilievo)...")
-        img = self.cv.render()
-        img.save(out, dpi=(150, 150))
+        dpi = (150 * self.cv.scale,) * 2           # stessa misura in stampa
+        if tile_rows:
+            with prof.phase('render_save'):
+                self.cv.render_to(out, tile_rows=tile_rows, bits=bits, dpi=dpi,
+                                  shadows=shadows)
+        else:
+            with prof.phase('render'):
+                img = self.cv.render(shadows=shadows,
+                                     workers=self.render_workers)
+            with prof.phase('save'):
+                img.save(out, dpi=dpi)
+        if turntable:
+            with prof.phase('turntable'):
+                save_turntable(self.cv, out, turntable, dpi, shadows=shadows)
+        if self.cv.sched:
+            print("  " + stroke_sched.summary(self.cv.sched, self.cv.threads))
+        if self.cv.journal is not None:
+            print("  " + journal_note(self.cv))
         print(f"\nArtwork v9 salvato: {out}")
 
 
+def _wrap_many(a: np.ndarray) -> np.ndarray:
+    """_wrap su un array (stesse sottrazioni, elemento per elemento)."""
+    a = np.array(a, np.float64)
+    while (a > math.pi).any():
+        a = np.where(a > math.pi, a - 2 * math.pi, a)
+    while (a <= -math.pi).any():
+        a = np.where(a <= -math.pi, a + 2 * math.pi, a)
+    return a
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# layout 'walk' — la passeggiata compilata (stroke_map)
+# ═══════════════════════════════════════════════════════════════════════════
+# gesti per voce, per codice di tecnica
+_WK_SUB = np.ones(len(TECH), np.int64)
+_WK_SUB[TECH['hammer_on']] = 2
+
+
+def _walk_path(eng: ZornMelodicWalk, sc: Score,
+               L: np.ndarray, width0: np.ndarray):
+    """Il cammino, evento per evento (stato x, y, θ: solo scalari).
+
+    → (bx, by, ang, cluster_k, repeating) per evento; eng.x, eng.y,
+    eng.theta restano al punto d'arrivo.
+    """
+    E = len(L)
+    t, d, tech = sc.t.tolist(), sc.d.tolist(), sc.tech.tolist()
+    lo = np.minimum(sc.voice(0), sc.voice(1)).tolist()
+    hi = np.maximum(sc.voice(0), sc.voice(1)).tolist()
+    nv = sc.nv.tolist()
+    bend = sc.bend.filled(0).tolist()
+    L, width0 = L.tolist(), width0.tolist()
+    ds = {TECH['double_stop'], TECH['double_stop_final']}
+    bx, by, ang = np.empty(E), np.empty(E), np.empty(E)
+    ck, rep = np.zeros(E, np.int64), np.zeros(E, bool)
+    prev_end, prev_bar, prev_pitches = 0.0, 0, None
+    cluster_k, cluster_anchor, phrase_sign = 0, None, 1.0
+
+    for i in range(E):
+        # pausa → il cammino avanza in silenzio (tela nuda)
+        gap = t[i] - prev_end
+        if gap > 0.05:
+            eng._advance(gap * eng.L_BEAT * 0.5)
+            eng._steer()
+
+        # cambio battuta → svolta di fraseggio (alternata)
+        bar = int(t[i] // 4)
+        if bar > prev_bar:
+            eng.theta = _wrap(eng.theta + phrase_sign * eng.PHRASE_TURN)
+            phrase_sign = -phrase_sign
+            prev_bar = bar
+
+        # ripetizione (stesso contenuto) → rosetta, non avanzare
+        pitches = (lo[i], hi[i], nv[i])
+        repeating = pitches == prev_pitches and tech[i] in ds
+        if repeating:
+            cluster_k += 1
+        else:
+            cluster_k = 0
+            cluster_anchor = (eng.x, eng.y)
+
+        # rosetta a girasole per le ripetizioni: r∝√k, angolo aureo
+        if repeating and cluster_anchor is not None:
+            ga = cluster_k * 2.39996
+            r = width0[i] * 0.88 * math.sqrt(cluster_k)
+            bx[i] = cluster_anchor[0] + r * math.cos(ga)
+            by[i] = cluster_anchor[1] + r * math.sin(ga)
+            ang[i] = eng.theta + math.sin(cluster_k * 2.4) * 0.30
+        else:
+            bx[i], by[i], ang[i] = eng.x, eng.y, eng.theta
+        ck[i], rep[i] = cluster_k, repeating
+
+        # avanzamento + svolta melodica
+        if not repeating:
+            curv = -0.65 * bend[i] if tech[i] == TECH['bend'] else 0.0
+            eng._advance(L[i] * 0.92, ang[i] + curv * 0.5)
+            eng._advance(8)                           # respiro tra i gesti
+        elif tech[i] == TECH['double_stop_final']:
+            eng._advance(L[i] * 0.9)
+
+        # svolta = intervallo verso la prossima nota
+        if i + 1 < E:
+            iv = hi[i + 1] - hi[i]
+            turn = max(-eng.MAX_TURN, min(eng.MAX_TURN, iv * eng.SEMI_TURN))
+            eng.theta = _wrap(eng.theta - turn)       # salita = verso l'alto
+        eng._steer()
+
+        prev_end = t[i] + d[i]
+        prev_pitches = pitches
+    return bx, by, ang, ck, rep
+
+
+@layout('walk')
+def walk_layout(eng: ZornMelodicWalk,
+                sc: Score) -> Dict[str, np.ndarray]:
+    """Ogni nota parte dove finisce la precedente; il cammino è
+    sequenziale (_walk_path), i gesti per voce sono vettoriali."""
+    tech, t, vel = sc.tech, sc.t, sc.vel
+    q = eng.q
+    conc = conc_lut(note_conc)
+    lo = np.minimum(sc.voice(0), sc.voice(1))
+    hi = np.maximum(sc.voice(0), sc.voice(1))
+    # parametri materia (mapping v2)
+    width0 = lut(VEL_WIDTH, VELS)[vel] * eng._shuffle_w(t) * 1.15
+    L = sc.d * eng.L_BEAT * lut(K_TECH, TECHS, 0.8)[tech]
+    bx, by, ang, ck, rep = eng.path = _walk_path(eng, sc, L, width0)
+    thick = lut(VEL_THICK, VELS)[vel]
+    thick = np.where(rep, thick * (1.0 + 0.06 * ck), thick)  # l'impasto si accumula
+    opac = lut(VEL_OPAC, VELS)[vel]
+    dry = eng._dry(t)
+
+    # gesti: evento → voce → gesto; ogni gesto reps(_N_REP) passate
+    ev, vi = expand(sc.nv)
+    g, j = expand(_WK_SUB[tech[ev]])
+    e, v, tk = ev[g], vi[g], tech[ev[g]]
+    midi = np.where(v == 0, lo[e], hi[e])
+    dyad = sc.nv[e] > 1
+    # voci del dyad separate perpendicolarmente al cammino (acuta sopra)
+    off = np.where(dyad, (midi - (lo[e] + hi[e]) / 2) * eng.DYAD_SEP, 0.0)
+    a = ang[e]
+    ox = np.where(dyad, bx[e] + np.sin(a) * off, bx[e])
+    oy = np.where(dyad, by[e] - np.cos(a) * off, by[e])
+    Lg, w0 = L[e], width0[e]
+    o = dict(x=ox, y=oy, angle=a, length=Lg.copy(), width=w0.copy(),
+             conc=conc[midi], opacity=opac[e].copy(),
+             thickness=thick[e].copy(), curvature=np.zeros(len(e)),
+             waviness=np.zeros(len(e)), wave_freq=np.full(len(e), 4.0),
+             dryness=dry[e].copy(),
+             smear=np.where(dyad & (v == 1), 0.5, 0.10),
+             taper_end=np.full(len(e), 0.55))
+
+    def put(m, **cols):
+        for k, c in cols.items():
+            o[k][m] = c
+
+    m = tk == TECH['staccato']
+    put(m, length=np.maximum(26, Lg[m]), thickness=thick[e[m]] * 1.05,
+        dryness=0.42, taper_end=0.35)
+    m = tk == TECH['legato']
+    put(m, taper_end=0.70)
+    # lo slide accelera: tratto pieno, coda lunga
+    m = tk == TECH['slide']
+    put(m, width=w0[m] * 0.9, dryness=0.50, taper_end=0.82)
+    m = tk == TECH['bend']
+    put(m, width=w0[m] * 0.82, thickness=thick[e[m]] * 1.15,
+        curvature=-0.65 * sc.bend.filled(2.0)[e[m]],
+        dryness=0.30, taper_end=0.55)
+    m = tk == TECH['vibrato']
+    put(m, width=w0[m] * 0.85, waviness=9.0, wave_freq=5.0, taper_end=0.55)
+    # hammer-on: dab + frustata verso la nota martellata
+    m = (tk == TECH['hammer_on']) & (j == 0)
+    put(m, length=np.maximum(22, Lg[m] * 0.5), thickness=thick[e[m]] * 1.1,
+        dryness=0.30, taper_end=0.4)
+    m = (tk == TECH['hammer_on']) & (j == 1)
+    ht = sc.hammer_to
+    to = np.where(ht.mask[e[m]], midi[m] + 1, ht.data[e[m]])
+    put(m, x=ox[m] + 10 * np.cos(a[m]), y=oy[m] + 10 * np.sin(a[m]),
+        angle=_wrap_many(a[m] - (to - midi[m]) * eng.SEMI_TURN * 2),
+        length=Lg[m] * 0.7, width=w0[m] * 0.55, conc=conc[to],
+        opacity=opac[e[m]] * 0.9, thickness=thick[e[m]] * 0.8,
+        dryness=0.45, taper_end=0.8)
+    m = tk == TECH['double_stop_final']
+    put(m, width=w0[m] * 1.1, thickness=thick[e[m]] * 1.30, waviness=7.0,
+        wave_freq=4.0, dryness=0.22, taper_end=0.6)
+    m = tk == TECH['double_stop']
+    put(m, length=np.maximum(24, Lg[m]), dryness=0.40, taper_end=0.45)
+
+    # quality: meno/più ripetizioni, stessa copertura (quality.py)
+    o['opacity'] = q.rep_opacity(o['opacity'], eng._N_REP)
+    o['thickness'] = q.rep_thickness(o['thickness'], eng._N_REP)
+    # "mano che ritorna": passate col jitter, nell'ordine storico x, y, θ
+    nrep = q.reps(eng._N_REP)
+    s = np.repeat(np.arange(len(e)), nrep)
+    z = gauss(random, 3 * len(s)).reshape(-1, 3)
+    o = {k: c[s] for k, c in o.items()}
+    o['x'] = o['x'] + z[:, 0] * eng._J_POS
+    o['y'] = o['y'] + z[:, 1] * eng._J_POS
+    o['angle'] = o['angle'] + z[:, 2] * eng._J_ANG
+    o['event'] = e[s]
+    return o
+
+
 if __name__ == '__main__':
     import argparse
     p = argparse.ArgumentParser(
         description='guitarzorn v9 — la melodia disegna un cammino')
     p.add_argument('--seed', type=int, default=42)
     p.add_argument('--out', default='johnny_b_goode_zorn_v9.png')
+    p.add_argument('--kernel', choices=OilCanvas.KERNELS, default='fast',
+                   help="kernel di pennellata ('reference' = loop storico)")
+    p.add_argument('--ground-cache', nargs='?', const=GroundCache.DEFAULT_ROOT,
+                   metavar='DIR', help='cache su disco dell\'imprimitura')
+    p.add_argument('--ground-cache-mb', type=int, default=2048)
+    p.add_argument('--storage', choices=OilCanvas.STORAGES,
+                   default='float32', help='memoria della tela (compatta: '
+                   'u16/f16 planare)')
+    p.add_argument('--rng', choices=OilCanvas.RNG_MODES, default='stream',
+                   help="rumore per pennellata ('counter' = Philox per indice)")
+    p.add_argument('--noise', choices=OilCanvas.NOISES, default='bank',
+                   help="'bank' = finestre della banca del seed, "
+                        "'synth' = sintesi per pennellata (storico)")
+    p.add_argument('--ground-level', type=int, choices=GROUND_LEVELS,
+                   help='imprimitura su uno strato a 1/2^N della '
+                   'risoluzione (1 = metà, 2 = quarto; default: quello '
+                   'di --quality, 0 tranne draft)')
+    p.add_argument('--stroke-threads', type=int, default=0, metavar='T',
+                   help='pennellate con bbox disgiunti su T thread '
+                        '(stesso quadro; 0 = in serie)')
+    p.add_argument('--render-workers', type=int, default=0, metavar='N',
+                   help='render a bande di righe su N thread (stesso '
+                        'quadro; senza --tile-rows)')
+    p.add_argument('--checkpoints', nargs='?',
+                   const=CheckpointStore.DEFAULT_ROOT, metavar='DIR',
+                   help='checkpoint per battuta: dopo una modifica alla '
+                        'partitura riparte dalla prima battuta cambiata')
+    p.add_argument('--checkpoint-mb', type=int, default=2048)
+    p.add_argument('--checkpoint-every', type=int, default=None, metavar='N',
+                   help='un checkpoint ogni N eventi invece che per battuta')
+    p.add_argument('--checkpoint-exact', action='store_true',
+                   help='checkpoint in float32 (ripresa identica bit per '
+                        'bit; default quantizzati)')
+    p.add_argument('--journal', metavar='PATH',
+                   help='diario delle pennellate (niente cache né '
+                        'checkpoint): rifattibile con --replay; col proxy '
+                        'a.zj → a.preview.zj')
+    p.add_argument('--replay', metavar='PATH',
+                   help='rifà il quadro da un diario invece che dalla '
+                        'partitura')
+    p.add_argument('--replay-scale', type=float, default=None, metavar='S',
+                   help='con --replay: scala della tela (default: quella '
+                        'registrata)')
+    p.add_argument('--replay-upto', type=int, default=None, metavar='K',
+                   help='con --replay: solo le prime K pennellate')
+    p.add_argument('--profile', nargs='?', const='', metavar='JSON',
+                   help='report per fase (default: <out>.profile.json)')
+    p.add_argument('--profile-cprofile', metavar='DIR',
+                   help='con --profile: un dump cProfile per fase in DIR')
+    p.add_argument('--preview', type=float, default=None, metavar='S',
+                   help='proxy a scala S (es. 0.25) → <out>.preview.png')
+    p.add_argument('--progressive', action='store_true',
+                   help='prima il proxy (--preview, default 0.25), poi la '
+                        'piena risoluzione')
+    p.add_argument('--tile-rows', type=int, default=None,
+                   help='render a bande di N righe, PNG in streaming')
+    p.add_argument('--bits', type=int, choices=(8, 16), default=8,
+                   help='profondità del PNG a bande (16 = stampa)')
+    p.add_argument('--turntable', type=int, default=0, metavar='N',
+                   help='anche N luci radenti → <out>.lightNN.png')
+    p.add_argument('--shadows', action='store_true',
+                   help="ombre portate dell'impasto (scansione d'orizzonte)")
+    p.add_argument('--quality', choices=QUALITIES, default='standard',
+                   help='densità di setole, campioni e ripetizioni '
+                        '(draft per le anteprime, final/print per le consegne)')
     args = p.parse_args()
-    ZornMelodicWalk(seed=args.seed).create(out=args.out)
+    if args.replay:
+        replay_to(args.replay, args.out, scale=args.replay_scale,
+                  upto=args.replay_upto, tile_rows=args.tile_rows,
+                  bits=args.bits, shadows=args.shadows,
+                  workers=args.render_workers)
+        raise SystemExit(0)
+    gc = (GroundCache(args.ground_cache, args.ground_cache_mb << 20)
+          if args.ground_cache else None)
+    ck = (CheckpointStore(args.checkpoints, exact=args.checkpoint_exact,
+                          max_bytes=args.checkpoint_mb << 20)
+          if args.checkpoints else None)
+    scales = preview_scales(args.preview, args.progressive)
+    for scale in scales:
+        out = preview_path(args.out, scale)
+        # un diario per scala, come il PNG: il proxy non sovrascrive
+        journal = args.journal and preview_path(args.journal, scale)
+        prof = PhaseProfiler(enabled=args.profile is not None,
+                             cprofile_dir=args.profile_cprofile)
+        eng = ZornMelodicWalk(seed=args.seed, kernel=args.kernel,
+                              ground_cache=gc, storage=args.storage,
+                              rng_mode=args.rng, scale=scale, noise=args.noise,
+                              ground_level=args.ground_level,
+                              quality=args.quality,
+                              stroke_threads=args.stroke_threads,
+                              render_workers=args.render_workers,
+                              checkpoints=ck,
+                              checkpoint_every=args.checkpoint_every,
+                              journal=journal)
+        eng.create(out=out, tile_rows=args.tile_rows, bits=args.bits,
+                   profile=prof, turntable=args.turntable,
+                   shadows=args.shadows)
+        prof.write(args.profile if args.profile and scale == scales[-1]
+                   else out.rsplit('.', 1)[0] + '.profile.json')